@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[('assets', 'assets')],
-    hiddenimports=['PySide6.QtCharts', 'PySide6.QtSvg', 'PySide6.QtSvgWidgets', 'reportlab', 'openpyxl', 'msal', 'requests'],
+    hiddenimports=['PySide6.QtCharts', 'PySide6.QtSvg', 'PySide6.QtSvgWidgets', 'reportlab', 'openpyxl', 'msal', 'requests', 'numpy'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
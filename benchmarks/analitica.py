@@ -0,0 +1,219 @@
+"""Benchmark de la instantánea analítica contra los caminos SQL/Python
+
+Por escala genera una base sintética y compara, para cada agregado, la forma
+anterior (consultas por mes, filas en dicts recorridas en Python) con
+services.analitica_service: carga inicial, refresco incremental después de
+registrar unos pagos y cada consulta ya cargada. Los resultados de ambos
+caminos se comparan antes de medir, después de pisar un pago ya cargado con
+INSERT OR REPLACE (que la instantánea debe notar y recargar).
+
+Uso:
+    python -m benchmarks.analitica [10k 100k 1M] [--cambios N] [--repeticiones N]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+import db
+from benchmarks.datos_sinteticos import ESCALAS, generar_escala
+from services import analitica_service
+
+
+def _filas(sql, params=()):
+    conn = db.get_connection()
+    filas = [dict(r) for r in conn.execute(sql, params).fetchall()]
+    conn.close()
+    return filas
+
+
+# ─────────────────────────── caminos SQL/Python ───────────────────
+
+def _sql_comparacion(año):
+    """24 consultas: la suma de pagos y la de egresos de cada mes."""
+    meses = []
+    for mes in range(1, 13):
+        desde = date(año, mes, 1)
+        hasta = date(año + mes // 12, mes % 12 + 1, 1) - timedelta(days=1)
+        rango = (desde.isoformat(), hasta.isoformat())
+        ingresos = _filas("SELECT COALESCE(SUM(monto), 0) AS t FROM pagos "
+                          "WHERE fecha >= ? AND fecha <= ?", rango)[0]["t"]
+        egresos = _filas("SELECT COALESCE(SUM(monto), 0) AS t FROM egresos "
+                         "WHERE fecha >= ? AND fecha <= ?", rango)[0]["t"]
+        meses.append((round(ingresos, 2), round(egresos, 2)))
+    return meses
+
+
+def _np_comparacion(año):
+    desde, hasta = date(año, 1, 1), date(año, 12, 31)
+    ingresos = {f["inicio"].month: f["total"] for f in analitica_service.serie("pagos", "mes", desde, hasta)}
+    egresos = {f["inicio"].month: f["total"] for f in analitica_service.serie("egresos", "mes", desde, hasta)}
+    return [(ingresos.get(m, 0.0), egresos.get(m, 0.0)) for m in range(1, 13)]
+
+
+def _py_semanas(desde, hasta):
+    """Pagos del período en dicts, agrupados por lunes en Python."""
+    semanas = {}
+    for p in _filas("SELECT fecha, monto FROM pagos WHERE fecha >= ? AND fecha <= ?",
+                    (desde.isoformat(), hasta.isoformat())):
+        dia = date.fromisoformat(p["fecha"])
+        lunes = dia - timedelta(days=dia.weekday())
+        semanas[lunes] = semanas.get(lunes, 0) + p["monto"]
+    return {k: round(v, 2) for k, v in semanas.items()}
+
+
+def _np_semanas(desde, hasta):
+    return {f["inicio"]: f["total"] for f in analitica_service.serie("pagos", "semana", desde, hasta)}
+
+
+def _sql_metodos(desde, hasta):
+    return {f["metodo"]: round(f["t"], 2) for f in _filas(
+        "SELECT metodo, SUM(monto) AS t FROM pagos WHERE fecha >= ? AND fecha <= ? GROUP BY metodo",
+        (desde.isoformat(), hasta.isoformat()))}
+
+
+def _np_metodos(desde, hasta):
+    return {f["metodo"]: f["total"] for f in analitica_service.por_categoria("pagos", "metodo", desde, hasta)}
+
+
+def _py_percentiles(desde, hasta):
+    montos = [p["monto"] for p in _filas("SELECT monto FROM pagos WHERE fecha >= ? AND fecha <= ?",
+                                         (desde.isoformat(), hasta.isoformat()))]
+    cortes = statistics.quantiles(montos, n=100, method="inclusive")
+    return {q: round(cortes[q - 1], 2) for q in (25, 50, 75, 90)}
+
+
+def _np_percentiles(desde, hasta):
+    return analitica_service.percentiles("pagos", (25, 50, 75, 90), desde, hasta)
+
+
+def _py_media_movil(desde, hasta, ventana=7):
+    por_dia = {f["fecha"]: f["t"] for f in _filas(
+        "SELECT fecha, SUM(monto) AS t FROM pagos WHERE fecha >= ? AND fecha <= ? GROUP BY fecha",
+        (desde.isoformat(), hasta.isoformat()))}
+    dias = [por_dia.get((desde + timedelta(days=i)).isoformat(), 0.0)
+            for i in range((hasta - desde).days + 1)]
+    medias = []
+    for i in range(len(dias)):
+        ventana_dias = dias[max(0, i - ventana + 1):i + 1]
+        medias.append(round(sum(ventana_dias) / len(ventana_dias), 2))
+    return medias
+
+
+def _np_media_movil(desde, hasta, ventana=7):
+    return [f["media"] for f in analitica_service.media_movil("pagos", ventana, desde, hasta)]
+
+
+def _sql_asistencias_mes(desde, hasta):
+    return {f["mes"]: f["n"] for f in _filas(
+        "SELECT strftime('%Y-%m', fecha) AS mes, COUNT(*) AS n FROM asistencias "
+        "WHERE fecha >= ? AND fecha <= ? GROUP BY mes", (desde.isoformat(), hasta.isoformat()))}
+
+
+def _np_asistencias_mes(desde, hasta):
+    return {f["inicio"].strftime("%Y-%m"): f["cantidad"]
+            for f in analitica_service.serie("asistencias", "mes", desde, hasta)}
+
+
+# ─────────────────────────── medición ─────────────────────────────
+
+def _ms(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def _iguales(a, b):
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_iguales(a[k], b[k]) for k in a)
+    if isinstance(a, (list, tuple)):
+        return len(a) == len(b) and all(_iguales(x, y) for x, y in zip(a, b))
+    return abs(a - b) < 0.015
+
+
+def _registrar_pagos(cantidad):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO pagos (cliente_id, fecha, monto, metodo, concepto) VALUES (?, date('now'), ?, 'Efectivo', 'Benchmark')",
+        [((i % 50) + 1, 10.0 + i) for i in range(cantidad)])
+    conn.commit()
+    conn.close()
+
+
+def _reemplazar_pago():
+    """Pisa el primer pago (id ya cargado) con otro monto y fecha."""
+    conn = db.get_connection()
+    conn.execute("""
+        INSERT OR REPLACE INTO pagos (id, cliente_id, fecha, monto, metodo, concepto)
+        SELECT id, cliente_id, date('now', '-10 days'), monto + 1000, metodo, concepto
+        FROM pagos ORDER BY id LIMIT 1
+    """)
+    conn.commit()
+    conn.close()
+
+
+def medir_escala(escala, cambios=1000, repeticiones=3):
+    """Devuelve (tiempos de carga, filas de comparación [(nombre, ms SQL, ms NumPy)])."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "analitica.db"
+        generar_escala(path, escala)
+        db.set_db_path(path)
+
+        carga = {}
+        for tabla in analitica_service.COLUMNAS:
+            inicio = time.perf_counter()
+            analitica_service.contar(tabla)
+            carga[tabla] = (time.perf_counter() - inicio) * 1000
+
+        _registrar_pagos(cambios)
+        inicio = time.perf_counter()
+        analitica_service.contar("pagos")
+        carga["incremental"] = (time.perf_counter() - inicio) * 1000
+        _reemplazar_pago()
+
+        hoy = date.today()
+        año = hoy.year - 1
+        desde, hasta = hoy - timedelta(days=365), hoy
+        casos = [
+            ("comparación meses", lambda: _sql_comparacion(año), lambda: _np_comparacion(año)),
+            ("pagos por semana", lambda: _py_semanas(desde, hasta), lambda: _np_semanas(desde, hasta)),
+            ("pagos por método", lambda: _sql_metodos(desde, hasta), lambda: _np_metodos(desde, hasta)),
+            ("percentiles monto", lambda: _py_percentiles(desde, hasta), lambda: _np_percentiles(desde, hasta)),
+            ("media móvil 7 días", lambda: _py_media_movil(desde, hasta), lambda: _np_media_movil(desde, hasta)),
+            ("asistencias por mes", lambda: _sql_asistencias_mes(desde, hasta),
+             lambda: _np_asistencias_mes(desde, hasta)),
+        ]
+        filas = []
+        for nombre, anterior, nuevo in casos:
+            if not _iguales(anterior(), nuevo()):
+                raise AssertionError(f"{escala}: '{nombre}' no coincide con el camino SQL/Python")
+            filas.append((nombre, _ms(anterior, repeticiones), _ms(nuevo, repeticiones)))
+        analitica_service.cerrar()
+    return carga, filas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la instantánea analítica de KyoGym")
+    parser.add_argument("escalas", nargs="*", default=["10k"], choices=list(ESCALAS))
+    parser.add_argument("--cambios", type=int, default=1000, help="Pagos registrados antes del refresco incremental")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    for escala in args.escalas:
+        carga, filas = medir_escala(escala, args.cambios, args.repeticiones)
+        print(f"\n== {escala} ==")
+        print("carga inicial: " + ", ".join(f"{t} {ms:.0f} ms" for t, ms in carga.items()
+                                            if t != "incremental"))
+        print(f"refresco con {args.cambios} pagos nuevos: {carga['incremental']:.1f} ms")
+        print(f"{'agregado':<22}{'SQL/Python ms':>15}{'NumPy ms':>11}{'x':>8}")
+        for nombre, anterior, nuevo in filas:
+            print(f"{nombre:<22}{anterior:>15.1f}{nuevo:>11.2f}{anterior / max(nuevo, 1e-6):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""Asesor de índices: EXPLAIN QUERY PLAN sobre las consultas reales de los servicios
+
+Genera una base sintética grande, ejecuta las funciones públicas de los
+servicios con db.set_trace_callback activo para capturar cada sentencia
+(con sus parámetros expandidos) y pasa cada una por EXPLAIN QUERY PLAN.
+Reporta los recorridos completos de tabla, los B-tree temporales (ORDER BY /
+GROUP BY sin índice) y los índices automáticos, junto con índices
+redundantes (prefijo de otro índice de la misma tabla).
+
+Uso:
+    python -m benchmarks.asesor_indices [10k|100k|1M] [--comparar]
+
+Con --comparar el reporte se genera primero con el esquema base (versión 1)
+y luego con todas las migraciones, para ver qué resolvieron los índices.
+"""
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import db
+from benchmarks.catalogo import funciones_lectura
+from benchmarks.datos_sinteticos import generar_escala
+from migraciones import aplicar_migraciones
+
+
+def _consultas_servicios():
+    """Lecturas del catálogo más escrituras que buscan filas antes de modificar
+    (la base es desechable)."""
+    from services import membresia_service, pago_service
+    return funciones_lectura() + [
+        ("pago_service.eliminar_pago", lambda: pago_service.eliminar_pago(3)),
+        ("membresia_service.eliminar_membresia", lambda: membresia_service.eliminar_membresia(5)),
+    ]
+
+
+_SENTENCIA_ANALIZABLE = re.compile(r"^\s*(SELECT|WITH|UPDATE|DELETE)\b", re.IGNORECASE)
+_SCAN_COMPLETO = re.compile(r"^SCAN (\w+)$")
+
+
+def capturar_sentencias(consultas):
+    """Ejecuta cada consulta con el trace activo. Devuelve un OrderedDict
+    {sql: (función, milisegundos)} con la primera función que la emitió."""
+    sentencias = OrderedDict()
+    actual = {"nombre": None}
+
+    def _trace(sql):
+        if _SENTENCIA_ANALIZABLE.match(sql):
+            sentencias.setdefault(" ".join(sql.split()), [actual["nombre"], 0.0])
+
+    db.set_trace_callback(_trace)
+    try:
+        for nombre, funcion in consultas:
+            actual["nombre"] = nombre
+            antes = set(sentencias)
+            inicio = time.perf_counter()
+            funcion()
+            ms = (time.perf_counter() - inicio) * 1000
+            nuevas = [sql for sql in sentencias if sql not in antes]
+            for sql in nuevas:
+                sentencias[sql][1] = ms / len(nuevas)
+    finally:
+        db.set_trace_callback(None)
+    return sentencias
+
+
+def analizar_plan(conn, sql):
+    """Devuelve (detalles, problemas) del EXPLAIN QUERY PLAN de `sql`."""
+    detalles = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+    problemas = []
+    for detalle in detalles:
+        if _SCAN_COMPLETO.match(detalle):
+            problemas.append(f"recorrido completo: {detalle}")
+        elif "TEMP B-TREE" in detalle:
+            problemas.append(f"B-tree temporal: {detalle}")
+        elif "AUTOMATIC" in detalle:
+            problemas.append(f"índice automático: {detalle}")
+    return detalles, problemas
+
+
+def indices_redundantes(conn):
+    """Índices cuyas columnas son prefijo de otro índice de la misma tabla."""
+    indices = {}
+    for (tabla,) in conn.execute("SELECT name FROM sqlite_master WHERE type='table'"):
+        for fila in conn.execute(f"PRAGMA index_list({tabla})"):
+            nombre = fila[1]
+            columnas = tuple(c[2] for c in conn.execute(f"PRAGMA index_info({nombre})"))
+            indices.setdefault(tabla, []).append((nombre, columnas))
+    redundantes = []
+    for tabla, lista in indices.items():
+        for nombre, columnas in lista:
+            for otro, columnas_otro in lista:
+                if (otro != nombre and len(columnas) < len(columnas_otro)
+                        and columnas_otro[:len(columnas)] == columnas
+                        and not nombre.startswith("sqlite_autoindex")):
+                    redundantes.append((tabla, nombre, otro))
+                    break
+    return redundantes
+
+
+def generar_reporte(path, consultas=None, salida=print):
+    """Analiza los planes de todas las consultas contra la base en `path`.
+    Devuelve la lista de (función, sql, problemas) con al menos un problema."""
+    db.set_db_path(path)
+    sentencias = capturar_sentencias(consultas or _consultas_servicios())
+
+    conn = sqlite3.connect(str(path))
+    hallazgos = []
+    for sql, (nombre, ms) in sentencias.items():
+        _, problemas = analizar_plan(conn, sql)
+        if problemas:
+            hallazgos.append((nombre, sql, problemas))
+            salida(f"\n■ {nombre}  (~{ms:.1f} ms)")
+            salida(f"  {sql[:160]}{'…' if len(sql) > 160 else ''}")
+            for problema in problemas:
+                salida(f"    ⚠ {problema}")
+    for tabla, nombre, otro in indices_redundantes(conn):
+        salida(f"\n◆ Índice redundante en {tabla}: {nombre} es prefijo de {otro}")
+    conn.close()
+    salida(f"\n{len(sentencias)} sentencias analizadas, {len(hallazgos)} con problemas")
+    return hallazgos
+
+
+def main(escala="10k", comparar=False):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "asesor.db"
+        if comparar:
+            print("═" * 70)
+            print(f"Esquema base (versión 1) — escala {escala}")
+            print("═" * 70)
+            generar_escala(path, escala, hasta_version=1)
+            generar_reporte(path)
+            conn = sqlite3.connect(str(path))
+            aplicar_migraciones(conn)
+            conn.close()
+        else:
+            generar_escala(path, escala)
+        print("═" * 70)
+        print(f"Esquema actual — escala {escala}")
+        print("═" * 70)
+        generar_reporte(path)
+
+
+if __name__ == "__main__":
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    main(argumentos[0] if argumentos else "10k", comparar="--comparar" in sys.argv)
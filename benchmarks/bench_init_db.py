@@ -0,0 +1,131 @@
+"""Benchmark del arranque en frío de la base de datos (migraciones)
+
+Mide tres escenarios sobre archivos temporales:
+- base nueva: se aplican todas las migraciones
+- base legada: esquema anterior al versionado (user_version = 0)
+- base al día: el arranque normal, que solo lee PRAGMA user_version
+
+Uso:
+    python -m benchmarks.bench_init_db [repeticiones]
+"""
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from migraciones import VERSION_ACTUAL, aplicar_migraciones, obtener_version
+
+
+def _conectar(path):
+    conn = sqlite3.connect(str(path), timeout=30.0)
+    conn.execute('PRAGMA journal_mode=WAL')
+    return conn
+
+
+def crear_db_legada(path):
+    """Crea una base con el esquema previo a las columnas email, stock_minimo,
+    producto_id/cantidad y sin tablas de egresos ni asistencias."""
+    conn = _conectar(path)
+    conn.executescript("""
+        CREATE TABLE clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            telefono TEXT,
+            sexo TEXT,
+            fecha_nacimiento DATE,
+            fecha_registro DATE NOT NULL,
+            activo INTEGER DEFAULT 1
+        );
+        CREATE TABLE membresias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            fecha_inicio DATE NOT NULL,
+            fecha_vencimiento DATE NOT NULL,
+            monto REAL NOT NULL,
+            pago_id INTEGER
+        );
+        CREATE TABLE pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            monto REAL NOT NULL,
+            metodo TEXT NOT NULL,
+            concepto TEXT
+        );
+        CREATE TABLE inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            precio REAL DEFAULT 0.0,
+            fecha_registro DATE DEFAULT (DATE('now'))
+        );
+        INSERT INTO clientes (nombre, telefono, fecha_registro) VALUES ('Cliente Legado', '5555-0000', '2024-01-10');
+        INSERT INTO pagos (cliente_id, fecha, monto, metodo, concepto) VALUES (1, '2024-01-10', 25.0, 'Efectivo', 'Mensualidad');
+    """)
+    conn.commit()
+    conn.close()
+
+
+def verificar_replace(conn):
+    """Comprueba que un INSERT OR REPLACE sobre una fila existente deja
+    cliente_stats igual a recalcularla desde pagos y asistencias. Lo hace
+    dentro de una transacción que después deshace."""
+    conn.execute("PRAGMA recursive_triggers = ON")
+    conn.execute("BEGIN")
+    try:
+        conn.execute("INSERT INTO pagos (id, cliente_id, fecha, monto, metodo) "
+                     "VALUES (900001, 900001, '2024-01-10', 10, 'Efectivo')")
+        conn.execute("INSERT OR REPLACE INTO pagos (id, cliente_id, fecha, monto, metodo) "
+                     "VALUES (900001, 900001, '2024-01-11', 20, 'Efectivo')")
+        conn.execute("INSERT INTO asistencias (cliente_id, fecha) VALUES (900001, '2024-01-10')")
+        conn.execute("INSERT OR REPLACE INTO asistencias (cliente_id, fecha) VALUES (900001, '2024-01-10')")
+        stats = conn.execute("""
+            SELECT total_pagado, cantidad_pagos, ultimo_pago, total_asistencias
+            FROM cliente_stats WHERE cliente_id = 900001
+        """).fetchone()
+        assert stats == (20.0, 1, "2024-01-11", 1), f"cliente_stats tras INSERT OR REPLACE: {stats}"
+    finally:
+        conn.rollback()
+
+
+def _medir(preparar, repeticiones):
+    """Devuelve la lista de tiempos (ms) de aplicar_migraciones tras preparar()."""
+    tiempos = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(repeticiones):
+            path = Path(tmp) / f"bench_{i}.db"
+            preparar(path)
+            conn = _conectar(path)
+            inicio = time.perf_counter()
+            aplicar_migraciones(conn)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+            assert obtener_version(conn) == VERSION_ACTUAL
+            verificar_replace(conn)
+            conn.close()
+    return tiempos
+
+
+def _preparar_actual(path):
+    conn = _conectar(path)
+    aplicar_migraciones(conn)
+    conn.close()
+
+
+def main(repeticiones=20):
+    escenarios = [
+        ("base nueva", lambda path: None),
+        ("base legada", crear_db_legada),
+        ("base al día", _preparar_actual),
+    ]
+    print(f"Esquema versión {VERSION_ACTUAL} — {repeticiones} repeticiones")
+    for nombre, preparar in escenarios:
+        tiempos = sorted(_medir(preparar, repeticiones))
+        mediana = tiempos[len(tiempos) // 2]
+        print(f"  {nombre:<12} mediana {mediana:8.3f} ms   mín {tiempos[0]:8.3f} ms   máx {tiempos[-1]:8.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,90 @@
+"""Catálogo de funciones públicas de los servicios usado por los benchmarks
+
+Cada entrada es (nombre, callable sin argumentos). Los parámetros imitan lo
+que piden las vistas: el mes en curso, un cliente con historial, etc.
+"""
+from datetime import date, timedelta
+
+
+def funciones_lectura(cliente_id=7):
+    """Lecturas que disparan las vistas (sin escrituras ni exportaciones)."""
+    from services import (asistencia_service, cliente_service, finanzas_service,
+                          inventario_service, membresia_service, pago_service,
+                          perfil_cliente_service)
+    hoy = date.today()
+    inicio_mes = hoy.replace(day=1)
+    hace_90 = hoy - timedelta(days=90)
+    return [
+        ("cliente_service.listar_clientes", lambda: cliente_service.listar_clientes()),
+        ("cliente_service.listar_clientes(buscar)", lambda: cliente_service.listar_clientes(buscar="gar")),
+        ("cliente_service.verificar_telefono_existente",
+         lambda: cliente_service.verificar_telefono_existente("6000-0042")),
+        ("cliente_service.contar_clientes_por_sexo", cliente_service.contar_clientes_por_sexo),
+        ("membresia_service.listar_membresias", lambda: membresia_service.listar_membresias()),
+        ("membresia_service.listar_membresias(cliente)",
+         lambda: membresia_service.listar_membresias(cliente_id=cliente_id)),
+        ("membresia_service.obtener_membresia_activa",
+         lambda: membresia_service.obtener_membresia_activa(cliente_id)),
+        ("membresia_service.contar_membresias_por_estado", membresia_service.contar_membresias_por_estado),
+        ("membresia_service.obtener_proximas_a_vencer", membresia_service.obtener_proximas_a_vencer),
+        ("membresia_service.obtener_membresia", lambda: membresia_service.obtener_membresia(1)),
+        ("pago_service.listar_pagos", lambda: pago_service.listar_pagos()),
+        ("pago_service.listar_pagos(cliente)", lambda: pago_service.listar_pagos(cliente_id=cliente_id)),
+        ("pago_service.obtener_pagos_del_mes", pago_service.obtener_pagos_del_mes),
+        ("pago_service.calcular_total_mes", pago_service.calcular_total_mes),
+        ("pago_service.obtener_pago", lambda: pago_service.obtener_pago(1)),
+        ("finanzas_service.listar_ingresos(mes)",
+         lambda: finanzas_service.listar_ingresos(fecha_desde=inicio_mes, fecha_hasta=hoy)),
+        ("finanzas_service.listar_ingresos(cliente)",
+         lambda: finanzas_service.listar_ingresos(cliente="gar")),
+        ("finanzas_service.listar_egresos(categoria)",
+         lambda: finanzas_service.listar_egresos(fecha_desde=hace_90, fecha_hasta=hoy,
+                                                 categoria="Servicios")),
+        ("finanzas_service.obtener_resumen_mes", finanzas_service.obtener_resumen_mes),
+        ("finanzas_service.obtener_comparacion_meses", finanzas_service.obtener_comparacion_meses),
+        ("finanzas_service.obtener_estadisticas_clientes", finanzas_service.obtener_estadisticas_clientes),
+        ("finanzas_service.obtener_gasto_por_cliente", finanzas_service.obtener_gasto_por_cliente),
+        ("finanzas_service.obtener_top_clientes_por_monto", finanzas_service.obtener_top_clientes_por_monto),
+        ("finanzas_service.obtener_clientes_frecuentes", finanzas_service.obtener_clientes_frecuentes),
+        ("finanzas_service.obtener_clientes_inactivos", finanzas_service.obtener_clientes_inactivos),
+        ("finanzas_service.obtener_distribucion_membresias",
+         finanzas_service.obtener_distribucion_membresias),
+        ("finanzas_service.listar_morosos", finanzas_service.listar_morosos),
+        ("perfil_cliente_service.obtener_resumen_cliente",
+         lambda: perfil_cliente_service.obtener_resumen_cliente(cliente_id)),
+        ("perfil_cliente_service.obtener_alertas_cliente",
+         lambda: perfil_cliente_service.obtener_alertas_cliente(cliente_id)),
+        ("perfil_cliente_service.obtener_pagos_cliente",
+         lambda: perfil_cliente_service.obtener_pagos_cliente(cliente_id)),
+        ("asistencia_service.listar_asistencias_recientes",
+         lambda: asistencia_service.listar_asistencias_recientes(cliente_id)),
+        ("asistencia_service.dias_con_asistencia_mes",
+         lambda: asistencia_service.dias_con_asistencia_mes(cliente_id, hoy.year, hoy.month)),
+        ("inventario_service.listar_productos", lambda: inventario_service.listar_productos()),
+        ("inventario_service.obtener_categorias", inventario_service.obtener_categorias),
+        ("inventario_service.obtener_stock_bajo", inventario_service.obtener_stock_bajo),
+    ]
+
+
+def funciones_exportacion():
+    """Exportaciones de reportes y la lectura completa de la sincronización.
+
+    Requieren openpyxl/reportlab (y msal para el módulo de sincronización);
+    las que no se pueden importar se devuelven con callable None.
+    """
+    from services import finanzas_service
+    funciones = [
+        ("finanzas_service.exportar_excel_reporte", finanzas_service.exportar_excel_reporte),
+        ("finanzas_service.exportar_pdf_reporte", finanzas_service.exportar_pdf_reporte),
+        ("finanzas_service.exportar_excel_reporte_diario", finanzas_service.exportar_excel_reporte_diario),
+        ("finanzas_service.exportar_pdf_reporte_diario", finanzas_service.exportar_pdf_reporte_diario),
+    ]
+    try:
+        from sync_onedrive_personal import OneDriveSyncPersonal
+        # read_database no depende de la autenticación; se evita __init__
+        # para no crear archivos de configuración ni cargar tokens.
+        syncer = OneDriveSyncPersonal.__new__(OneDriveSyncPersonal)
+        funciones.append(("OneDriveSyncPersonal.read_database", syncer.read_database))
+    except ImportError:
+        funciones.append(("OneDriveSyncPersonal.read_database", None))
+    return funciones
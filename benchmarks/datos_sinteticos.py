@@ -0,0 +1,200 @@
+"""Generador de bases de datos sintéticas de un gimnasio grande
+
+Crea una base con el esquema real (migraciones) y la llena con inserciones
+masivas: clientes, pagos, membresías ligadas a su pago, asistencias,
+inventario con movimientos y egresos. Los datos son deterministas para una
+misma semilla, de modo que dos corridas de benchmark son comparables.
+
+Uso:
+    python -m benchmarks.datos_sinteticos ruta.db [10k|100k|1M]
+"""
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from migraciones import aplicar_migraciones
+
+# Tamaños predefinidos, nombrados por la cantidad de pagos
+ESCALAS = {
+    "10k": dict(pagos=10_000, clientes=600, asistencias=30_000, egresos=1_000,
+                productos=40, movimientos=2_000),
+    "100k": dict(pagos=100_000, clientes=6_000, asistencias=300_000, egresos=10_000,
+                 productos=120, movimientos=20_000),
+    "1M": dict(pagos=1_000_000, clientes=50_000, asistencias=2_000_000, egresos=100_000,
+               productos=300, movimientos=200_000),
+}
+
+NOMBRES = ["Ana", "Luis", "María", "José", "Carlos", "Lucía", "Pedro", "Sofía",
+           "Jorge", "Elena", "Miguel", "Valeria", "Diego", "Camila", "Andrés", "Paula"]
+APELLIDOS = ["García", "Pérez", "López", "Martínez", "Gómez", "Hernández", "Díaz",
+             "Rodríguez", "Sánchez", "Ramírez", "Torres", "Flores", "Castillo", "Vargas"]
+METODOS = ["Efectivo", "Tarjeta", "Transferencia", "Yappy"]
+CATEGORIAS_INVENTARIO = ["Suplementos", "Bebidas", "Accesorios", "Ropa"]
+CATEGORIAS_EGRESO = ["Alquiler", "Servicios", "Sueldos", "Mantenimiento", "Inventario", "Otro"]
+
+# Fracción de pagos que corresponden a una membresía (el resto son ventas/días)
+FRACCION_MEMBRESIA = 0.7
+LOTE = 20_000
+
+
+def _lotes(filas):
+    """Agrupa un iterable de filas en listas de tamaño LOTE para executemany."""
+    lote = []
+    for fila in filas:
+        lote.append(fila)
+        if len(lote) >= LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def generar_base(path, pagos=10_000, clientes=None, asistencias=None, egresos=None,
+                 productos=40, movimientos=None, anios=3, semilla=42, hasta_version=None):
+    """Crea (o reemplaza) una base sintética en `path` y devuelve un dict con
+    la cantidad de filas generadas por tabla.
+
+    `hasta_version` limita las migraciones aplicadas, útil para comparar
+    planes de consulta antes y después de una migración de índices.
+    """
+    path = Path(path)
+    for sufijo in ("", "-wal", "-shm"):
+        Path(str(path) + sufijo).unlink(missing_ok=True)
+
+    clientes = clientes or max(50, pagos // 16)
+    asistencias = asistencias if asistencias is not None else pagos * 3
+    egresos = egresos if egresos is not None else pagos // 10
+    movimientos = movimientos if movimientos is not None else pagos // 5
+
+    rnd = random.Random(semilla)
+    hoy = date.today()
+    inicio = hoy - timedelta(days=365 * anios)
+    total_dias = (hoy - inicio).days
+
+    def fecha_aleatoria():
+        return (inicio + timedelta(days=rnd.randrange(total_dias + 1))).isoformat()
+
+    conn = sqlite3.connect(str(path))
+    conn.execute("PRAGMA journal_mode=WAL")
+    aplicar_migraciones(conn, hasta=hasta_version)
+    conn.execute("PRAGMA synchronous=OFF")
+    cur = conn.cursor()
+
+    # ── Clientes ──────────────────────────────────────────────
+    def filas_clientes():
+        for i in range(clientes):
+            nacimiento = date(rnd.randint(1955, 2008), rnd.randint(1, 12), rnd.randint(1, 28))
+            yield (f"{rnd.choice(NOMBRES)} {rnd.choice(APELLIDOS)} {i}",
+                   f"{6000 + i // 10000:04d}-{i % 10000:04d}",
+                   rnd.choice(["Masculino", "Femenino", "Masculino", "Femenino", "Otro"]),
+                   nacimiento.isoformat(), fecha_aleatoria(),
+                   0 if rnd.random() < 0.05 else 1, f"cliente{i}@correo.com")
+    for lote in _lotes(filas_clientes()):
+        cur.executemany("""
+            INSERT INTO clientes (nombre, telefono, sexo, fecha_nacimiento, fecha_registro, activo, email)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, lote)
+
+    # ── Inventario ────────────────────────────────────────────
+    cur.executemany("""
+        INSERT INTO inventario (nombre, categoria, cantidad, precio, fecha_registro, stock_minimo)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, [(f"Producto {i}", rnd.choice(CATEGORIAS_INVENTARIO), rnd.randint(0, 200),
+           round(rnd.uniform(1, 60), 2), fecha_aleatoria(), rnd.randint(0, 10))
+          for i in range(productos)])
+
+    # ── Pagos y membresías ────────────────────────────────────
+    # Los ids son consecutivos porque la base se crea vacía.
+    membresias = []
+
+    def filas_pagos():
+        for pago_id in range(1, pagos + 1):
+            cliente_id = rnd.randint(1, clientes)
+            fecha = fecha_aleatoria()
+            if rnd.random() < FRACCION_MEMBRESIA:
+                tipo = "Quincenal" if rnd.random() < 0.25 else "Mensual"
+                monto = 15.0 if tipo == "Quincenal" else 25.0
+                inicio_m = date.fromisoformat(fecha)
+                dias = 15 if tipo == "Quincenal" else 30
+                membresias.append((cliente_id, tipo, fecha,
+                                   (inicio_m + timedelta(days=dias)).isoformat(), monto, pago_id))
+                yield (cliente_id, fecha, monto, rnd.choice(METODOS), f"Membresía {tipo}", None, 1)
+            elif rnd.random() < 0.5:
+                cantidad = rnd.randint(1, 3)
+                yield (cliente_id, fecha, round(rnd.uniform(1, 40), 2) * cantidad,
+                       rnd.choice(METODOS), f"Producto {rnd.randrange(productos)}",
+                       rnd.randint(1, productos), cantidad)
+            else:
+                yield (cliente_id, fecha, 3.0, rnd.choice(METODOS), "Día", None, 1)
+    for lote in _lotes(filas_pagos()):
+        cur.executemany("""
+            INSERT INTO pagos (cliente_id, fecha, monto, metodo, concepto, producto_id, cantidad)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, lote)
+    for lote in _lotes(membresias):
+        cur.executemany("""
+            INSERT INTO membresias (cliente_id, tipo, fecha_inicio, fecha_vencimiento, monto, pago_id)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, lote)
+
+    # ── Asistencias ───────────────────────────────────────────
+    def filas_asistencias():
+        for _ in range(asistencias):
+            entrada = rnd.randint(5 * 60, 21 * 60)
+            salida = min(entrada + rnd.randint(30, 150), 23 * 60 + 59)
+            yield (rnd.randint(1, clientes), fecha_aleatoria(),
+                   f"{entrada // 60:02d}:{entrada % 60:02d}",
+                   f"{salida // 60:02d}:{salida % 60:02d}", "manual")
+    for lote in _lotes(filas_asistencias()):
+        cur.executemany("""
+            INSERT OR IGNORE INTO asistencias (cliente_id, fecha, hora_entrada, hora_salida, origen)
+            VALUES (?, ?, ?, ?, ?)
+        """, lote)
+
+    # ── Movimientos de inventario ─────────────────────────────
+    for lote in _lotes((rnd.randint(1, productos), rnd.choice(["ENTRADA", "SALIDA"]),
+                        rnd.randint(1, 10), "Sintético", fecha_aleatoria())
+                       for _ in range(movimientos)):
+        cur.executemany("""
+            INSERT INTO inventario_movimientos (producto_id, tipo, cantidad, motivo, fecha)
+            VALUES (?, ?, ?, ?, ?)
+        """, lote)
+
+    # ── Egresos ───────────────────────────────────────────────
+    for lote in _lotes((fecha_aleatoria(), rnd.choice(CATEGORIAS_EGRESO), "Gasto sintético",
+                        f"Proveedor {rnd.randint(1, 30)}", rnd.choice(METODOS),
+                        round(rnd.uniform(5, 900), 2))
+                       for _ in range(egresos)):
+        cur.executemany("""
+            INSERT INTO egresos (fecha, categoria, descripcion, proveedor, metodo, monto)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, lote)
+
+    conn.commit()
+    conteo = {tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+              for tabla in ("clientes", "membresias", "pagos", "asistencias",
+                            "inventario", "inventario_movimientos", "egresos")}
+    conn.close()
+    return conteo
+
+
+def generar_escala(path, escala="10k", **kwargs):
+    """Atajo para generar_base con uno de los tamaños de ESCALAS."""
+    parametros = dict(ESCALAS[escala])
+    parametros.update(kwargs)
+    return generar_base(path, **parametros)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+    escala = sys.argv[2] if len(sys.argv) > 2 else "10k"
+    inicio_t = time.perf_counter()
+    conteo = generar_escala(sys.argv[1], escala)
+    print(f"Base '{escala}' generada en {time.perf_counter() - inicio_t:.1f} s")
+    for tabla, filas in conteo.items():
+        print(f"  {tabla:<24} {filas:>10,}")
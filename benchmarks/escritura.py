@@ -0,0 +1,215 @@
+"""Benchmark de escrituras de recepción: llamadas directas contra la cola de
+escritura_service (un hilo escritor con commit agrupado)
+
+Varias recepciones (hilos) mandan ráfagas de pagos, asistencias, ventas,
+membresías y egresos con pausas cortas entre ráfaga y ráfaga, como en la
+hora pico del mostrador. En modo directo cada hilo llama al servicio y
+espera su commit; en modo encolado encola toda la ráfaga y espera sus
+Future antes de la pausa. La latencia va de la llamada (o el encolado) al
+commit de cada operación. Cada modo corre sobre una copia
+de la misma base y al final se comprueba que ambos dejaron las mismas filas
+y que los pagos de cada cliente quedaron en el orden en que se pidieron.
+
+También se cuentan las ventas cuyo descuento de stock se perdió: en modo
+directo dos recepciones pueden leer el mismo stock y escribir ambas el
+mismo resultado; con un único escritor eso no ocurre.
+
+Uso:
+    python -m benchmarks.escritura [--operaciones N] [--recepciones N] [--rafaga N]
+"""
+import argparse
+import random
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import wait
+from datetime import date
+from pathlib import Path
+
+import db
+from benchmarks.datos_sinteticos import generar_base
+from services import (asistencia_service, escritura_service, finanzas_service, inventario_service,
+                      membresia_service, pago_service)
+
+_DIRECTAS = {
+    "pago": pago_service.crear_pago,
+    "asistencia": asistencia_service.registrar_asistencia,
+    "venta": inventario_service.vender_producto,
+    "membresia": membresia_service.crear_membresia,
+    "egreso": finanzas_service.registrar_egreso,
+}
+_ENCOLADAS = {
+    "pago": escritura_service.crear_pago,
+    "asistencia": escritura_service.registrar_asistencia,
+    "venta": escritura_service.vender_producto,
+    "membresia": escritura_service.crear_membresia,
+    "egreso": escritura_service.registrar_egreso,
+}
+# Proporción de cada operación en el mostrador
+_MEZCLA = [("asistencia", 0.5), ("pago", 0.25), ("venta", 0.15), ("membresia", 0.07), ("egreso", 0.03)]
+
+
+def _operacion(tipo, recepcion, orden, rnd, clientes, productos):
+    cliente_id = rnd.randint(1, clientes)
+    if tipo == "pago":
+        return (cliente_id,), {"monto": 25.0, "metodo": "Efectivo", "concepto": f"r{recepcion}-{orden}"}
+    if tipo == "asistencia":
+        return (cliente_id,), {"hora_entrada": f"{rnd.randint(6, 21):02d}:{rnd.randint(0, 59):02d}",
+                               "origen": "benchmark"}
+    if tipo == "venta":
+        return (rnd.randint(1, productos), 1), {}
+    if tipo == "membresia":
+        return (cliente_id,), {"tipo": "Mensual", "monto": 25.0}
+    return (date.today(), "Otros", f"r{recepcion}-{orden}", "", "Efectivo", 10.0), {}
+
+
+def _rafagas(operaciones, recepciones, rafaga, clientes, productos, semilla):
+    """Por recepción, lista de ráfagas; cada ráfaga es una lista de (tipo, args, kwargs)."""
+    rnd = random.Random(semilla)
+    tipos, pesos = zip(*_MEZCLA)
+    por_recepcion = []
+    for recepcion in range(recepciones):
+        pendientes = operaciones // recepciones
+        orden = 0
+        rafagas = []
+        while pendientes > 0:
+            tamano = min(pendientes, rnd.randint(1, rafaga))
+            actual = []
+            for _ in range(tamano):
+                tipo = rnd.choices(tipos, pesos)[0]
+                args, kwargs = _operacion(tipo, recepcion, orden, rnd, clientes, productos)
+                actual.append((tipo, args, kwargs))
+                orden += 1
+            rafagas.append(actual)
+            pendientes -= tamano
+        por_recepcion.append(rafagas)
+    return por_recepcion
+
+
+def _correr(por_recepcion, encolado, pausa_ms):
+    """Corre las ráfagas desde un hilo por recepción. Devuelve (segundos,
+    latencias en ms)."""
+    latencias = []
+    lock = threading.Lock()
+
+    def anotar(inicio):
+        with lock:
+            latencias.append((time.perf_counter() - inicio) * 1000)
+
+    def recepcion(rafagas):
+        for rafaga in rafagas:
+            futuros = []
+            for tipo, args, kwargs in rafaga:
+                inicio = time.perf_counter()
+                if encolado:
+                    # El callback corre en el hilo escritor apenas se confirma el lote
+                    futuro = _ENCOLADAS[tipo](*args, **kwargs)
+                    futuro.add_done_callback(lambda _, i=inicio: anotar(i))
+                    futuros.append(futuro)
+                else:
+                    _DIRECTAS[tipo](*args, **kwargs)
+                    anotar(inicio)
+            # Como en el mostrador: la ráfaga se atiende antes de la siguiente
+            wait(futuros)
+            time.sleep(pausa_ms / 1000)
+
+    hilos = [threading.Thread(target=recepcion, args=(rafagas,)) for rafagas in por_recepcion]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    if encolado:
+        # Los callbacks de lo encolado antes corren antes de que esto vuelva
+        escritura_service.esperar()
+    return time.perf_counter() - inicio, latencias
+
+
+def _estado(stock_inicial):
+    """Filas por tabla, ventas con el stock perdido y cuántos clientes tienen
+    pagos de una misma recepción fuera de orden."""
+    conn = db.get_connection()
+    conteos = {tabla: conn.execute(f"SELECT COUNT(*) FROM {tabla}").fetchone()[0]
+               for tabla in ("pagos", "asistencias", "membresias", "egresos")}
+    ventas = conn.execute("SELECT COUNT(*) FROM inventario_movimientos WHERE motivo = 'Venta de producto'").fetchone()[0]
+    stock = conn.execute("SELECT SUM(cantidad) FROM inventario").fetchone()[0]
+    conteos["ventas"] = ventas
+    secuencias = defaultdict(list)
+    for fila in conn.execute("SELECT cliente_id, concepto FROM pagos WHERE concepto LIKE 'r%-%' ORDER BY id"):
+        recepcion, orden = fila["concepto"][1:].split("-")
+        secuencias[(fila["cliente_id"], recepcion)].append(int(orden))
+    conn.close()
+    desordenados = sum(1 for s in secuencias.values() if s != sorted(s))
+    return conteos, ventas - (stock_inicial - stock), desordenados
+
+
+def medir(operaciones=4_000, recepciones=4, rafaga=40, pausa_ms=5, semilla=11):
+    """Devuelve {modo: dict con segundos, ops/s, p50, p99, máx, ops/commit y
+    stock perdido}."""
+    clientes, productos = 2_000, 40
+    por_recepcion = _rafagas(operaciones, recepciones, rafaga, clientes, productos, semilla)
+    resultados = {}
+    estados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        base = Path(tmp) / "base.db"
+        generar_base(base, pagos=20_000, clientes=clientes, productos=productos)
+        for modo, encolado in (("directo", False), ("encolado", True)):
+            path = Path(tmp) / f"{modo}.db"
+            shutil.copy(base, path)
+            db.set_db_path(path)
+            # Stock de sobra para que ninguna venta falle en uno y no en otro
+            conn = db.get_connection()
+            conn.execute("DELETE FROM inventario_movimientos")
+            conn.execute("UPDATE inventario SET cantidad = ?", (operaciones,))
+            stock_inicial = conn.execute("SELECT SUM(cantidad) FROM inventario").fetchone()[0]
+            conn.commit()
+            conn.close()
+
+            antes = escritura_service.estadisticas()
+            segundos, latencias = _correr(por_recepcion, encolado, pausa_ms)
+            despues = escritura_service.estadisticas()
+            latencias.sort()
+            lotes = despues["lotes"] - antes["lotes"]
+            resultados[modo] = {
+                "segundos": segundos,
+                "ops/s": len(latencias) / segundos,
+                "p50": statistics.median(latencias),
+                "p99": latencias[int(len(latencias) * 0.99) - 1],
+                "máx": latencias[-1],
+                "ops/commit": (despues["operaciones"] - antes["operaciones"]) / lotes if lotes else 1.0,
+            }
+            conteos, perdidas, desordenados = _estado(stock_inicial)
+            resultados[modo]["stock perdido"] = perdidas
+            estados[modo] = conteos
+            if desordenados:
+                raise AssertionError(f"{modo}: {desordenados} clientes con pagos fuera de orden")
+
+    if estados["directo"] != estados["encolado"]:
+        raise AssertionError(f"Las filas no coinciden: {estados}")
+    if resultados["encolado"]["stock perdido"]:
+        raise AssertionError("El modo encolado perdió descuentos de stock")
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de escrituras de recepción de KyoGym")
+    parser.add_argument("--operaciones", type=int, default=4_000)
+    parser.add_argument("--recepciones", type=int, default=4)
+    parser.add_argument("--rafaga", type=int, default=40, help="tamaño máximo de cada ráfaga")
+    parser.add_argument("--pausa-ms", type=float, default=5, help="pausa entre ráfagas")
+    args = parser.parse_args(argv)
+
+    resultados = medir(args.operaciones, args.recepciones, args.rafaga, args.pausa_ms)
+    print(f"\n== {args.operaciones:,} escrituras, {args.recepciones} recepciones, "
+          f"ráfagas de hasta {args.rafaga} ==")
+    print(f"{'modo':<12}{'seg':>8}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'máx ms':>10}{'ops/commit':>12}{'stock perdido':>15}")
+    for modo, r in resultados.items():
+        print(f"{modo:<12}{r['segundos']:>8.2f}{r['ops/s']:>10.0f}{r['p50']:>10.2f}"
+              f"{r['p99']:>10.2f}{r['máx']:>10.2f}{r['ops/commit']:>12.1f}{r['stock perdido']:>15}")
+
+
+if __name__ == "__main__":
+    main()
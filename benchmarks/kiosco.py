@@ -0,0 +1,125 @@
+"""Benchmark del check-in de kiosco: latencia de resolver un código escaneado
+
+Genera una base con muchos clientes y compara el camino por consultas (buscar
+al cliente por id o teléfono y luego su membresía actual) con el índice en
+memoria de services.kiosco_service. Mide también el armado del índice, el
+refresco de un cliente tras escribirlo y lo que tarda en volver
+registrar_entrada (que solo encola) frente a registrar_asistencia directo.
+Antes de medir se comprueba que ambos caminos aceptan y deniegan igual.
+
+Uso:
+    python -m benchmarks.kiosco [--clientes N] [--escaneos N]
+"""
+import argparse
+import random
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+
+import db
+from benchmarks.datos_sinteticos import generar_base
+from services import asistencia_service, escritura_service, kiosco_service, presencia_service
+
+
+def _sql_resolver(codigo):
+    """Camino por consultas: cliente por teléfono o id y su membresía actual."""
+    digitos = "".join(c for c in codigo if c.isdigit())
+    conn = db.get_connection()
+    cursor = conn.cursor()
+    if len(digitos) == kiosco_service.DIGITOS_TELEFONO:
+        telefono = f"{digitos[:4]}-{digitos[4:]}"
+        cursor.execute("SELECT id, activo FROM clientes WHERE telefono = ?", (telefono,))
+    else:
+        cursor.execute("SELECT id, activo FROM clientes WHERE id = ?", (int(digitos),))
+    cliente = cursor.fetchone()
+    permitido = False
+    if cliente is not None and cliente["activo"]:
+        cursor.execute("SELECT fecha_vencimiento FROM membresia_actual WHERE cliente_id = ?", (cliente["id"],))
+        membresia = cursor.fetchone()
+        permitido = membresia is not None and membresia["fecha_vencimiento"] >= date.today().isoformat()
+    conn.close()
+    return permitido
+
+
+def _percentiles_us(funcion, argumentos):
+    tiempos = []
+    for argumento in argumentos:
+        inicio = time.perf_counter()
+        funcion(argumento)
+        tiempos.append((time.perf_counter() - inicio) * 1e6)
+    tiempos.sort()
+    return statistics.median(tiempos), tiempos[int(len(tiempos) * 0.99) - 1], tiempos[-1]
+
+
+def _codigos(clientes, escaneos, rnd):
+    """Mezcla de códigos KG, teléfonos y algunos desconocidos."""
+    codigos = []
+    for _ in range(escaneos):
+        i = rnd.randrange(clientes)
+        sorteo = rnd.random()
+        if sorteo < 0.6:
+            codigos.append(kiosco_service.codigo_cliente(i + 1))
+        elif sorteo < 0.95:
+            codigos.append(f"{6000 + i // 10000:04d}{i % 10000:04d}")
+        else:
+            codigos.append(kiosco_service.codigo_cliente(clientes + 1 + i))
+    return codigos
+
+
+def medir(clientes=100_000, escaneos=5_000, semilla=7):
+    """Devuelve un dict con los tiempos medidos."""
+    rnd = random.Random(semilla)
+    resultados = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "kiosco.db"
+        generar_base(path, pagos=clientes * 2, clientes=clientes, asistencias=0,
+                     egresos=0, movimientos=0)
+        db.set_db_path(path)
+        codigos = _codigos(clientes, escaneos, rnd)
+
+        inicio = time.perf_counter()
+        kiosco_service.cargar_indice()
+        resultados["armar índice (ms)"] = (time.perf_counter() - inicio) * 1000
+
+        for codigo in codigos[:500]:
+            sql = _sql_resolver(codigo.replace(kiosco_service.PREFIJO_CODIGO, ""))
+            if sql != kiosco_service.resolver(codigo)["permitido"]:
+                raise AssertionError(f"'{codigo}' no coincide con el camino SQL")
+
+        resultados["consultas SQL (µs)"] = _percentiles_us(
+            lambda c: _sql_resolver(c.replace(kiosco_service.PREFIJO_CODIGO, "")), codigos)
+        resultados["índice en memoria (µs)"] = _percentiles_us(kiosco_service.resolver, codigos)
+
+        ids = [rnd.randint(1, clientes) for _ in range(200)]
+        resultados["refrescar cliente (µs)"] = _percentiles_us(
+            lambda c: kiosco_service.refrescar_clientes([c]), ids)
+
+        presencia_service.contar_presentes()
+        directos = ids[:100]
+        encolados = [c for c in ids[100:] if c not in directos]
+        resultados["registrar_asistencia directo (µs)"] = _percentiles_us(
+            asistencia_service.registrar_asistencia, directos)
+        resultados["registrar_entrada encolado (µs)"] = _percentiles_us(
+            kiosco_service.registrar_entrada, encolados)
+        escritura_service.esperar()
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del check-in de kiosco de KyoGym")
+    parser.add_argument("--clientes", type=int, default=100_000)
+    parser.add_argument("--escaneos", type=int, default=5_000)
+    args = parser.parse_args(argv)
+
+    resultados = medir(args.clientes, args.escaneos)
+    print(f"\n== {args.clientes:,} clientes, {args.escaneos:,} escaneos ==")
+    print(f"armar índice: {resultados.pop('armar índice (ms)'):.0f} ms")
+    print(f"{'camino':<36}{'p50':>10}{'p99':>10}{'máx':>10}")
+    for nombre, (p50, p99, maximo) in resultados.items():
+        print(f"{nombre:<36}{p50:>10.1f}{p99:>10.1f}{maximo:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
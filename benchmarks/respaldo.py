@@ -0,0 +1,72 @@
+"""Benchmark de respaldos: tiempo y tamaño contra el tamaño de la base
+
+Por escala genera una base sintética y mide un respaldo completo, un
+incremental después de registrar unos pagos, la verificación y la
+restauración.
+
+Uso:
+    python -m benchmarks.respaldo [10k 100k 1M] [--cambios N]
+"""
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import db
+from benchmarks.datos_sinteticos import ESCALAS, generar_escala
+from services import respaldo_service
+
+
+def _mb(n):
+    return n / (1024 * 1024)
+
+
+def _registrar_pagos(cantidad):
+    conn = db.get_connection()
+    conn.executemany(
+        "INSERT INTO pagos (cliente_id, fecha, monto, metodo, concepto) VALUES (?, date('now'), ?, 'Efectivo', 'Benchmark')",
+        [((i % 50) + 1, 10.0 + i) for i in range(cantidad)])
+    conn.commit()
+    conn.close()
+
+
+def medir_escala(escala, cambios=100):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "respaldo.db"
+        generar_escala(path, escala)
+        db.set_db_path(path)
+        respaldo_service.RESPALDOS_DIR = Path(tmp) / "respaldos"
+
+        completo = respaldo_service.crear_respaldo()
+        _registrar_pagos(cambios)
+        incremental = respaldo_service.crear_respaldo()
+
+        inicio = time.perf_counter()
+        respaldo_service.verificar_respaldo(incremental["nombre"])
+        verificar_s = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        respaldo_service.restaurar_respaldo(completo["nombre"], Path(tmp) / "restaurada.db")
+        restaurar_s = time.perf_counter() - inicio
+
+    return completo, incremental, verificar_s, restaurar_s
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de respaldos de KyoGym")
+    parser.add_argument("escalas", nargs="*", default=["10k"], choices=list(ESCALAS))
+    parser.add_argument("--cambios", type=int, default=100, help="Pagos registrados entre respaldos")
+    args = parser.parse_args(argv)
+
+    print(f"{'escala':<7}{'base MB':>9}{'completo s':>12}{'completo MB':>13}"
+          f"{'incr. s':>9}{'incr. KB':>10}{'páginas':>10}{'verif. s':>10}{'restaurar s':>13}")
+    for escala in args.escalas:
+        completo, incremental, verificar_s, restaurar_s = medir_escala(escala, args.cambios)
+        print(f"{escala:<7}{_mb(completo['bytes_base']):>9.1f}{completo['segundos']:>12.2f}"
+              f"{_mb(completo['bytes_archivo']):>13.2f}{incremental['segundos']:>9.2f}"
+              f"{incremental['bytes_archivo'] / 1024:>10.1f}"
+              f"{incremental['paginas_copiadas']:>10}{verificar_s:>10.2f}{restaurar_s:>13.2f}")
+
+
+if __name__ == "__main__":
+    main()
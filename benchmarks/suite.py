@@ -0,0 +1,177 @@
+"""Suite de benchmarks de extremo a extremo sobre bases sintéticas
+
+Genera (o reutiliza) una base por escala, mide cada función del catálogo
+y escribe un reporte JSON y CSV en benchmarks/resultados/. Con --comparar
+se imprime la variación de cada función contra un reporte anterior, para
+detectar regresiones entre versiones.
+
+Uso:
+    python -m benchmarks.suite [10k 100k 1M] [--repeticiones N]
+                               [--regenerar] [--sin-exportar]
+                               [--comparar resultados/anterior.json]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import platform
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import db
+from benchmarks.catalogo import funciones_exportacion, funciones_lectura
+from benchmarks.datos_sinteticos import ESCALAS, generar_escala
+from migraciones import VERSION_ACTUAL
+
+RESULTADOS_DIR = Path(__file__).resolve().parent / "resultados"
+
+
+def usar_base(path, reportes_dir):
+    """Apunta servicios, exportaciones y sincronización a la base sintética."""
+    db.set_db_path(path)
+    from services import finanzas_service
+    finanzas_service.REPORTES_DIR = Path(reportes_dir)
+    try:
+        import sync_onedrive_personal
+        sync_onedrive_personal.DB_PATH = Path(path)
+    except ImportError:
+        pass
+
+
+def preparar_base(escala, regenerar=False):
+    """Devuelve la ruta de la base de la escala, generándola si hace falta.
+    El nombre incluye la versión de esquema para no reutilizar bases viejas."""
+    RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+    path = RESULTADOS_DIR / f"datos_{escala}_v{VERSION_ACTUAL}.db"
+    if regenerar or not path.exists():
+        inicio = time.perf_counter()
+        generar_escala(path, escala)
+        print(f"  base {escala} generada en {time.perf_counter() - inicio:.1f} s")
+    return path
+
+
+def medir(funcion, repeticiones):
+    """Ejecuta `funcion` y devuelve los tiempos en ms (silenciando sus prints)."""
+    tiempos = []
+    for _ in range(repeticiones):
+        with contextlib.redirect_stdout(io.StringIO()):
+            inicio = time.perf_counter()
+            funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def _percentil(valores, p):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def correr_escala(escala, repeticiones=5, exportar=True, regenerar=False):
+    """Mide todas las funciones del catálogo sobre la base de una escala."""
+    path = preparar_base(escala, regenerar)
+    resultados = []
+    with tempfile.TemporaryDirectory() as reportes_tmp:
+        usar_base(path, reportes_tmp)
+        funciones = funciones_lectura()
+        if exportar:
+            funciones += funciones_exportacion()
+        for nombre, funcion in funciones:
+            fila = {"escala": escala, "funcion": nombre, "repeticiones": repeticiones}
+            if funcion is None:
+                fila.update(estado="omitida (dependencia no instalada)")
+            else:
+                try:
+                    tiempos = medir(funcion, repeticiones)
+                    fila.update(estado="ok",
+                                mediana_ms=round(statistics.median(tiempos), 3),
+                                min_ms=round(min(tiempos), 3),
+                                p95_ms=round(_percentil(tiempos, 95), 3),
+                                max_ms=round(max(tiempos), 3))
+                except ImportError as e:
+                    fila.update(estado=f"omitida ({e})")
+                except Exception as e:
+                    fila.update(estado=f"error: {e}")
+            resultados.append(fila)
+            if fila["estado"] == "ok":
+                print(f"  {nombre:<52} {fila['mediana_ms']:>10.2f} ms")
+            else:
+                print(f"  {nombre:<52} {fila['estado']}")
+    return resultados
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=Path(__file__).resolve().parent).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def escribir_reporte(resultados, destino=None):
+    """Escribe el reporte en JSON (con metadatos) y CSV. Devuelve la ruta JSON."""
+    RESULTADOS_DIR.mkdir(parents=True, exist_ok=True)
+    marca = datetime.now().strftime("%Y%m%d_%H%M%S")
+    destino = Path(destino) if destino else RESULTADOS_DIR / f"benchmark_{marca}.json"
+    reporte = {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "commit": _commit_actual(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "plataforma": platform.platform(),
+        "version_esquema": VERSION_ACTUAL,
+        "resultados": resultados,
+    }
+    destino.write_text(json.dumps(reporte, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    columnas = ["escala", "funcion", "estado", "repeticiones", "mediana_ms", "min_ms", "p95_ms", "max_ms"]
+    with open(destino.with_suffix(".csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columnas, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(resultados)
+    return destino
+
+
+def comparar(resultados, path_anterior, umbral_pct=10.0):
+    """Imprime la variación de la mediana contra un reporte anterior."""
+    anterior = json.loads(Path(path_anterior).read_text(encoding="utf-8"))
+    previos = {(r["escala"], r["funcion"]): r for r in anterior["resultados"] if r.get("estado") == "ok"}
+    print(f"\nComparación contra {path_anterior} (commit {anterior.get('commit')})")
+    for r in resultados:
+        previo = previos.get((r["escala"], r["funcion"]))
+        if r.get("estado") != "ok" or not previo or not previo["mediana_ms"]:
+            continue
+        variacion = (r["mediana_ms"] - previo["mediana_ms"]) / previo["mediana_ms"] * 100
+        marca = "▲ REGRESIÓN" if variacion > umbral_pct else ("▼ mejora" if variacion < -umbral_pct else "")
+        print(f"  [{r['escala']}] {r['funcion']:<52} {previo['mediana_ms']:>10.2f} → "
+              f"{r['mediana_ms']:>10.2f} ms  {variacion:+7.1f}%  {marca}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de KyoGym sobre bases sintéticas")
+    parser.add_argument("escalas", nargs="*", default=["10k"], choices=list(ESCALAS))
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--regenerar", action="store_true", help="Regenera las bases aunque existan")
+    parser.add_argument("--sin-exportar", action="store_true", help="Omite exportaciones Excel/PDF")
+    parser.add_argument("--comparar", help="Reporte JSON anterior contra el cual comparar")
+    parser.add_argument("--salida", help="Ruta del reporte JSON (el CSV va al lado)")
+    args = parser.parse_args(argv)
+
+    resultados = []
+    for escala in args.escalas:
+        print(f"\n▶ Escala {escala}")
+        resultados += correr_escala(escala, args.repeticiones,
+                                    exportar=not args.sin_exportar, regenerar=args.regenerar)
+    destino = escribir_reporte(resultados, args.salida)
+    print(f"\nReporte: {destino} (+ {destino.with_suffix('.csv').name})")
+    if args.comparar:
+        comparar(resultados, args.comparar)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,205 +3,218 @@ import sqlite3
 import hashlib
 import os
 import binascii
+import functools
+import threading
+from contextlib import contextmanager
 from utils.constants import DB_PATH
+from pathlib import Path
+import migraciones
+from migraciones import aplicar_migraciones
+
+# Callback opcional que recibe cada sentencia SQL ejecutada (ver set_trace_callback)
+_trace_callback = None
+# Clase de conexión usada por get_connection (ver set_connection_factory)
+_connection_factory = sqlite3.Connection
+# Por hilo: función que indica si hay que abortar las consultas (ver set_cancelacion_hilo)
+_hilo = threading.local()
 
 
 def get_connection():
     """Obtiene una conexión a la base de datos"""
-    conn = sqlite3.connect(str(DB_PATH), timeout=30.0)
+    instantanea = getattr(_hilo, "instantanea", None)
+    if instantanea is not None:
+        return _ConexionInstantanea(instantanea)
+    transaccion = getattr(_hilo, "transaccion", None)
+    if transaccion is not None:
+        return _ConexionInstantanea(transaccion)
+    conn = sqlite3.connect(str(DB_PATH), timeout=30.0, factory=_connection_factory)
     conn.row_factory = sqlite3.Row
     # Habilitar WAL mode para mejor concurrencia
     conn.execute('PRAGMA journal_mode=WAL')
+    # El borrado implícito de INSERT OR REPLACE dispara los triggers de
+    # DELETE (cliente_stats, membresia_actual); sin esto la fila reemplazada
+    # nunca se descuenta
+    conn.execute('PRAGMA recursive_triggers = ON')
+    if _trace_callback is not None:
+        conn.set_trace_callback(_trace_callback)
+    cancelado = getattr(_hilo, "cancelado", None)
+    if cancelado is not None:
+        # Un valor distinto de cero aborta la sentencia con OperationalError("interrupted")
+        conn.set_progress_handler(lambda: 1 if cancelado() else 0, 1000)
     return conn
 
 
-def init_database():
-    """Inicializa la base de datos y crea las tablas si no existen"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    # Tabla de clientes
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS clientes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            telefono TEXT,
-            sexo TEXT,
-            fecha_nacimiento DATE,
-            fecha_registro DATE NOT NULL,
-            activo INTEGER DEFAULT 1
-        )
-    """)
-    
-    # Tabla de membresías
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS membresias (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            tipo TEXT NOT NULL,
-            fecha_inicio DATE NOT NULL,
-            fecha_vencimiento DATE NOT NULL,
-            monto REAL NOT NULL,
-            pago_id INTEGER,
-            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
-            FOREIGN KEY (pago_id) REFERENCES pagos(id) ON DELETE SET NULL
-        )
-    """)
-    
-    # Tabla de pagos
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pagos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            fecha DATE NOT NULL,
-            monto REAL NOT NULL,
-            metodo TEXT NOT NULL,
-            concepto TEXT,
-            producto_id INTEGER,
-            cantidad INTEGER DEFAULT 1,
-            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
-        )
-    """)
-
-    # Tabla de usuarios (para login)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS usuarios (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            password_hash TEXT NOT NULL,
-            salt TEXT NOT NULL,
-            full_name TEXT,
-            role TEXT DEFAULT 'user',
-            created_at DATE DEFAULT (DATE('now')),
-            active INTEGER DEFAULT 1
-        )
-    """)
-    
-    # Crear índices para mejorar el rendimiento
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_membresias_cliente 
-        ON membresias(cliente_id)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_membresias_vencimiento 
-        ON membresias(fecha_vencimiento)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_pagos_cliente 
-        ON pagos(cliente_id)
-    """)
-    
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_pagos_fecha 
-        ON pagos(fecha)
-    """)
-    
-    # Tabla de inventario
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS inventario (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            categoria TEXT NOT NULL,
-            cantidad INTEGER NOT NULL DEFAULT 0,
-            precio REAL DEFAULT 0.0,
-            fecha_registro DATE DEFAULT (DATE('now'))
-        )
-    """)
-    
-    # Índice para búsquedas rápidas por nombre
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_inventario_nombre 
-        ON inventario(nombre)
-    """)
-    
-    # Índice para búsquedas por categoría
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_inventario_categoria 
-        ON inventario(categoria)
-    """)
-    
-        # Tabla de historial de movimientos de inventario
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS inventario_movimientos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            producto_id INTEGER NOT NULL,
-            tipo TEXT NOT NULL,
-            cantidad INTEGER NOT NULL,
-            motivo TEXT,
-            fecha DATE DEFAULT (DATE('now')),
-            FOREIGN KEY (producto_id) REFERENCES inventario(id) ON DELETE CASCADE
-        )
-    """)
-
-    # Tabla de egresos (gastos del gimnasio)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS egresos (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            fecha DATE NOT NULL,
-            categoria TEXT NOT NULL,
-            descripcion TEXT,
-            proveedor TEXT,
-            metodo TEXT NOT NULL,
-            monto REAL NOT NULL
-        )
-    """)
-
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_egresos_fecha
-        ON egresos(fecha)
-    """)
-
-    # Migraciones: agregar columnas nuevas si no existen
+def abrir_lectura(path=None):
+    """Abre una conexión de solo lectura con una transacción ya iniciada: todas
+    sus consultas ven la base tal como estaba al abrirla, aunque otros
+    escriban mientras tanto (WAL). Hay que cerrarla al terminar."""
+    uri = Path(path or DB_PATH).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=30.0, factory=_connection_factory)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA recursive_triggers = ON")
+    if _trace_callback is not None:
+        conn.set_trace_callback(_trace_callback)
+    conn.execute("BEGIN")
+    # La instantánea se fija con la primera lectura, no con BEGIN
+    conn.execute("SELECT 1 FROM sqlite_master LIMIT 1").fetchall()
+    return conn
+
+
+def abrir_lectura_persistente(path=None):
+    """Abre una conexión de solo lectura en modo autocommit pensada para
+    quedar abierta (cachés en memoria que consultan PRAGMA data_version).
+    Se puede usar desde varios hilos si quien la guarda la protege con un
+    lock propio."""
+    uri = Path(path or DB_PATH).resolve().as_uri() + "?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, timeout=30.0, factory=_connection_factory,
+                           isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    if _trace_callback is not None:
+        conn.set_trace_callback(_trace_callback)
+    return conn
+
+
+class _ConexionInstantanea:
+    """Conexión de la instantánea (o de la transacción compartida) tal como
+    la ve un servicio: commit y close no hacen nada porque la conexión es
+    compartida por todo el bloque."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, nombre):
+        return getattr(self._conn, nombre)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@contextmanager
+def instantanea_lectura():
+    """Dentro del bloque, get_connection (en este hilo) devuelve siempre la
+    misma conexión de abrir_lectura: reportes y exportaciones leen un único
+    punto en el tiempo sin bloquear ni ser bloqueados por las escrituras."""
+    if getattr(_hilo, "instantanea", None) is not None:
+        yield _hilo.instantanea
+        return
+    conn = abrir_lectura()
+    _hilo.instantanea = conn
     try:
-        cursor.execute("ALTER TABLE clientes ADD COLUMN email TEXT")
-    except Exception:
-        pass  # Ya existe
+        yield conn
+    finally:
+        _hilo.instantanea = None
+        conn.close()
+
 
+def leyendo_instantanea():
+    """True dentro de instantanea_lectura() en este hilo: lo que se calcule
+    debe salir de esa conexión y no de cachés con otro punto en el tiempo."""
+    return getattr(_hilo, "instantanea", None) is not None
+
+
+def en_instantanea(funcion):
+    """Decorador: ejecuta `funcion` dentro de instantanea_lectura()."""
+    @functools.wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with instantanea_lectura():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+@contextmanager
+def transaccion_compartida(conn):
+    """Dentro del bloque, get_connection (en este hilo) devuelve `conn` con
+    commit y close anulados: las escrituras de varios servicios quedan en la
+    transacción abierta de `conn` y las confirma quien la abrió, con un solo
+    commit (lo usa el hilo escritor de escritura_service). Los avisos que
+    los servicios registran con al_confirmar quedan pendientes hasta ese
+    commit (ver tomar_al_confirmar)."""
+    _hilo.transaccion = conn
+    _hilo.al_confirmar = []
     try:
-        cursor.execute("ALTER TABLE inventario ADD COLUMN stock_minimo INTEGER DEFAULT 0")
-    except Exception:
-        pass  # Ya existe
+        yield conn
+    finally:
+        _hilo.transaccion = None
+        _hilo.al_confirmar = None
 
-    # Pagos: soportar venta de productos (cantidad) sin romper DBs existentes
+
+def al_confirmar(callback):
+    """Corre `callback` cuando lo recién escrito esté confirmado: enseguida
+    fuera de transaccion_compartida; dentro, lo guarda para quien confirma.
+    Para efectos fuera de la base (cachés, índices en memoria, avisos)."""
+    pendientes = getattr(_hilo, "al_confirmar", None)
+    if pendientes is None:
+        callback()
+    else:
+        pendientes.append(callback)
+
+
+def tomar_al_confirmar():
+    """Dentro de transaccion_compartida: devuelve los callbacks registrados
+    desde la última llamada y vacía la lista. Quien confirma los corre tras
+    el commit, o los descarta si deshizo esas escrituras."""
+    pendientes = getattr(_hilo, "al_confirmar", None)
+    if pendientes is None:
+        return []
+    _hilo.al_confirmar = []
+    return pendientes
+
+
+def set_db_path(path):
+    """Redirige get_connection a otra base de datos (benchmarks y herramientas)."""
+    global DB_PATH
+    DB_PATH = Path(path)
+
+
+def set_trace_callback(callback):
+    """Instala un callback que recibe el SQL (con parámetros expandidos) de cada
+    sentencia ejecutada por las conexiones de get_connection. None lo desactiva."""
+    global _trace_callback
+    _trace_callback = callback
+
+
+def set_connection_factory(factory=None):
+    """Cambia la subclase de sqlite3.Connection que crea get_connection
+    (la usa utils.perfilador_sql). None restablece sqlite3.Connection."""
+    global _connection_factory
+    _connection_factory = factory or sqlite3.Connection
+
+
+def set_cancelacion_hilo(cancelado=None):
+    """Registra para el hilo actual una función sin argumentos que devuelve
+    True cuando sus consultas deben abortarse (búsquedas en segundo plano
+    que quedaron obsoletas). None la quita."""
+    _hilo.cancelado = cancelado
+
+
+def init_database():
+    """Inicializa la base de datos aplicando solo las migraciones pendientes"""
+    conn = get_connection()
     try:
-        cursor.execute("ALTER TABLE pagos ADD COLUMN producto_id INTEGER")
-    except Exception:
-        pass  # Ya existe
+        aplicadas = aplicar_migraciones(conn)
+    finally:
+        conn.close()
+
+    for version, descripcion in aplicadas:
+        print(f"Migración {version} aplicada: {descripcion}")
+    print(f"Base de datos inicializada en: {DB_PATH}")
 
+
+def reconstruir_cliente_stats():
+    """Recalcula la tabla cliente_stats desde pagos y asistencias."""
+    conn = get_connection()
     try:
-        cursor.execute("ALTER TABLE pagos ADD COLUMN cantidad INTEGER DEFAULT 1")
+        conn.execute("BEGIN IMMEDIATE")
+        migraciones.reconstruir_cliente_stats(conn.cursor())
+        conn.commit()
     except Exception:
-        pass  # Ya existe
-
-    # Tabla de asistencias
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS asistencias (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            cliente_id INTEGER NOT NULL,
-            fecha DATE NOT NULL,
-            hora_entrada TEXT,
-            hora_salida TEXT,
-            observacion TEXT,
-            origen TEXT DEFAULT 'manual',
-            UNIQUE(cliente_id, fecha),
-            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
-        )
-    """)
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_asistencias_cliente
-        ON asistencias(cliente_id)
-    """)
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_asistencias_fecha
-        ON asistencias(fecha)
-    """)
-
-    conn.commit()
-    conn.close()
-    
-    print(f"Base de datos inicializada en: {DB_PATH}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
 
 
 def _hash_password(password: str, salt: bytes) -> str:
@@ -332,4 +345,9 @@ def ensure_default_user():
 
 
 if __name__ == "__main__":
-    init_database()
+    import sys
+    if sys.argv[1:] == ["reconstruir-stats"]:
+        reconstruir_cliente_stats()
+        print("cliente_stats reconstruida")
+    else:
+        init_database()
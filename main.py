@@ -14,6 +14,7 @@ from PySide6.QtGui import QFont, QIcon, QPixmap
 # Inicializar base de datos
 from db import init_database, ensure_default_user, verify_user, get_user_role, get_user_fullname
 from usuario_activo import obtener_usuario_activo, guardar_usuario_activo
+from utils.iconos_ui import precargar_iconos
 from views.login_view import LoginDialog
 
 # Importar vistas
@@ -23,6 +24,7 @@ from views.clientes_view import ClientesView
 from views.pagos_view import PagosView
 from views.inventario_view import InventarioView
 from views.finanzas_view import FinanzasView
+from views.kiosco_view import KioscoView
 from views.configuracion_view import ConfiguracionView
 
 
@@ -109,6 +111,8 @@ class MainWindow(QMainWindow):
             self.inventario_view = InventarioView()
             print("Creando finanzas...")
             self.finanzas_view = FinanzasView()
+            print("Creando check-in...")
+            self.kiosco_view = KioscoView()
             print("Creando configuración...")
             self.configuracion_view = ConfiguracionView()
             self.configuracion_view.logout_solicitado.connect(self.manejar_logout)
@@ -118,6 +122,7 @@ class MainWindow(QMainWindow):
             self.stack.addWidget(self.pagos_view)
             self.stack.addWidget(self.inventario_view)
             self.stack.addWidget(self.finanzas_view)
+            self.stack.addWidget(self.kiosco_view)
             self.stack.addWidget(self.configuracion_view)
             
             main_layout.addWidget(self.stack)
@@ -184,6 +189,7 @@ class MainWindow(QMainWindow):
         self.btn_pagos = SidebarButton("💰 Pagos")
         self.btn_inventario = SidebarButton("📦 Inventario")
         self.btn_finanzas = SidebarButton("💰 Finanzas")
+        self.btn_kiosco = SidebarButton("📷 Check-in")
         
         self.btn_inicio.clicked.connect(lambda: self.cambiar_vista(0, self.btn_inicio))
         self.btn_membresias.clicked.connect(lambda: self.cambiar_vista(1, self.btn_membresias))
@@ -191,6 +197,7 @@ class MainWindow(QMainWindow):
         self.btn_pagos.clicked.connect(lambda: self.cambiar_vista(3, self.btn_pagos))
         self.btn_inventario.clicked.connect(lambda: self.cambiar_vista(4, self.btn_inventario))
         self.btn_finanzas.clicked.connect(lambda: self.cambiar_vista(5, self.btn_finanzas))
+        self.btn_kiosco.clicked.connect(lambda: self.cambiar_vista(6, self.btn_kiosco))
         
         layout.addWidget(self.btn_inicio)
         layout.addWidget(self.btn_membresias)
@@ -198,6 +205,7 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.btn_pagos)
         layout.addWidget(self.btn_inventario)
         layout.addWidget(self.btn_finanzas)
+        layout.addWidget(self.btn_kiosco)
         
         # Espacio flexible
         layout.addStretch()
@@ -220,7 +228,7 @@ class MainWindow(QMainWindow):
         
         # Botón de configuración al final
         self.btn_configuracion = SidebarButton("⚙️ Configuración")
-        self.btn_configuracion.clicked.connect(lambda: self.cambiar_vista(6, self.btn_configuracion))
+        self.btn_configuracion.clicked.connect(lambda: self.cambiar_vista(7, self.btn_configuracion))
         layout.addWidget(self.btn_configuracion)
         
         return sidebar
@@ -300,6 +308,7 @@ class MainWindow(QMainWindow):
         self.btn_pagos.setChecked(False)
         self.btn_inventario.setChecked(False)
         self.btn_finanzas.setChecked(False)
+        self.btn_kiosco.setChecked(False)
         self.btn_configuracion.setChecked(False)
         
         # Marcar el botón actual
@@ -322,6 +331,8 @@ class MainWindow(QMainWindow):
             self.inventario_view.cargar_datos()
         elif indice == 5:
             self.finanzas_view.cargar_datos()
+        elif indice == 6:
+            self.kiosco_view.cargar_datos()
 
 
 def main():
@@ -365,6 +376,9 @@ def main():
         }
     """)
     
+    # Parsear una sola vez los SVG de los botones de ícono
+    precargar_iconos()
+
     # Inicializar base de datos y crear usuario por defecto si es necesario
     init_database()
     ensure_default_user()
@@ -0,0 +1,573 @@
+"""Migraciones del esquema SQLite versionadas con PRAGMA user_version
+
+Cada migración es una función que recibe un cursor y lleva el esquema de
+la versión anterior a la suya. init_database solo ejecuta DDL cuando la
+versión guardada en la base es menor que VERSION_ACTUAL; en un arranque
+normal (esquema al día) basta con leer el PRAGMA.
+"""
+
+
+def _columnas(cursor, tabla):
+    """Devuelve el conjunto de nombres de columna de una tabla."""
+    cursor.execute(f"PRAGMA table_info({tabla})")
+    return {row[1] for row in cursor.fetchall()}
+
+
+def _agregar_columna(cursor, tabla, columna, definicion):
+    """Agrega una columna solo si todavía no existe en la tabla."""
+    if columna not in _columnas(cursor, tabla):
+        cursor.execute(f"ALTER TABLE {tabla} ADD COLUMN {columna} {definicion}")
+
+
+# ─────────────────────────── MIGRACIONES ─────────────────────────
+
+def _m001_esquema_base(cursor):
+    """Esquema base. Es idempotente para poder adoptar bases creadas antes
+    del versionado (user_version = 0) sin importar qué columnas les falten."""
+    # Tabla de clientes
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS clientes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            telefono TEXT,
+            sexo TEXT,
+            fecha_nacimiento DATE,
+            fecha_registro DATE NOT NULL,
+            activo INTEGER DEFAULT 1
+        )
+    """)
+
+    # Tabla de membresías
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS membresias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            fecha_inicio DATE NOT NULL,
+            fecha_vencimiento DATE NOT NULL,
+            monto REAL NOT NULL,
+            pago_id INTEGER,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
+            FOREIGN KEY (pago_id) REFERENCES pagos(id) ON DELETE SET NULL
+        )
+    """)
+
+    # Tabla de pagos
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pagos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            monto REAL NOT NULL,
+            metodo TEXT NOT NULL,
+            concepto TEXT,
+            producto_id INTEGER,
+            cantidad INTEGER DEFAULT 1,
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Tabla de usuarios (para login)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS usuarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password_hash TEXT NOT NULL,
+            salt TEXT NOT NULL,
+            full_name TEXT,
+            role TEXT DEFAULT 'user',
+            created_at DATE DEFAULT (DATE('now')),
+            active INTEGER DEFAULT 1
+        )
+    """)
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_membresias_cliente ON membresias(cliente_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_membresias_vencimiento ON membresias(fecha_vencimiento)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagos_cliente ON pagos(cliente_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagos_fecha ON pagos(fecha)")
+
+    # Tabla de inventario
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            categoria TEXT NOT NULL,
+            cantidad INTEGER NOT NULL DEFAULT 0,
+            precio REAL DEFAULT 0.0,
+            fecha_registro DATE DEFAULT (DATE('now'))
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventario_nombre ON inventario(nombre)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_inventario_categoria ON inventario(categoria)")
+
+    # Tabla de historial de movimientos de inventario
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS inventario_movimientos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            producto_id INTEGER NOT NULL,
+            tipo TEXT NOT NULL,
+            cantidad INTEGER NOT NULL,
+            motivo TEXT,
+            fecha DATE DEFAULT (DATE('now')),
+            FOREIGN KEY (producto_id) REFERENCES inventario(id) ON DELETE CASCADE
+        )
+    """)
+
+    # Tabla de egresos (gastos del gimnasio)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS egresos (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            fecha DATE NOT NULL,
+            categoria TEXT NOT NULL,
+            descripcion TEXT,
+            proveedor TEXT,
+            metodo TEXT NOT NULL,
+            monto REAL NOT NULL
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_egresos_fecha ON egresos(fecha)")
+
+    # Columnas agregadas después de la primera versión
+    _agregar_columna(cursor, "clientes", "email", "TEXT")
+    _agregar_columna(cursor, "inventario", "stock_minimo", "INTEGER DEFAULT 0")
+    # Pagos: soportar venta de productos (cantidad) sin romper DBs existentes
+    _agregar_columna(cursor, "pagos", "producto_id", "INTEGER")
+    _agregar_columna(cursor, "pagos", "cantidad", "INTEGER DEFAULT 1")
+
+    # Tabla de asistencias
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS asistencias (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            cliente_id INTEGER NOT NULL,
+            fecha DATE NOT NULL,
+            hora_entrada TEXT,
+            hora_salida TEXT,
+            observacion TEXT,
+            origen TEXT DEFAULT 'manual',
+            UNIQUE(cliente_id, fecha),
+            FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencias_cliente ON asistencias(cliente_id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_asistencias_fecha ON asistencias(fecha)")
+
+
+def _m002_indices_compuestos(cursor):
+    """Índices compuestos según los planes reportados por benchmarks.asesor_indices."""
+    # Pagos de un cliente ordenados por (fecha DESC, id DESC) y MAX(fecha) por
+    # cliente: el rowid va implícito al final del índice.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pagos_cliente_fecha ON pagos(cliente_id, fecha)")
+    cursor.execute("DROP INDEX IF EXISTS idx_pagos_cliente")
+    # Historial de membresías de un cliente ordenado por vencimiento
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_membresias_cliente_vencimiento
+        ON membresias(cliente_id, fecha_vencimiento)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_membresias_cliente")
+    # Membresía vinculada a un pago (eliminar_pago, LEFT JOIN del perfil)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_membresias_pago ON membresias(pago_id)")
+    # Egresos filtrados por categoría dentro de un rango de fechas
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_egresos_categoria_fecha ON egresos(categoria, fecha)")
+    # Listado de clientes por nombre y búsqueda exacta de teléfono. No se
+    # antepone `activo`: sin estadísticas el planificador usaría ese índice
+    # para arrancar los JOIN de membresías desde clientes y ordenar aparte.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clientes_nombre ON clientes(nombre)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_clientes_telefono ON clientes(telefono)")
+    # UNIQUE(cliente_id, fecha) ya indexa por cliente
+    cursor.execute("DROP INDEX IF EXISTS idx_asistencias_cliente")
+
+
+def _m003_indice_clientes_filtros(cursor):
+    """Filtros de sexo y rango de edad (fecha_nacimiento) del listado de clientes.
+
+    Es parcial (WHERE activo = 1) en lugar de llevar activo como primera
+    columna: sin estadísticas, un índice que empieza por activo hace que el
+    planificador recorra clientes primero en los JOIN de membresías y pierda
+    el orden de idx_clientes_nombre.
+    """
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_clientes_activos_sexo_nacimiento
+        ON clientes(sexo, fecha_nacimiento) WHERE activo = 1
+    """)
+
+
+def _recalcular_membresia_actual(cliente):
+    """Sentencias de trigger que vuelven a elegir la membresía actual de
+    `cliente` (expresión OLD.x / NEW.x) desde idx_membresias_cliente_vencimiento."""
+    return f"""
+        DELETE FROM membresia_actual WHERE cliente_id = {cliente};
+        INSERT INTO membresia_actual (cliente_id, membresia_id, fecha_vencimiento, tipo)
+            SELECT cliente_id, id, fecha_vencimiento, tipo FROM membresias
+            WHERE cliente_id = {cliente}
+            ORDER BY fecha_vencimiento DESC, id DESC LIMIT 1;
+    """
+
+
+def _m004_membresia_actual(cursor):
+    """Tabla membresia_actual: la última membresía de cada cliente (mayor
+    vencimiento; a igual vencimiento, mayor id), mantenida por triggers.
+
+    Un alta solo reemplaza la fila si la nueva membresía es posterior; la
+    edición y el borrado de la membresía actual la recalculan.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS membresia_actual (
+            cliente_id INTEGER PRIMARY KEY,
+            membresia_id INTEGER NOT NULL,
+            fecha_vencimiento DATE NOT NULL,
+            tipo TEXT NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_membresia_actual_vencimiento
+        ON membresia_actual(fecha_vencimiento, membresia_id)
+    """)
+
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_membresia_actual_insert
+        AFTER INSERT ON membresias
+        BEGIN
+            INSERT INTO membresia_actual (cliente_id, membresia_id, fecha_vencimiento, tipo)
+            VALUES (NEW.cliente_id, NEW.id, NEW.fecha_vencimiento, NEW.tipo)
+            ON CONFLICT(cliente_id) DO UPDATE SET
+                membresia_id = excluded.membresia_id,
+                fecha_vencimiento = excluded.fecha_vencimiento,
+                tipo = excluded.tipo
+            WHERE (excluded.fecha_vencimiento, excluded.membresia_id)
+                > (membresia_actual.fecha_vencimiento, membresia_actual.membresia_id);
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_membresia_actual_update
+        AFTER UPDATE OF cliente_id, fecha_vencimiento, tipo ON membresias
+        BEGIN
+            {_recalcular_membresia_actual("OLD.cliente_id")}
+            {_recalcular_membresia_actual("NEW.cliente_id")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_membresia_actual_delete
+        AFTER DELETE ON membresias
+        WHEN OLD.id = (SELECT membresia_id FROM membresia_actual WHERE cliente_id = OLD.cliente_id)
+        BEGIN
+            {_recalcular_membresia_actual("OLD.cliente_id")}
+        END
+    """)
+
+    # Bases existentes
+    reconstruir_membresia_actual(cursor)
+
+
+def reconstruir_membresia_actual(cursor):
+    """Recalcula membresia_actual desde membresias (migraciones 4 y 10)."""
+    cursor.execute("DELETE FROM membresia_actual")
+    cursor.execute("""
+        INSERT INTO membresia_actual (cliente_id, membresia_id, fecha_vencimiento, tipo)
+        SELECT m.cliente_id, m.id, m.fecha_vencimiento, m.tipo
+        FROM membresias m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM membresias m2
+            WHERE m2.cliente_id = m.cliente_id
+              AND (m2.fecha_vencimiento, m2.id) > (m.fecha_vencimiento, m.id)
+        )
+    """)
+
+
+def _sumar_pago(cliente, monto, fecha, signo):
+    """Sentencias de trigger que suman (signo '+') o restan (signo '-') un
+    pago a cliente_stats. Al sumar, primer/último pago se ajustan con
+    `fecha`; al restar se recalculan con idx_pagos_cliente_fecha.
+
+    La fila se crea con ON CONFLICT DO NOTHING y no con INSERT OR IGNORE:
+    el OR de la sentencia externa (INSERT OR REPLACE INTO pagos) reemplaza
+    al del trigger y borraría la fila acumulada; la cláusula ON CONFLICT
+    no se puede reemplazar."""
+    if signo == "+":
+        primer = f"MIN(COALESCE(primer_pago, {fecha}), {fecha})"
+        ultimo = f"MAX(COALESCE(ultimo_pago, {fecha}), {fecha})"
+    else:
+        primer = f"(SELECT MIN(fecha) FROM pagos WHERE cliente_id = {cliente})"
+        ultimo = f"(SELECT MAX(fecha) FROM pagos WHERE cliente_id = {cliente})"
+    return f"""
+        INSERT INTO cliente_stats (cliente_id) VALUES ({cliente})
+            ON CONFLICT(cliente_id) DO NOTHING;
+        UPDATE cliente_stats SET
+            total_pagado = total_pagado {signo} {monto},
+            cantidad_pagos = cantidad_pagos {signo} 1,
+            primer_pago = {primer},
+            ultimo_pago = {ultimo}
+        WHERE cliente_id = {cliente};
+    """
+
+
+def _sumar_asistencia(cliente, fecha, signo):
+    """Como _sumar_pago para asistencias (índice UNIQUE(cliente_id, fecha))."""
+    if signo == "+":
+        ultima = f"MAX(COALESCE(ultima_asistencia, {fecha}), {fecha})"
+    else:
+        ultima = f"(SELECT MAX(fecha) FROM asistencias WHERE cliente_id = {cliente})"
+    return f"""
+        INSERT INTO cliente_stats (cliente_id) VALUES ({cliente})
+            ON CONFLICT(cliente_id) DO NOTHING;
+        UPDATE cliente_stats SET
+            total_asistencias = total_asistencias {signo} 1,
+            ultima_asistencia = {ultima}
+        WHERE cliente_id = {cliente};
+    """
+
+
+def reconstruir_cliente_stats(cursor):
+    """Recalcula cliente_stats desde pagos y asistencias. Lo usan las
+    migraciones 5, 9 y 10 y `python db.py reconstruir-stats` (por ejemplo, tras
+    importar datos con los triggers desactivados)."""
+    cursor.execute("DELETE FROM cliente_stats")
+    cursor.execute("""
+        INSERT INTO cliente_stats (cliente_id, total_pagado, cantidad_pagos, primer_pago, ultimo_pago)
+        SELECT cliente_id, SUM(monto), COUNT(*), MIN(fecha), MAX(fecha)
+        FROM pagos
+        GROUP BY cliente_id
+    """)
+    cursor.execute("""
+        INSERT INTO cliente_stats (cliente_id, total_asistencias, ultima_asistencia)
+        SELECT cliente_id, COUNT(*), MAX(fecha)
+        FROM asistencias
+        WHERE true
+        GROUP BY cliente_id
+        ON CONFLICT(cliente_id) DO UPDATE SET
+            total_asistencias = excluded.total_asistencias,
+            ultima_asistencia = excluded.ultima_asistencia
+    """)
+
+
+def _crear_triggers_cliente_stats(cursor):
+    """Triggers que mantienen cliente_stats (migraciones 5 y 9)."""
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_pago_insert
+        AFTER INSERT ON pagos
+        BEGIN
+            {_sumar_pago("NEW.cliente_id", "NEW.monto", "NEW.fecha", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_pago_update
+        AFTER UPDATE OF cliente_id, fecha, monto ON pagos
+        BEGIN
+            {_sumar_pago("OLD.cliente_id", "OLD.monto", "OLD.fecha", "-")}
+            {_sumar_pago("NEW.cliente_id", "NEW.monto", "NEW.fecha", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_pago_delete
+        AFTER DELETE ON pagos
+        BEGIN
+            {_sumar_pago("OLD.cliente_id", "OLD.monto", "OLD.fecha", "-")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_asistencia_insert
+        AFTER INSERT ON asistencias
+        BEGIN
+            {_sumar_asistencia("NEW.cliente_id", "NEW.fecha", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_asistencia_update
+        AFTER UPDATE OF cliente_id, fecha ON asistencias
+        BEGIN
+            {_sumar_asistencia("OLD.cliente_id", "OLD.fecha", "-")}
+            {_sumar_asistencia("NEW.cliente_id", "NEW.fecha", "+")}
+        END
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cliente_stats_asistencia_delete
+        AFTER DELETE ON asistencias
+        BEGIN
+            {_sumar_asistencia("OLD.cliente_id", "OLD.fecha", "-")}
+        END
+    """)
+
+
+def _m005_cliente_stats(cursor):
+    """Tabla cliente_stats: totales históricos de pagos y asistencias por
+    cliente, mantenidos por triggers. Los reportes sin rango de fechas
+    (top, frecuentes, inactivos, gasto por cliente) la leen por índice en
+    lugar de agrupar toda la tabla pagos.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cliente_stats (
+            cliente_id INTEGER PRIMARY KEY,
+            total_pagado REAL NOT NULL DEFAULT 0,
+            cantidad_pagos INTEGER NOT NULL DEFAULT 0,
+            primer_pago DATE,
+            ultimo_pago DATE,
+            total_asistencias INTEGER NOT NULL DEFAULT 0,
+            ultima_asistencia DATE
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cliente_stats_total ON cliente_stats(total_pagado)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cliente_stats_cantidad ON cliente_stats(cantidad_pagos)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_cliente_stats_ultimo ON cliente_stats(ultimo_pago)")
+
+    _crear_triggers_cliente_stats(cursor)
+    reconstruir_cliente_stats(cursor)
+
+
+def _m006_riesgo_abandono(cursor):
+    """Tabla riesgo_abandono: puntaje de riesgo de cada cliente activo
+    calculado por services.riesgo_service. Se llena en el primer uso."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS riesgo_abandono (
+            cliente_id INTEGER PRIMARY KEY,
+            puntaje INTEGER NOT NULL,
+            motivos TEXT NOT NULL DEFAULT '',
+            dias_sin_asistir INTEGER,
+            dias_para_vencer INTEGER,
+            asist_este_mes INTEGER NOT NULL DEFAULT 0,
+            asist_mes_pasado INTEGER NOT NULL DEFAULT 0,
+            calculado DATE NOT NULL
+        )
+    """)
+    # Ranking del tablero
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_riesgo_abandono_puntaje
+        ON riesgo_abandono(puntaje, dias_sin_asistir)
+    """)
+    # Fecha del cálculo más antiguo (¿hay que rehacer el lote?)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_riesgo_abandono_calculado ON riesgo_abandono(calculado)")
+
+
+def _m007_ocupacion_horas(cursor):
+    """Tabla ocupacion_horas: visitas por fecha y hora calculadas por
+    services.ocupacion_service a partir de hora_entrada/hora_salida. Solo
+    guarda las horas con alguien presente; se llena en el primer uso."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS ocupacion_horas (
+            fecha DATE NOT NULL,
+            hora INTEGER NOT NULL,
+            entradas INTEGER NOT NULL DEFAULT 0,
+            presentes INTEGER NOT NULL DEFAULT 0,
+            pico INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (fecha, hora)
+        ) WITHOUT ROWID
+    """)
+
+
+# Columnas que lee services.analitica_service: un UPDATE de cualquiera de
+# ellas (o un DELETE) obliga a recargar la tabla entera
+_COLUMNAS_ANALITICAS = {
+    "pagos": "fecha, monto, metodo, cliente_id",
+    "egresos": "fecha, monto, categoria, metodo",
+    "membresias": "fecha_inicio, fecha_vencimiento, monto, tipo, cliente_id",
+    "asistencias": "fecha, cliente_id",
+}
+
+
+def _m008_modificaciones_tablas(cursor):
+    """Tabla modificaciones_tablas: por tabla analítica, un contador que los
+    triggers incrementan en cada DELETE y en cada UPDATE de las columnas de
+    _COLUMNAS_ANALITICAS. Las filas nuevas se detectan por id; con esto se
+    detecta además lo que cambió o se borró, lo escriba quien lo escriba.
+    El borrado implícito de INSERT OR REPLACE solo dispara el trigger de
+    DELETE con PRAGMA recursive_triggers (ver db.get_connection)."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS modificaciones_tablas (
+            tabla TEXT PRIMARY KEY,
+            cambios INTEGER NOT NULL DEFAULT 0
+        )
+    """)
+    for tabla, columnas in _COLUMNAS_ANALITICAS.items():
+        cursor.execute("INSERT INTO modificaciones_tablas (tabla) VALUES (?) ON CONFLICT(tabla) DO NOTHING",
+                       (tabla,))
+        contar = f"UPDATE modificaciones_tablas SET cambios = cambios + 1 WHERE tabla = '{tabla}';"
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_modificaciones_{tabla}_update
+            AFTER UPDATE OF {columnas} ON {tabla}
+            BEGIN
+                {contar}
+            END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_modificaciones_{tabla}_delete
+            AFTER DELETE ON {tabla}
+            BEGIN
+                {contar}
+            END
+        """)
+
+
+_TRIGGERS_CLIENTE_STATS = [f"trg_cliente_stats_{tabla}_{evento}" for tabla in ("pago", "asistencia")
+                           for evento in ("insert", "update", "delete")]
+
+
+def _m009_triggers_cliente_stats(cursor):
+    """Vuelve a crear los triggers de cliente_stats: los de la migración 5
+    creaban la fila con INSERT OR IGNORE, que un INSERT OR REPLACE externo
+    convertía en REPLACE y ponía a cero los totales del cliente. Recalcula
+    cliente_stats por si alguna base ya quedó mal."""
+    for nombre in _TRIGGERS_CLIENTE_STATS:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nombre}")
+    _crear_triggers_cliente_stats(cursor)
+    reconstruir_cliente_stats(cursor)
+
+
+def _m010_recalcular_derivadas(cursor):
+    """Recalcula cliente_stats y membresia_actual. Hasta activar PRAGMA
+    recursive_triggers, un INSERT OR REPLACE que pisaba una fila no disparaba
+    los triggers de DELETE: la fila reemplazada quedaba sumada dos veces."""
+    reconstruir_cliente_stats(cursor)
+    reconstruir_membresia_actual(cursor)
+
+
+# (versión, descripción, función). Las versiones deben ser consecutivas;
+# nunca modificar una migración ya publicada, agregar una nueva al final.
+MIGRACIONES = [
+    (1, "Esquema base", _m001_esquema_base),
+    (2, "Índices compuestos para listados por cliente, egresos y clientes", _m002_indices_compuestos),
+    (3, "Índice de clientes por sexo y fecha de nacimiento", _m003_indice_clientes_filtros),
+    (4, "Tabla membresia_actual mantenida por triggers", _m004_membresia_actual),
+    (5, "Tabla cliente_stats mantenida por triggers", _m005_cliente_stats),
+    (6, "Tabla riesgo_abandono", _m006_riesgo_abandono),
+    (7, "Tabla ocupacion_horas", _m007_ocupacion_horas),
+    (8, "Contadores de modificaciones para la instantánea analítica", _m008_modificaciones_tablas),
+    (9, "Triggers de cliente_stats con ON CONFLICT DO NOTHING", _m009_triggers_cliente_stats),
+    (10, "Recalcular cliente_stats y membresia_actual tras INSERT OR REPLACE", _m010_recalcular_derivadas),
+]
+
+VERSION_ACTUAL = MIGRACIONES[-1][0]
+
+
+def obtener_version(conn):
+    """Devuelve la versión de esquema guardada en la base (PRAGMA user_version)."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def aplicar_migraciones(conn, hasta=None):
+    """Aplica las migraciones pendientes en una sola transacción.
+
+    Si el esquema ya está al día no ejecuta ningún DDL. `hasta` limita la
+    versión destino (lo usan las herramientas de benchmarks para comparar
+    esquemas). Devuelve la lista de (versión, descripción) aplicadas;
+    vacía si no había pendientes.
+    """
+    # Los triggers de las tablas derivadas cuentan con que el borrado de
+    # INSERT OR REPLACE dispare los de DELETE (ver db.get_connection)
+    conn.execute("PRAGMA recursive_triggers = ON")
+    destino = VERSION_ACTUAL if hasta is None else min(hasta, VERSION_ACTUAL)
+    if obtener_version(conn) >= destino:
+        return []
+
+    # BEGIN IMMEDIATE toma el bloqueo de escritura antes de releer la versión,
+    # así dos procesos que arrancan a la vez no aplican la misma migración.
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = obtener_version(conn)
+        pendientes = [m for m in MIGRACIONES if version < m[0] <= destino]
+        cursor = conn.cursor()
+        for numero, _descripcion, migracion in pendientes:
+            migracion(cursor)
+        cursor.execute(f"PRAGMA user_version = {max(version, destino)}")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return [(numero, descripcion) for numero, descripcion, _ in pendientes]
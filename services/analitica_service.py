@@ -0,0 +1,384 @@
+"""Instantánea analítica en columnas NumPy
+
+Carga pagos, egresos, membresías y asistencias una sola vez en arreglos
+compactos por columna: fechas como ordinales de date.toordinal (int32),
+montos en centavos (int64) y los textos repetidos (método, categoría, tipo)
+como códigos sobre la lista de categorías de la columna. Si PRAGMA
+data_version dice que nadie escribió desde la consulta anterior, no se lee
+nada; si no, se leen solo las filas con id mayor al último cargado.
+
+Los UPDATE y DELETE los cuenta por tabla modificaciones_tablas (triggers
+de la migración 8), así que se notan aunque vengan de otro proceso o de
+un camino que no llame a invalidar(tabla): si el contador de una tabla
+cambió, se recarga completa. Un INSERT OR REPLACE que pisa una fila ya
+cargada (mismo id o menor) cuenta como DELETE porque las conexiones abren
+con PRAGMA recursive_triggers.
+
+Los agregados (por día, semana o mes, por método o categoría, percentiles y
+medias móviles) se calculan con bincount/unique sobre las columnas en vez
+de recorrer filas en Python.
+"""
+import sqlite3
+import threading
+from datetime import date
+
+import numpy as np
+
+import db
+
+_FECHA, _CENTAVOS, _CATEGORIA, _ENTERO = "fecha", "centavos", "categoria", "entero"
+
+_TIPOS = {_FECHA: np.int32, _CENTAVOS: np.int64, _CATEGORIA: np.int32, _ENTERO: np.int64}
+
+_SQL = {
+    _FECHA: "{c}",
+    _CENTAVOS: "CAST(ROUND(COALESCE({c}, 0) * 100) AS INTEGER)",
+    _CATEGORIA: "COALESCE({c}, '')",
+    _ENTERO: "{c}",
+}
+
+# tabla -> columnas (nombre, tipo); la primera fecha es la del período
+COLUMNAS = {
+    "pagos": (("fecha", _FECHA), ("monto", _CENTAVOS), ("metodo", _CATEGORIA),
+              ("cliente_id", _ENTERO)),
+    "egresos": (("fecha", _FECHA), ("monto", _CENTAVOS), ("categoria", _CATEGORIA),
+                ("metodo", _CATEGORIA)),
+    "membresias": (("fecha_inicio", _FECHA), ("fecha_vencimiento", _FECHA),
+                   ("monto", _CENTAVOS), ("tipo", _CATEGORIA), ("cliente_id", _ENTERO)),
+    "asistencias": (("fecha", _FECHA), ("cliente_id", _ENTERO)),
+}
+
+PERIODOS = ("dia", "semana", "mes")
+
+# date(1970, 1, 1).toordinal(): desplazamiento entre ordinales y datetime64[D]
+_EPOCA = 719163
+
+
+def _solo_lectura(arreglo):
+    arreglo.flags.writeable = False
+    return arreglo
+
+
+def _ordinal_o_cero(valor):
+    try:
+        return date.fromisoformat(str(valor)[:10]).toordinal()
+    except ValueError:
+        return 0
+
+
+def _ordinales(valores):
+    """Fechas ISO a ordinales. Una fecha vacía o ilegible queda en 0 y ningún
+    filtro por período la incluye."""
+    try:
+        dias = np.array(valores, "datetime64[D]")
+    except (ValueError, TypeError):
+        # Algún valor ilegible: se convierte uno por uno
+        return np.array([_ordinal_o_cero(v) for v in valores], np.int32)
+    return np.where(np.isnat(dias), 0, dias.astype(np.int64) + _EPOCA)
+
+
+class _Tabla:
+    """Columnas de una tabla y lo necesario para refrescarlas."""
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.tipos = dict(COLUMNAS[nombre])
+        self.fecha = COLUMNAS[nombre][0][0]
+        # Cuenta las recargas completas: quien guarde resultados derivados
+        # sabe así si solo se agregaron filas o si cambió todo
+        self.recargas = 0
+        self.vaciar()
+
+    def vaciar(self):
+        self.recargas += 1
+        self.ids = np.empty(0, np.int64)
+        self.datos = {c: np.empty(0, _TIPOS[t]) for c, t in self.tipos.items()}
+        self.categorias = {c: [] for c, t in self.tipos.items() if t == _CATEGORIA}
+        self._codigos = {c: {} for c in self.categorias}
+        self.valida = True
+
+    def refrescar(self, conn):
+        """Agrega las filas nuevas; si la tabla fue invalidada (UPDATE o
+        DELETE), la recarga completa."""
+        if not self.valida:
+            self.vaciar()
+        self._leer(conn, int(self.ids[-1]) if len(self.ids) else 0)
+
+    def _leer(self, conn, desde_id):
+        expresiones = ", ".join(_SQL[t].format(c=c) for c, t in self.tipos.items())
+        filas = conn.execute(
+            f"SELECT id, {expresiones} FROM {self.nombre} WHERE id > ? ORDER BY id",
+            (desde_id,)).fetchall()
+        if not filas:
+            return
+        columnas = list(zip(*filas))
+        # Cada refresco crea arreglos nuevos y de solo lectura: quien recibió
+        # los anteriores con columnas() puede seguir usándolos sin el lock
+        self.ids = _solo_lectura(np.concatenate([self.ids, np.array(columnas[0], np.int64)]))
+        for (c, t), valores in zip(self.tipos.items(), columnas[1:]):
+            if t == _FECHA:
+                valores = _ordinales(valores)
+            elif t == _CATEGORIA:
+                codigos = self._codigos[c]
+                categorias = self.categorias[c]
+                for v in set(valores) - codigos.keys():
+                    codigos[v] = len(categorias)
+                    categorias.append(v)
+                valores = [codigos[v] for v in valores]
+            nuevos = np.array(valores, _TIPOS[t])
+            self.datos[c] = _solo_lectura(np.concatenate([self.datos[c], nuevos]))
+
+    def codigo(self, columna, valor):
+        """Código de `valor` en una columna categórica (-1 si no aparece)."""
+        return self._codigos[columna].get(valor, -1)
+
+
+class _Instantanea:
+    """Tablas cargadas de una base, con su conexión persistente."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.conn = db.abrir_lectura_persistente(path)
+        self.tablas = {nombre: _Tabla(nombre) for nombre in COLUMNAS}
+        self.pendientes = set(COLUMNAS)
+        self.version = None
+        self.cambios = {}
+
+    def _leer_cambios(self):
+        """Invalida las tablas cuyo contador de modificaciones_tablas cambió.
+        Se lee antes que las filas: una escritura entre medio solo causa una
+        recarga de más, nunca una de menos."""
+        try:
+            filas = self.conn.execute("SELECT tabla, cambios FROM modificaciones_tablas").fetchall()
+        except sqlite3.OperationalError:
+            # Base sin la migración 8: cualquier escritura recarga todo
+            filas = [(nombre, None) for nombre in COLUMNAS]
+        for nombre, cambios in filas:
+            if nombre not in self.tablas:
+                continue
+            if cambios is None or (nombre in self.cambios and self.cambios[nombre] != cambios):
+                self.tablas[nombre].valida = False
+            self.cambios[nombre] = cambios
+
+    def tabla(self, nombre):
+        version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self.version:
+            self._leer_cambios()
+            self.pendientes = set(COLUMNAS)
+            self.version = version
+        if nombre in self.pendientes:
+            # Filas nuevas en una sola transacción de lectura
+            self.conn.execute("BEGIN")
+            try:
+                self.tablas[nombre].refrescar(self.conn)
+            finally:
+                self.conn.execute("COMMIT")
+            self.pendientes.discard(nombre)
+        return self.tablas[nombre]
+
+
+_instantanea = None
+_lock = threading.Lock()
+
+
+def _tabla(nombre):
+    """Tabla `nombre` al día con la base actual. Hay que llamarla con _lock
+    tomado y usar las columnas antes de soltarlo."""
+    global _instantanea
+    if _instantanea is None or _instantanea.path != str(db.DB_PATH):
+        if _instantanea is not None:
+            _instantanea.conn.close()
+        _instantanea = _Instantanea(db.DB_PATH)
+    return _instantanea.tabla(nombre)
+
+
+def invalidar(*tablas):
+    """Fuerza a recargar `tablas` completas en la próxima consulta (tras un
+    UPDATE); sin argumentos, todas. Dentro de una transacción compartida
+    espera a su commit."""
+    db.al_confirmar(lambda: _invalidar(tablas))
+
+
+def _invalidar(tablas):
+    with _lock:
+        if _instantanea is None:
+            return
+        for nombre in tablas or COLUMNAS:
+            _instantanea.tablas[nombre].valida = False
+            _instantanea.pendientes.add(nombre)
+
+
+def columnas(tabla, *nombres):
+    """(recarga, [arreglos]) con las columnas `nombres` de `tabla` al día, en
+    orden de id. Los arreglos son de solo lectura; `recarga` cambia cuando la
+    tabla se recargó completa, si no las filas nuevas están al final."""
+    with _lock:
+        t = _tabla(tabla)
+        return t.recargas, [t.datos[c] for c in nombres]
+
+
+def cerrar():
+    """Cierra la conexión persistente y descarta las columnas (herramientas
+    que borran o reemplazan el archivo de la base)."""
+    global _instantanea
+    with _lock:
+        if _instantanea is not None:
+            _instantanea.conn.close()
+            _instantanea = None
+
+
+# ─────────────────────────── FILTROS ─────────────────────────────
+
+def _ordinal(fecha):
+    if fecha is None:
+        return None
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha[:10])
+    return fecha.toordinal()
+
+
+def _mascara(t, desde=None, hasta=None, filtros=None):
+    """Filas de `t` con fecha en [desde, hasta] que cumplen `filtros`
+    (columna=valor sobre columnas categóricas o enteras)."""
+    fechas = t.datos[t.fecha]
+    mascara = fechas > 0
+    if desde is not None:
+        mascara &= fechas >= _ordinal(desde)
+    if hasta is not None:
+        mascara &= fechas <= _ordinal(hasta)
+    for columna, valor in (filtros or {}).items():
+        if valor is None:
+            continue
+        if t.tipos[columna] == _CATEGORIA:
+            valor = t.codigo(columna, valor)
+        mascara &= t.datos[columna] == valor
+    return mascara
+
+
+def _a_pesos(centavos):
+    return round(int(centavos) / 100, 2)
+
+
+def _inicio_periodo(ordinales, periodo):
+    """Ordinal del primer día del día/semana (lunes)/mes de cada fecha."""
+    if periodo == "dia":
+        return ordinales
+    if periodo == "semana":
+        # date(1, 1, 1) fue lunes
+        return ordinales - (ordinales - 1) % 7
+    if periodo == "mes":
+        meses = (ordinales.astype(np.int64) - _EPOCA).astype("datetime64[D]").astype("datetime64[M]")
+        return meses.astype("datetime64[D]").astype(np.int64) + _EPOCA
+    raise ValueError(f"Período desconocido: {periodo} (usa {', '.join(PERIODOS)})")
+
+
+def numero_mes(ordinales):
+    """año * 12 + mes - 1 de cada ordinal (meses consecutivos difieren en 1)."""
+    meses = (np.asarray(ordinales, np.int64) - _EPOCA).astype("datetime64[D]").astype("datetime64[M]")
+    return meses.astype(np.int64) + 1970 * 12
+
+
+# ─────────────────────────── AGREGADOS ───────────────────────────
+
+def total(tabla, desde=None, hasta=None, **filtros):
+    """Suma de montos de `tabla` en el período."""
+    with _lock:
+        t = _tabla(tabla)
+        return _a_pesos(t.datos["monto"][_mascara(t, desde, hasta, filtros)].sum())
+
+
+def contar(tabla, desde=None, hasta=None, **filtros):
+    """Cantidad de filas de `tabla` en el período."""
+    with _lock:
+        t = _tabla(tabla)
+        return int(np.count_nonzero(_mascara(t, desde, hasta, filtros)))
+
+
+def serie(tabla, periodo="mes", desde=None, hasta=None, **filtros):
+    """Lista de dicts {inicio, cantidad[, total]} por día, semana o mes, en
+    orden cronológico; solo los períodos con filas. `total` está en las
+    tablas con monto."""
+    with _lock:
+        t = _tabla(tabla)
+        mascara = _mascara(t, desde, hasta, filtros)
+        inicios = _inicio_periodo(t.datos[t.fecha][mascara], periodo)
+        montos = t.datos["monto"][mascara] if "monto" in t.datos else None
+    claves, posicion = np.unique(inicios, return_inverse=True)
+    cantidades = np.bincount(posicion, minlength=len(claves))
+    resultado = [{"inicio": date.fromordinal(int(o)), "cantidad": int(n)}
+                 for o, n in zip(claves, cantidades)]
+    if montos is not None:
+        # bincount suma en float64: exacto hasta 2**53 centavos
+        sumas = np.bincount(posicion, weights=montos, minlength=len(claves))
+        for fila, s in zip(resultado, sumas):
+            fila["total"] = _a_pesos(round(s))
+    return resultado
+
+
+def por_categoria(tabla, columna, desde=None, hasta=None, **filtros):
+    """Lista de dicts {columna: valor, cantidad[, total]} por cada valor de
+    una columna categórica (metodo, categoria, tipo), de mayor a menor total
+    (o cantidad en tablas sin monto)."""
+    with _lock:
+        t = _tabla(tabla)
+        mascara = _mascara(t, desde, hasta, filtros)
+        codigos = t.datos[columna][mascara]
+        categorias = list(t.categorias[columna])
+        montos = t.datos["monto"][mascara] if "monto" in t.datos else None
+    cantidades = np.bincount(codigos, minlength=len(categorias))
+    sumas = (np.bincount(codigos, weights=montos, minlength=len(categorias))
+             if montos is not None else None)
+    resultado = []
+    for codigo, valor in enumerate(categorias):
+        if not cantidades[codigo]:
+            continue
+        fila = {columna: valor, "cantidad": int(cantidades[codigo])}
+        if sumas is not None:
+            fila["total"] = _a_pesos(round(sumas[codigo]))
+        resultado.append(fila)
+    clave = "total" if sumas is not None else "cantidad"
+    resultado.sort(key=lambda f: f[clave], reverse=True)
+    return resultado
+
+
+def percentiles(tabla, cuantiles=(25, 50, 75, 90), desde=None, hasta=None, **filtros):
+    """Dict {cuantil: monto} de los montos del período (interpolación
+    lineal, como statistics.quantiles(method='inclusive')). Vacío si no hay
+    filas."""
+    with _lock:
+        t = _tabla(tabla)
+        montos = t.datos["monto"][_mascara(t, desde, hasta, filtros)]
+    if not len(montos):
+        return {}
+    valores = np.percentile(montos, cuantiles)
+    return {q: round(float(v) / 100, 2) for q, v in zip(cuantiles, valores)}
+
+
+def media_movil(tabla, ventana=7, desde=None, hasta=None, **filtros):
+    """Lista de dicts {fecha, valor, media} por cada día de [desde, hasta]
+    (también los días sin filas): `valor` es el total del día (o la cantidad
+    en tablas sin monto) y `media` el promedio de los últimos `ventana` días,
+    o de los que haya al principio del rango."""
+    if ventana < 1:
+        raise ValueError("La ventana debe ser de al menos 1 día")
+    with _lock:
+        t = _tabla(tabla)
+        mascara = _mascara(t, desde, hasta, filtros)
+        fechas = t.datos[t.fecha][mascara]
+        montos = t.datos["monto"][mascara] if "monto" in t.datos else None
+    if not len(fechas) and (desde is None or hasta is None):
+        return []
+    primero = _ordinal(desde) if desde is not None else int(fechas.min())
+    ultimo = _ordinal(hasta) if hasta is not None else int(fechas.max())
+    if ultimo < primero:
+        return []
+    diarios = np.bincount(fechas - primero, weights=montos, minlength=ultimo - primero + 1)
+    acumulado = np.concatenate([[0.0], np.cumsum(diarios)])
+    fin = np.arange(1, len(diarios) + 1)
+    inicio = np.maximum(fin - ventana, 0)
+    medias = (acumulado[fin] - acumulado[inicio]) / (fin - inicio)
+    escala = 100 if montos is not None else 1
+    return [{"fecha": date.fromordinal(primero + i),
+             "valor": round(float(v) / escala, 2),
+             "media": round(float(m) / escala, 2)}
+            for i, (v, m) in enumerate(zip(diarios, medias))]
@@ -1,6 +1,9 @@
 """Servicio CRUD para asistencias de clientes"""
 from datetime import date, datetime, timedelta
 from db import get_connection
+from services import presencia_service
+from services.ocupacion_service import actualizar_ocupacion_dia
+from services.riesgo_service import actualizar_riesgo_clientes
 
 
 def registrar_asistencia(cliente_id, fecha=None, hora_entrada=None, hora_salida=None,
@@ -29,18 +32,44 @@ def registrar_asistencia(cliente_id, fecha=None, hora_entrada=None, hora_salida=
                 origen       = excluded.origen
         """, (cliente_id, fecha.isoformat(), hora_entrada, hora_salida, observacion, origen))
         conn.commit()
-        return True, cur.lastrowid or _id_para(cur, cliente_id, fecha)
+        # La fila tal como quedó tras el UPSERT (las horas pueden venir de antes)
+        cur.execute("SELECT id, hora_entrada, hora_salida FROM asistencias WHERE cliente_id=? AND fecha=?",
+                    (cliente_id, fecha.isoformat()))
+        fila = cur.fetchone()
     except Exception as e:
         return False, str(e)
     finally:
         conn.close()
+    actualizar_riesgo_clientes([cliente_id])
+    actualizar_ocupacion_dia(fecha)
+    presencia_service.notificar_asistencia(cliente_id, fecha, fila["hora_entrada"], fila["hora_salida"])
+    return True, fila["id"]
 
 
-def _id_para(cur, cliente_id, fecha):
-    cur.execute("SELECT id FROM asistencias WHERE cliente_id=? AND fecha=?",
-                (cliente_id, fecha.isoformat()))
-    row = cur.fetchone()
-    return row["id"] if row else None
+def registrar_salida(cliente_id, fecha=None, hora_salida=None):
+    """Cierra la visita abierta del cliente en `fecha` (hoy por defecto) con
+    `hora_salida` (ahora por defecto). Devuelve True si había una abierta."""
+    if fecha is None:
+        fecha = date.today()
+    if isinstance(fecha, str):
+        fecha = date.fromisoformat(fecha)
+    if hora_salida is None:
+        hora_salida = datetime.now().strftime("%H:%M")
+    conn = get_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            UPDATE asistencias SET hora_salida = ?
+            WHERE cliente_id=? AND fecha=? AND hora_salida IS NULL
+        """, (hora_salida, cliente_id, fecha.isoformat()))
+        conn.commit()
+        cerrada = cur.rowcount > 0
+    finally:
+        conn.close()
+    if cerrada:
+        actualizar_ocupacion_dia(fecha)
+        presencia_service.notificar_asistencia(cliente_id, fecha, hora_salida=hora_salida)
+    return cerrada
 
 
 def eliminar_asistencia(cliente_id, fecha):
@@ -53,9 +82,14 @@ def eliminar_asistencia(cliente_id, fecha):
         cur.execute("DELETE FROM asistencias WHERE cliente_id=? AND fecha=?",
                     (cliente_id, fecha.isoformat()))
         conn.commit()
-        return cur.rowcount > 0
+        eliminada = cur.rowcount > 0
     finally:
         conn.close()
+    if eliminada:
+        actualizar_riesgo_clientes([cliente_id])
+        actualizar_ocupacion_dia(fecha)
+        presencia_service.notificar_eliminacion(cliente_id, fecha)
+    return eliminada
 
 
 def tiene_asistencia(cliente_id, fecha):
@@ -38,6 +38,8 @@ def crear_cliente(nombre, telefono="", sexo="", fecha_nacimiento=None, email="")
     cliente_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    from services import kiosco_service
+    kiosco_service.refrescar_clientes([cliente_id])
     return cliente_id
 
 
@@ -55,25 +57,73 @@ def obtener_cliente(cliente_id):
     return dict(cliente) if cliente else None
 
 
-def listar_clientes(buscar="", solo_activos=True):
-    """Lista todos los clientes con opción de búsqueda"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    query = "SELECT * FROM clientes WHERE 1=1"
+def _restar_anios(fecha, anios):
+    """Misma fecha `anios` años antes (el 29/02 pasa a 28/02)."""
+    try:
+        return fecha.replace(year=fecha.year - anios)
+    except ValueError:
+        return fecha.replace(year=fecha.year - anios, day=28)
+
+
+def _filtros_clientes(buscar="", solo_activos=True, sexo=None, edad_min=None, edad_max=None,
+                      registro_desde=None, registro_hasta=None, estado_membresia=None):
+    """Condiciones WHERE (y parámetros) del listado de clientes.
+
+    La edad (en años cumplidos, ambos extremos inclusive) se convierte en un
+    rango de fecha_nacimiento para que SQLite use el índice parcial
+    idx_clientes_activos_sexo_nacimiento (sexo, fecha_nacimiento)
+    WHERE activo = 1, que solo sirve con solo_activos. `estado_membresia`
+    se evalúa sobre el último vencimiento del cliente.
+    """
+    query = ""
     params = []
-    
+
     if solo_activos:
-        query += " AND activo = 1"
-    
+        query += " AND c.activo = 1"
+    if sexo:
+        query += " AND c.sexo = ?"
+        params.append(sexo)
+    if edad_min is not None or edad_max is not None:
+        hoy = date.today()
+        query += " AND c.fecha_nacimiento IS NOT NULL AND c.fecha_nacimiento != ''"
+        if edad_min is not None:
+            # edad >= edad_min  <=>  nació a más tardar hoy - edad_min años
+            query += " AND c.fecha_nacimiento <= ?"
+            params.append(_restar_anios(hoy, edad_min).isoformat())
+        if edad_max is not None:
+            # edad <= edad_max  <=>  nació después de hoy - (edad_max + 1) años
+            query += " AND c.fecha_nacimiento > ?"
+            params.append(_restar_anios(hoy, edad_max + 1).isoformat())
+    if registro_desde:
+        query += " AND c.fecha_registro >= ?"
+        params.append(registro_desde if isinstance(registro_desde, str) else registro_desde.isoformat())
+    if registro_hasta:
+        query += " AND c.fecha_registro <= ?"
+        params.append(registro_hasta if isinstance(registro_hasta, str) else registro_hasta.isoformat())
+    if estado_membresia:
+        from services.membresia_service import condicion_estado_vencimiento
+        where_estado, params_estado = condicion_estado_vencimiento(
+            "(SELECT MAX(m.fecha_vencimiento) FROM membresias m WHERE m.cliente_id = c.id)",
+            estado_membresia)
+        query += where_estado
+        params.extend(params_estado)
     if buscar:
-        query += " AND (nombre LIKE ? COLLATE NOCASE OR telefono LIKE ? COLLATE NOCASE)"
+        query += " AND (c.nombre LIKE ? COLLATE NOCASE OR c.telefono LIKE ? COLLATE NOCASE)"
         buscar_param = f"%{buscar}%"
         params.extend([buscar_param, buscar_param])
+
+    return query, params
+
+
+def listar_clientes(buscar="", solo_activos=True, **filtros):
+    """Lista los clientes ordenados por nombre. Además de la búsqueda admite
+    sexo, edad_min/edad_max, registro_desde/registro_hasta y estado_membresia
+    (ver _filtros_clientes); todo se resuelve en una sola consulta."""
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    query += " ORDER BY nombre"
-    
-    cursor.execute(query, params)
+    where, params = _filtros_clientes(buscar, solo_activos, **filtros)
+    cursor.execute(f"SELECT c.* FROM clientes c WHERE 1=1 {where} ORDER BY c.nombre", params)
     clientes = [dict(row) for row in cursor.fetchall()]
     conn.close()
     return clientes
@@ -92,6 +142,8 @@ def actualizar_cliente(cliente_id, nombre, telefono="", sexo="", fecha_nacimient
     
     conn.commit()
     conn.close()
+    from services import kiosco_service
+    kiosco_service.refrescar_clientes([cliente_id])
 
 
 def eliminar_cliente(cliente_id):
@@ -105,6 +157,10 @@ def eliminar_cliente(cliente_id):
     
     conn.commit()
     conn.close()
+    from services import kiosco_service
+    from services.riesgo_service import actualizar_riesgo_clientes
+    kiosco_service.refrescar_clientes([cliente_id])
+    actualizar_riesgo_clientes([cliente_id])
 
 
 def buscar_clientes_por_nombre(nombre):
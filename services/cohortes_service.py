@@ -0,0 +1,181 @@
+"""Retención y renovación por cohorte de membresía
+
+La cohorte de un cliente es el mes de inicio de su primera membresía. Por
+cada cohorte se calcula:
+
+- retencion[k]: % de la cohorte con una membresía vigente en algún día del
+  mes k contado desde el de la cohorte (k = 0 es siempre 100 %).
+- renovacion[k]: % de la cohorte que ya empezó su segunda membresía en el
+  mes k o antes.
+
+Las curvas salen de las columnas de membresías de analitica_service con
+operaciones vectorizadas (un lexsort por cliente y fecha de inicio, máximos
+acumulados por cliente para no contar dos veces membresías superpuestas y
+bincount por cohorte y mes), sin recorrer clientes en Python.
+
+El resultado queda en memoria por cohorte. Si la instantánea solo agregó
+membresías, se recalculan únicamente las cohortes de esos clientes (la de
+antes y la de ahora, si la nueva membresía es anterior a su primera); si se
+recargó completa (UPDATE o DELETE) o cambió el mes, se recalcula todo.
+"""
+import threading
+from datetime import date
+
+import numpy as np
+
+import db
+from services import analitica_service
+
+_SIN_INICIO = np.iinfo(np.int32).max
+
+
+class _Estado:
+    """Curvas guardadas de una base y lo necesario para actualizarlas."""
+
+    def __init__(self, path, recarga, mes_actual):
+        self.path = path
+        self.recarga = recarga
+        self.mes_actual = mes_actual
+        self.filas = 0
+        # cliente_id -> ordinal de su primera fecha de inicio
+        self.primer_inicio = np.full(0, _SIN_INICIO, np.int32)
+        # número de mes de la cohorte -> dict con sus curvas
+        self.cohortes = {}
+
+
+_estado = None
+_lock = threading.Lock()
+
+
+def _cohorte_de(primer_inicio, clientes):
+    return analitica_service.numero_mes(primer_inicio[clientes])
+
+
+def _curvas(inicio, vencimiento, cliente, primer_inicio, mes_actual):
+    """Curvas de todas las cohortes presentes en las filas dadas (que deben
+    incluir todas las membresías de esos clientes)."""
+    orden = np.lexsort((inicio, cliente))
+    inicio, vencimiento, cliente = inicio[orden], vencimiento[orden], cliente[orden]
+
+    cohorte = _cohorte_de(primer_inicio, cliente)
+    horizonte = mes_actual - cohorte
+    desde = analitica_service.numero_mes(inicio) - cohorte
+    hasta = np.minimum(analitica_service.numero_mes(vencimiento) - cohorte, horizonte)
+
+    # Primera fila de cada cliente y su índice de grupo
+    primera = np.ones(len(cliente), bool)
+    primera[1:] = cliente[1:] != cliente[:-1]
+    grupo = np.cumsum(primera) - 1
+
+    # Último mes cubierto por las membresías anteriores del mismo cliente:
+    # máximo acumulado dentro del grupo (el grupo desplaza la clave para que
+    # el máximo no pase de un cliente al siguiente)
+    ancho = int(max(horizonte.max(initial=0), hasta.max(initial=0))) + 2
+    clave = grupo.astype(np.int64) * ancho + np.maximum(hasta, -1) + 1
+    cubierto = np.maximum.accumulate(clave) - grupo.astype(np.int64) * ancho - 1
+    previo = np.empty_like(cubierto)
+    previo[0] = -1
+    previo[1:] = cubierto[:-1]
+    previo[primera] = -1
+
+    # Cada membresía aporta solo los meses que las anteriores no cubrían
+    efectivo = np.maximum(desde, previo + 1)
+    aporta = (hasta >= efectivo) & (desde <= horizonte)
+
+    cohortes, indice = np.unique(cohorte, return_inverse=True)
+    celdas = len(cohortes) * ancho
+    base = indice * ancho
+    delta = (np.bincount(base[aporta] + efectivo[aporta], minlength=celdas)
+             - np.bincount(base[aporta] + hasta[aporta] + 1, minlength=celdas))
+    activos = np.cumsum(delta.reshape(len(cohortes), ancho), axis=1)
+
+    tamanos = np.bincount(indice[primera], minlength=len(cohortes))
+    segunda = np.zeros(len(cliente), bool)
+    segunda[1:] = primera[:-1] & ~primera[1:]
+    segunda &= desde <= horizonte
+    renovaciones = np.cumsum(np.bincount(base[segunda] + desde[segunda], minlength=celdas)
+                             .reshape(len(cohortes), ancho), axis=1)
+
+    resultado = {}
+    for i, mes in enumerate(cohortes.tolist()):
+        meses = mes_actual - mes + 1
+        if meses < 1:
+            # Membresías que empiezan en un mes futuro
+            continue
+        tamano = int(tamanos[i])
+        resultado[mes] = {
+            "cohorte": date(mes // 12, mes % 12 + 1, 1),
+            "clientes": tamano,
+            "renovaron": int(renovaciones[i, meses - 1]),
+            "tasa_renovacion": round(100 * int(renovaciones[i, meses - 1]) / tamano, 1),
+            "retencion": [round(100 * v / tamano, 1) for v in activos[i, :meses].tolist()],
+            "renovacion": [round(100 * v / tamano, 1) for v in renovaciones[i, :meses].tolist()],
+        }
+    return resultado
+
+
+def _actualizar(estado, inicio, vencimiento, cliente):
+    """Lleva `estado` hasta las filas actuales recalculando solo las
+    cohortes de los clientes con membresías nuevas (en la primera carga,
+    todas). Las membresías con fechas ilegibles (ordinal 0) no cuentan."""
+    nuevas = slice(estado.filas, len(cliente))
+    estado.filas = len(cliente)
+    validas = (inicio[nuevas] > 0) & (vencimiento[nuevas] > 0)
+    cliente_n, inicio_n = cliente[nuevas][validas], inicio[nuevas][validas]
+    if not len(cliente_n):
+        return
+
+    tamano = int(cliente.max()) + 1
+    if tamano > len(estado.primer_inicio):
+        crecido = np.full(tamano, _SIN_INICIO, np.int32)
+        crecido[:len(estado.primer_inicio)] = estado.primer_inicio
+        estado.primer_inicio = crecido
+    primer = estado.primer_inicio
+
+    # Cohortes de esos clientes antes y después de las membresías nuevas
+    clientes_n = np.unique(cliente_n)
+    conocidos = clientes_n[primer[clientes_n] != _SIN_INICIO]
+    afectadas = set(_cohorte_de(primer, conocidos).tolist())
+    np.minimum.at(primer, cliente_n, inicio_n)
+    afectadas |= set(_cohorte_de(primer, clientes_n).tolist())
+
+    # Todas las membresías de los clientes de las cohortes afectadas
+    en_afectadas = (primer != _SIN_INICIO) & np.isin(analitica_service.numero_mes(primer),
+                                                      list(afectadas))
+    filas = en_afectadas[cliente] & (inicio > 0) & (vencimiento > 0)
+    for mes in afectadas:
+        estado.cohortes.pop(mes, None)
+    estado.cohortes.update(_curvas(inicio[filas], vencimiento[filas], cliente[filas],
+                                   primer, estado.mes_actual))
+
+
+def obtener_cohortes(desde=None, hasta=None):
+    """Lista de cohortes en orden cronológico (opcionalmente las de meses
+    entre `desde` y `hasta`, date o ISO), cada una con:
+    cohorte (date del primer día del mes), clientes, renovaron,
+    tasa_renovacion y las curvas retencion y renovacion (% por mes desde
+    la cohorte hasta el actual)."""
+    global _estado
+    recarga, (inicio, vencimiento, cliente) = analitica_service.columnas(
+        "membresias", "fecha_inicio", "fecha_vencimiento", "cliente_id")
+    mes_actual = int(analitica_service.numero_mes([date.today().toordinal()])[0])
+    path = str(db.DB_PATH)
+
+    with _lock:
+        estado = _estado
+        if (estado is None or estado.path != path or estado.recarga != recarga
+                or estado.mes_actual != mes_actual or estado.filas > len(cliente)):
+            estado = _Estado(path, recarga, mes_actual)
+        if estado.filas < len(cliente):
+            _actualizar(estado, inicio, vencimiento, cliente)
+        _estado = estado
+        cohortes = [estado.cohortes[m] for m in sorted(estado.cohortes)]
+
+    if desde is not None:
+        desde = date.fromisoformat(str(desde)[:10]).replace(day=1)
+        cohortes = [c for c in cohortes if c["cohorte"] >= desde]
+    if hasta is not None:
+        hasta = date.fromisoformat(str(hasta)[:10])
+        cohortes = [c for c in cohortes if c["cohorte"] <= hasta]
+    return [dict(c, retencion=list(c["retencion"]), renovacion=list(c["renovacion"]))
+            for c in cohortes]
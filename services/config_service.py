@@ -0,0 +1,150 @@
+"""Servicio de configuración (config.json) en memoria
+
+El archivo se lee una sola vez y se vuelve a leer solo si cambia su mtime o
+tamaño (por ejemplo, editado a mano). Los valores se entregan ya convertidos
+al tipo de su valor por defecto. guardar_configuracion conserva las claves
+que no recibe y escribe de forma atómica (archivo temporal + os.replace),
+así un corte a mitad de escritura nunca deja un config.json truncado.
+"""
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+
+from utils.constants import DIAS_ALERTA_VENCIMIENTO, MINUTOS_MAX_VISITA
+
+CONFIG_FILE = Path(__file__).resolve().parent.parent / "config.json"
+
+VALORES_POR_DEFECTO = {
+    "nombre_gimnasio": "KyoGym",
+    "direccion": "",
+    "telefono": "",
+    "email": "",
+    "rfc": "",
+    "notif_vencimiento": True,
+    "notif_pagos": True,
+    "notif_nuevos": True,
+    "formato_folio": "FAC-{YYYY}-{NNNN}",
+    "auto_factura": True,
+    "dias_alerta_vencimiento": DIAS_ALERTA_VENCIMIENTO,
+    "minutos_max_visita": MINUTOS_MAX_VISITA,
+}
+
+_lock = threading.Lock()
+_config = None
+_firma = None  # (mtime_ns, tamaño) del archivo leído; None si no existía
+
+
+def _firma_archivo():
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _convertir(clave, valor):
+    """Convierte `valor` al tipo del valor por defecto de `clave`; si no se
+    puede (o no es válido) devuelve el valor por defecto."""
+    defecto = VALORES_POR_DEFECTO.get(clave)
+    if defecto is None:
+        return valor
+    try:
+        if isinstance(defecto, bool):
+            if isinstance(valor, str):
+                return valor.strip().lower() in ("1", "true", "si", "sí")
+            return bool(valor)
+        if isinstance(defecto, int):
+            valor = int(valor)
+            return valor if valor >= 0 else defecto
+        return str(valor) if valor is not None else defecto
+    except (ValueError, TypeError):
+        return defecto
+
+
+def _leer_archivo():
+    """Lee config.json. Un archivo ausente o dañado equivale a {}."""
+    try:
+        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+            datos = json.load(f)
+        return datos if isinstance(datos, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _normalizar(datos):
+    config = dict(VALORES_POR_DEFECTO)
+    for clave, valor in datos.items():
+        config[clave] = _convertir(clave, valor)
+    return config
+
+
+def _actual():
+    """Configuración en memoria, recargada si el archivo cambió."""
+    global _config, _firma
+    firma = _firma_archivo()
+    with _lock:
+        if _config is None or firma != _firma:
+            _config = _normalizar(_leer_archivo())
+            _firma = firma
+        return _config
+
+
+def obtener_configuracion():
+    """Devuelve una copia de toda la configuración con valores tipados."""
+    return dict(_actual())
+
+
+def obtener(clave, defecto=None):
+    """Valor tipado de `clave` (sin archivo, su valor por defecto)."""
+    config = _actual()
+    if clave in config:
+        return config[clave]
+    return defecto
+
+
+def obtener_dias_alerta_vencimiento():
+    return obtener("dias_alerta_vencimiento")
+
+
+def obtener_minutos_max_visita():
+    return obtener("minutos_max_visita")
+
+
+def guardar_configuracion(cambios):
+    """Actualiza las claves de `cambios` conservando el resto y escribe el
+    archivo de forma atómica. Devuelve la configuración resultante."""
+    global _config, _firma
+    with _lock:
+        base = _config if _config is not None and _firma_archivo() == _firma else _normalizar(_leer_archivo())
+        config = dict(base)
+        for clave, valor in cambios.items():
+            config[clave] = _convertir(clave, valor)
+
+        CONFIG_FILE.parent.mkdir(parents=True, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(prefix=".config.", suffix=".tmp", dir=CONFIG_FILE.parent)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.unlink(temporal)
+            except OSError:
+                pass
+            raise
+
+        _config = config
+        _firma = _firma_archivo()
+        return dict(config)
+
+
+def recargar():
+    """Olvida la copia en memoria; la próxima lectura vuelve al archivo."""
+    global _config, _firma
+    with _lock:
+        _config = None
+        _firma = None
@@ -0,0 +1,214 @@
+"""Cola de escrituras con un único hilo escritor y commit agrupado
+
+Las funciones de este módulo encolan la escritura (crear_pago,
+registrar_asistencia, vender_producto, crear_membresia, registrar_egreso o
+cualquier función con encolar) y devuelven de inmediato un
+concurrent.futures.Future con lo que devolvería la llamada directa. Desde
+la interfaz, utils.tareas.al_resolver entrega ese resultado como señal Qt en
+el hilo de la interfaz.
+
+Un solo hilo ejecuta la cola en orden de llegada, así que las operaciones
+de un mismo cliente, producto o egreso se aplican en el orden en que se
+pidieron (y el de las demás también). El hilo toma todo lo que se acumuló
+mientras confirmaba el lote anterior (hasta MAX_LOTE operaciones) y lo
+corre dentro de una sola transacción con db.transaccion_compartida: los
+servicios no cambian, su commit queda anulado y el lote entero se confirma
+con un único commit (un solo fsync del WAL). Cada operación va en su propio
+SAVEPOINT: si lanza una excepción o devuelve (False, mensaje) se deshace
+solo esa y las demás del lote siguen. Los Future se resuelven después del
+commit; si el commit falla, todos los del lote reciben la excepción.
+
+Lo que los servicios escriben después (riesgo, ocupación) corre dentro del
+lote, sobre la misma conexión. Lo que vive fuera de la base (presencia,
+índice del kiosco, cachés de finanzas y analítica) lo registran con
+db.al_confirmar y se aplica después del commit, solo para las operaciones
+que no se deshicieron.
+"""
+import atexit
+import queue
+import sqlite3
+import threading
+from concurrent.futures import Future
+
+import db
+from services import asistencia_service, finanzas_service, inventario_service, membresia_service, pago_service
+
+MAX_LOTE = 256
+
+
+class _Operacion:
+    __slots__ = ("funcion", "args", "kwargs", "futuro")
+
+    def __init__(self, funcion, args, kwargs):
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.futuro = Future()
+
+
+_cola = queue.Queue()
+_hilo = None
+_lock = threading.Lock()
+_estadisticas = {"operaciones": 0, "lotes": 0}
+
+
+def _fallida(resultado):
+    """Convención de los servicios: (False, mensaje) es un error sin excepción."""
+    return isinstance(resultado, tuple) and len(resultado) == 2 and resultado[0] is False
+
+
+def _ejecutar_lote(conn, lote):
+    """Corre `lote` en una transacción y, tras el commit, los avisos de las
+    operaciones que quedaron guardadas y luego sus Future. Si algo falla
+    fuera de las operaciones, deshace todo y relanza."""
+    resultados = []
+    avisos = []
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        with db.transaccion_compartida(conn):
+            for operacion in lote:
+                if not operacion.futuro.set_running_or_notify_cancel():
+                    resultados.append(None)
+                    continue
+                conn.execute("SAVEPOINT operacion")
+                try:
+                    resultado = operacion.funcion(*operacion.args, **operacion.kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO operacion")
+                    db.tomar_al_confirmar()
+                    resultados.append((False, e))
+                else:
+                    pendientes = db.tomar_al_confirmar()
+                    if _fallida(resultado):
+                        conn.execute("ROLLBACK TO operacion")
+                    else:
+                        avisos.extend(pendientes)
+                    resultados.append((True, resultado))
+                conn.execute("RELEASE operacion")
+        conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            pass
+        raise
+
+    _estadisticas["lotes"] += 1
+    _estadisticas["operaciones"] += len(lote)
+    # Cachés e índices en memoria se actualizan recién ahora, sobre lo
+    # confirmado, y antes de que quien espera el Future vuelva a leer
+    for aviso in avisos:
+        try:
+            aviso()
+        except Exception as e:
+            print(f"Error en aviso posterior al commit: {e}")
+    for operacion, resultado in zip(lote, resultados):
+        if resultado is None:
+            continue
+        ok, valor = resultado
+        if ok:
+            operacion.futuro.set_result(valor)
+        else:
+            operacion.futuro.set_exception(valor)
+
+
+def _escritor():
+    conn = path = None
+    while True:
+        lote = [_cola.get()]
+        while len(lote) < MAX_LOTE:
+            try:
+                lote.append(_cola.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            if conn is None or path != str(db.DB_PATH):
+                if conn is not None:
+                    conn.close()
+                path = str(db.DB_PATH)
+                conn = db.get_connection()
+            _ejecutar_lote(conn, lote)
+        except Exception as e:
+            print(f"Error en el lote de escrituras: {e}")
+            # La conexión puede haber quedado en mal estado: se abre otra
+            try:
+                conn.close()
+            except Exception:
+                pass
+            conn = None
+            for operacion in lote:
+                if not operacion.futuro.done():
+                    operacion.futuro.set_exception(e)
+
+
+def encolar(funcion, *args, **kwargs):
+    """Encola `funcion(*args, **kwargs)` para el hilo escritor y devuelve su
+    Future. La función debe escribir solo a través de get_connection."""
+    global _hilo
+    with _lock:
+        if _hilo is None:
+            _hilo = threading.Thread(target=_escritor, name="escritor-kyogym", daemon=True)
+            _hilo.start()
+            # Al cerrar la aplicación no se pierde lo que quedó en la cola
+            atexit.register(esperar)
+    operacion = _Operacion(funcion, args, kwargs)
+    _cola.put(operacion)
+    return operacion.futuro
+
+
+def esperar(timeout=None):
+    """Bloquea hasta que se confirme todo lo encolado hasta ahora."""
+    if _hilo is None:
+        return
+    encolar(lambda: None).result(timeout)
+
+
+def estadisticas():
+    """Operaciones y lotes (commits) confirmados desde que arrancó el hilo."""
+    return dict(_estadisticas)
+
+
+# ─────────────────────────── escrituras de los servicios ──────────
+
+def crear_pago(*args, **kwargs):
+    """pago_service.crear_pago encolado; el Future da (ok, pago_id o mensaje)."""
+    return encolar(pago_service.crear_pago, *args, **kwargs)
+
+
+def crear_pago_multiple(*args, **kwargs):
+    return encolar(pago_service.crear_pago_multiple, *args, **kwargs)
+
+
+def registrar_asistencia(*args, **kwargs):
+    """asistencia_service.registrar_asistencia encolado; da (ok, id o mensaje)."""
+    return encolar(asistencia_service.registrar_asistencia, *args, **kwargs)
+
+
+def vender_producto(*args, **kwargs):
+    return encolar(inventario_service.vender_producto, *args, **kwargs)
+
+
+def crear_membresia(*args, **kwargs):
+    """membresia_service.crear_membresia encolado; da el id de la membresía."""
+    return encolar(membresia_service.crear_membresia, *args, **kwargs)
+
+
+def registrar_egreso(*args, **kwargs):
+    """finanzas_service.registrar_egreso encolado; da el id del egreso."""
+    return encolar(finanzas_service.registrar_egreso, *args, **kwargs)
+
+
+def _membresia_con_pago(cliente_id, tipo, fecha_inicio, monto, metodo):
+    ok, pago_id = pago_service.crear_pago(cliente_id=cliente_id, monto=monto, metodo=metodo,
+                                          fecha_pago=fecha_inicio, concepto="Pago de membresía")
+    if not ok:
+        return False, f"Error al registrar el pago: {pago_id}"
+    membresia_id = membresia_service.crear_membresia(cliente_id=cliente_id, tipo=tipo, monto=monto,
+                                                     fecha_inicio=fecha_inicio, pago_id=pago_id)
+    return True, membresia_id
+
+
+def crear_membresia_con_pago(cliente_id, tipo, fecha_inicio, monto, metodo="Efectivo"):
+    """Pago de membresía y membresía ligada a él en una sola operación (se
+    guardan ambos o ninguno). El Future da (ok, membresia_id o mensaje)."""
+    return encolar(_membresia_con_pago, cliente_id, tipo, fecha_inicio, monto, metodo)
@@ -1,7 +1,10 @@
 """Servicio de finanzas: ingresos, egresos, morosidad y reportes"""
+import threading
 from datetime import date, timedelta
 from pathlib import Path
-from db import get_connection
+import db
+from db import en_instantanea, get_connection
+from services.paginacion import TAMANO_PAGINA
 from utils.constants import ESTADO_VENCIDA
 
 
@@ -29,8 +32,10 @@ REPORTES_DIR = _resolver_reportes_dir()
 
 # ─────────────────────────── INGRESOS ────────────────────────────
 
-def listar_ingresos(fecha_desde=None, fecha_hasta=None, cliente=None, limite=2000):
-    """Devuelve la lista de pagos (ingresos) con filtros opcionales."""
+def listar_ingresos(fecha_desde=None, fecha_hasta=None, cliente=None, limite=None):
+    """Devuelve la lista de pagos (ingresos) con filtros opcionales. Sin
+    `limite` devuelve todo el período (lo usan los reportes); los listados
+    en pantalla usan listar_ingresos_pagina."""
     conn = get_connection()
     cur = conn.cursor()
 
@@ -53,8 +58,10 @@ def listar_ingresos(fecha_desde=None, fecha_hasta=None, cliente=None, limite=200
         query += " AND LOWER(c.nombre) LIKE ?"
         params.append(f"%{cliente.lower()}%")
 
-    query += " ORDER BY p.fecha DESC, p.id DESC LIMIT ?"
-    params.append(limite)
+    query += " ORDER BY p.fecha DESC, p.id DESC"
+    if limite is not None:
+        query += " LIMIT ?"
+        params.append(limite)
 
     cur.execute(query, params)
     rows = [dict(r) for r in cur.fetchall()]
@@ -62,10 +69,25 @@ def listar_ingresos(fecha_desde=None, fecha_hasta=None, cliente=None, limite=200
     return rows
 
 
-def calcular_total_ingresos(fecha_desde=None, fecha_hasta=None):
-    """Suma de ingresos en el período."""
-    pagos = listar_ingresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
-    return sum(p["monto"] for p in pagos)
+def listar_ingresos_pagina(cursor=None, tamano=TAMANO_PAGINA, fecha_desde=None, fecha_hasta=None,
+                           cliente=None, **filtros):
+    """Página de ingresos a partir de `cursor` (fecha, id). Devuelve
+    (filas, siguiente_cursor); admite también monto_min/monto_max, metodo y
+    concepto."""
+    from services.pago_service import listar_pagos_pagina
+    return listar_pagos_pagina(cursor, tamano, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
+                               cliente=cliente, **filtros)
+
+
+def calcular_total_ingresos(fecha_desde=None, fecha_hasta=None, cliente=None):
+    """Suma de ingresos en el período. Sin filtro de cliente sale de la
+    instantánea analítica, salvo dentro de una instantánea de lectura
+    (exportaciones), donde se suma con SQL sobre esa misma conexión."""
+    if cliente or db.leyendo_instantanea():
+        from services.pago_service import sumar_pagos
+        return sumar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, cliente=cliente)
+    from services import analitica_service
+    return analitica_service.total("pagos", fecha_desde, fecha_hasta)
 
 
 # ─────────────────────────── EGRESOS ─────────────────────────────
@@ -83,6 +105,7 @@ def registrar_egreso(fecha, categoria, descripcion, proveedor, metodo, monto):
     egreso_id = cur.lastrowid
     conn.commit()
     conn.close()
+    invalidar_comparacion_meses(fecha)
     return egreso_id
 
 
@@ -114,9 +137,32 @@ def listar_egresos(fecha_desde=None, fecha_hasta=None, categoria=None, limite=20
 
 
 def calcular_total_egresos(fecha_desde=None, fecha_hasta=None, categoria=None):
-    """Suma de egresos en el período."""
-    egresos = listar_egresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, categoria=categoria)
-    return sum(e["monto"] for e in egresos)
+    """Suma de egresos en el período (todos, no solo los que muestra
+    listar_egresos). Dentro de una instantánea de lectura, con SQL."""
+    if categoria == "Todas":
+        categoria = None
+    if db.leyendo_instantanea():
+        return _sumar_egresos(fecha_desde, fecha_hasta, categoria)
+    from services import analitica_service
+    return analitica_service.total("egresos", fecha_desde, fecha_hasta, categoria=categoria)
+
+
+def _sumar_egresos(fecha_desde=None, fecha_hasta=None, categoria=None):
+    conn = get_connection()
+    query = "SELECT COALESCE(SUM(monto), 0) FROM egresos WHERE 1=1"
+    params = []
+    if fecha_desde:
+        query += " AND fecha >= ?"
+        params.append(str(fecha_desde))
+    if fecha_hasta:
+        query += " AND fecha <= ?"
+        params.append(str(fecha_hasta))
+    if categoria:
+        query += " AND categoria = ?"
+        params.append(categoria)
+    total = conn.execute(query, params).fetchone()[0]
+    conn.close()
+    return total
 
 
 def eliminar_egreso(egreso_id):
@@ -126,6 +172,7 @@ def eliminar_egreso(egreso_id):
     cur.execute("DELETE FROM egresos WHERE id = ?", (egreso_id,))
     conn.commit()
     conn.close()
+    invalidar_comparacion_meses()
 
 
 # ─────────────────────────── RESUMEN ─────────────────────────────
@@ -148,13 +195,14 @@ def obtener_resumen_mes(año=None, mes=None):
     egresos_mes = calcular_total_egresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
     utilidad = ingresos_mes - egresos_mes
 
-    # Membresías activas y vencidas
-    from services.membresia_service import listar_membresias, calcular_estado_membresia
+    # Membresías activas y vencidas (última membresía de cada cliente, igual
+    # que listar_morosos)
+    from services.membresia_service import contar_membresias_por_estado
     from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER
 
-    todas = listar_membresias()
-    activas = sum(1 for m in todas if m["estado"] in (ESTADO_ACTIVA, ESTADO_POR_VENCER))
-    vencidas = sum(1 for m in todas if m["estado"] == ESTADO_VENCIDA)
+    conteo = contar_membresias_por_estado()
+    activas = conteo[ESTADO_ACTIVA] + conteo[ESTADO_POR_VENCER]
+    vencidas = conteo[ESTADO_VENCIDA]
 
     # Últimos 5 ingresos y egresos
     ultimos_ingresos = listar_ingresos(limite=5)
@@ -174,44 +222,106 @@ def obtener_resumen_mes(año=None, mes=None):
 # ─────────────────────────── MOROSIDAD ───────────────────────────
 
 def listar_morosos():
-    """Devuelve clientes con membresía vencida, ordenados por días de atraso DESC."""
-    from services.membresia_service import listar_membresias
+    """Devuelve clientes cuya última membresía está vencida, ordenados por
+    días de atraso DESC. Un cliente que ya renovó no aparece."""
+    from services.membresia_service import listar_por_vencimiento
     hoy = date.today()
 
-    vencidas = []
-    for m in listar_membresias(estado=ESTADO_VENCIDA):
-        fv = date.fromisoformat(m["fecha_vencimiento"])
-        dias = (hoy - fv).days
-        m["dias_atraso"] = dias
-        vencidas.append(m)
-
-    vencidas.sort(key=lambda x: x["dias_atraso"], reverse=True)
+    # Vencimiento ascendente = más días de atraso primero
+    vencidas = listar_por_vencimiento(estado=ESTADO_VENCIDA)
+    for m in vencidas:
+        m["dias_atraso"] = (hoy - date.fromisoformat(m["fecha_vencimiento"])).days
     return vencidas
 
 
 # ─────────────────────────── COMPARACIÓN MESES ───────────────────
 
+# obtener_comparacion_meses por (base, año). Las escrituras de pagos y
+# egresos lo invalidan con invalidar_comparacion_meses; la generación evita
+# guardar un resultado calculado antes de una invalidación concurrente.
+_comparacion_cache = {}
+_comparacion_generacion = 0
+_comparacion_lock = threading.Lock()
+
+
+def invalidar_comparacion_meses(*fechas):
+    """Descarta la comparación mensual de los años de `fechas` (date o ISO);
+    sin argumentos, la de todos los años. Dentro de una transacción
+    compartida espera a su commit."""
+    db.al_confirmar(lambda: _invalidar_comparacion(fechas))
+
+
+def _invalidar_comparacion(fechas):
+    global _comparacion_generacion
+    with _comparacion_lock:
+        _comparacion_generacion += 1
+        if not fechas:
+            _comparacion_cache.clear()
+            return
+        años = {int(str(f)[:4]) for f in fechas if f}
+        for clave in [c for c in _comparacion_cache if c[1] in años]:
+            del _comparacion_cache[clave]
+
+
 def obtener_comparacion_meses(año=None):
     """Devuelve lista de dicts {mes, nombre_mes, ingresos, egresos, utilidad, variacion_pct}
-    para cada mes del año."""
+    para cada mes del año. El resultado queda en memoria hasta que cambie
+    un pago o egreso. Dentro de una instantánea de lectura se calcula sobre
+    ella y no se usa ni se guarda en memoria: la instantánea puede ser de
+    antes de la última escritura."""
     if año is None:
         año = date.today().year
 
+    if db.leyendo_instantanea():
+        return _calcular_comparacion_meses(año)
+
+    clave = (str(db.DB_PATH), año)
+    with _comparacion_lock:
+        meses = _comparacion_cache.get(clave)
+        generacion = _comparacion_generacion
+    if meses is None:
+        meses = _calcular_comparacion_meses(año)
+        with _comparacion_lock:
+            if generacion == _comparacion_generacion:
+                _comparacion_cache[clave] = meses
+    return [dict(m) for m in meses]
+
+
+def _totales_por_mes(tabla, desde, hasta):
+    """{mes: suma de montos} de `tabla` por SQL (dentro de instantáneas)."""
+    conn = get_connection()
+    filas = conn.execute(f"""
+        SELECT CAST(substr(fecha, 6, 2) AS INTEGER) AS mes, SUM(monto) AS total
+        FROM {tabla}
+        WHERE fecha BETWEEN ? AND ?
+        GROUP BY mes
+    """, (desde.isoformat(), hasta.isoformat())).fetchall()
+    conn.close()
+    return {f["mes"]: f["total"] for f in filas}
+
+
+def _calcular_comparacion_meses(año):
+    from services import analitica_service
     nombres = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio",
                "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
 
+    # Totales mensuales de todo el año en una pasada por tabla
+    desde, hasta = date(año, 1, 1), date(año, 12, 31)
+    if db.leyendo_instantanea():
+        ingresos_mes = _totales_por_mes("pagos", desde, hasta)
+        egresos_mes = _totales_por_mes("egresos", desde, hasta)
+    else:
+        ingresos_mes = {f["inicio"].month: f["total"]
+                        for f in analitica_service.serie("pagos", "mes", desde, hasta)}
+        egresos_mes = {f["inicio"].month: f["total"]
+                       for f in analitica_service.serie("egresos", "mes", desde, hasta)}
+
     resultado = []
     utilidad_anterior = None
 
     for mes in range(1, 13):
-        fecha_desde = date(año, mes, 1)
-        if mes == 12:
-            fecha_hasta = date(año, 12, 31)
-        else:
-            fecha_hasta = date(año, mes + 1, 1) - timedelta(days=1)
-
-        ingresos = calcular_total_ingresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
-        egresos = calcular_total_egresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+        ingresos = ingresos_mes.get(mes, 0.0)
+        egresos = egresos_mes.get(mes, 0.0)
         utilidad = ingresos - egresos
 
         if utilidad_anterior is None or utilidad_anterior == 0:
@@ -234,6 +344,7 @@ def obtener_comparacion_meses(año=None):
 
 # ─────────────────────────── EXPORTAR EXCEL ──────────────────────
 
+@en_instantanea
 def exportar_excel_reporte(año=None, mes=None):
     """Genera ~/KyoGym/Reportes/Reportes_KyoGym.xlsx con hojas Ingresos, Egresos, Comparacion_Meses.
     Si una hoja ya existe la reemplaza."""
@@ -327,6 +438,7 @@ def exportar_excel_reporte(año=None, mes=None):
 
 # ─────────────────────────── EXPORTAR PDF ────────────────────────
 
+@en_instantanea
 def exportar_pdf_reporte(año=None, mes=None):
     """Genera un PDF con ingresos, egresos y comparación de meses."""
     try:
@@ -457,24 +569,25 @@ def obtener_estadisticas_clientes():
     - sin_membresia: clientes sin ninguna membresía registrada
     - promedio_gasto_cliente: promedio de gasto por cliente (sobre los que han pagado)
     """
-    from services.membresia_service import listar_membresias
-    from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER
-
     conn = get_connection()
     cur = conn.cursor()
     cur.execute("SELECT COUNT(*) as total FROM clientes")
     total = cur.fetchone()["total"]
-    conn.close()
 
-    todas = listar_membresias()
-    ids_con_membresia = set(m["cliente_id"] for m in todas)
-
-    activas = sum(1 for m in todas if m["estado"] in (ESTADO_ACTIVA, ESTADO_POR_VENCER))
-    vencidas = sum(1 for m in todas if m["estado"] == ESTADO_VENCIDA)
-    sin_membresia = total - len(ids_con_membresia)
+    # Una fila por cliente con membresía (tabla membresia_actual)
+    hoy = date.today().isoformat()
+    cur.execute("""
+        SELECT COUNT(*) as con_membresia,
+               COALESCE(SUM(a.fecha_vencimiento >= ? AND c.activo = 1), 0) as activas,
+               COALESCE(SUM(a.fecha_vencimiento < ? AND c.activo = 1), 0) as vencidas
+        FROM membresia_actual a
+        JOIN clientes c ON c.id = a.cliente_id
+    """, (hoy, hoy))
+    row = cur.fetchone()
+    activas = row["activas"]
+    vencidas = row["vencidas"]
+    sin_membresia = total - row["con_membresia"]
 
-    conn = get_connection()
-    cur = conn.cursor()
     cur.execute("""
         SELECT AVG(total_por_cliente) as promedio
         FROM (
@@ -499,7 +612,23 @@ def obtener_estadisticas_clientes():
 def obtener_gasto_por_cliente(fecha_desde=None, fecha_hasta=None):
     """Devuelve todos los clientes activos con su total gastado y cantidad de pagos.
     Incluye clientes que nunca han pagado (total = 0).
-    Soporta filtro opcional por fechas."""
+    Soporta filtro opcional por fechas; sin fechas lee cliente_stats."""
+    if not fecha_desde and not fecha_hasta:
+        conn = get_connection()
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT c.id, c.nombre, c.sexo,
+                   COALESCE(s.total_pagado, 0) AS total_pagado,
+                   COALESCE(s.cantidad_pagos, 0) AS cantidad_pagos
+            FROM clientes c
+            LEFT JOIN cliente_stats s ON s.cliente_id = c.id
+            WHERE c.activo = 1
+            ORDER BY total_pagado DESC
+        """)
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return rows
+
     sub_wheres = ["1=1"]
     sub_params = []
     if fecha_desde:
@@ -539,6 +668,18 @@ def obtener_top_clientes_por_monto(limite=10, fecha_desde=None, fecha_hasta=None
     conn = get_connection()
     cur = conn.cursor()
 
+    if not fecha_desde and not fecha_hasta:
+        cur.execute("""
+            SELECT c.id, c.nombre, c.sexo, s.cantidad_pagos, s.total_pagado
+            FROM cliente_stats s
+            JOIN clientes c ON c.id = s.cliente_id
+            WHERE s.cantidad_pagos > 0
+            ORDER BY s.total_pagado DESC LIMIT ?
+        """, (limite,))
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return rows
+
     query = """
         SELECT c.id, c.nombre, c.sexo,
                COUNT(p.id) as cantidad_pagos,
@@ -571,6 +712,18 @@ def obtener_clientes_frecuentes(limite=10, fecha_desde=None, fecha_hasta=None):
     conn = get_connection()
     cur = conn.cursor()
 
+    if not fecha_desde and not fecha_hasta:
+        cur.execute("""
+            SELECT c.id, c.nombre, c.sexo, s.cantidad_pagos, s.total_pagado, s.ultimo_pago
+            FROM cliente_stats s
+            JOIN clientes c ON c.id = s.cliente_id
+            WHERE s.cantidad_pagos > 0
+            ORDER BY s.cantidad_pagos DESC LIMIT ?
+        """, (limite,))
+        rows = [dict(r) for r in cur.fetchall()]
+        conn.close()
+        return rows
+
     query = """
         SELECT c.id, c.nombre, c.sexo,
                COUNT(p.id) as cantidad_pagos,
@@ -606,12 +759,11 @@ def obtener_clientes_inactivos(dias=60):
     fecha_corte = (date.today() - timedelta(days=dias)).isoformat()
 
     cur.execute("""
-        SELECT c.id, c.nombre, c.sexo, MAX(p.fecha) as ultimo_pago
+        SELECT c.id, c.nombre, c.sexo, s.ultimo_pago
         FROM clientes c
-        LEFT JOIN pagos p ON p.cliente_id = c.id
-        GROUP BY c.id
-        HAVING ultimo_pago IS NULL OR ultimo_pago < ?
-        ORDER BY ultimo_pago ASC
+        LEFT JOIN cliente_stats s ON s.cliente_id = c.id
+        WHERE s.ultimo_pago IS NULL OR s.ultimo_pago < ?
+        ORDER BY s.ultimo_pago ASC
     """, (fecha_corte,))
     rows = [dict(r) for r in cur.fetchall()]
     conn.close()
@@ -638,6 +790,7 @@ def obtener_distribucion_membresias():
 
 # ─────────────────────────── REPORTE DIARIO ──────────────────────
 
+@en_instantanea
 def exportar_excel_reporte_diario(fecha=None):
     """Genera un reporte Excel del día:
     - Hoja Resumen_Dia: métricas clave del día
@@ -726,6 +879,7 @@ def exportar_excel_reporte_diario(fecha=None):
     return str(output_path)
 
 
+@en_instantanea
 def exportar_pdf_reporte_diario(fecha=None):
     """Genera un PDF con el resumen del día, ingresos, egresos y top clientes."""
     try:
@@ -0,0 +1,195 @@
+"""Check-in por código (QR / código de barras) para el modo kiosco
+
+El código escaneado se resuelve contra un índice en memoria, sin tocar la
+base: cliente_id -> (nombre, activo, vencimiento de su membresía actual) y
+teléfono (solo dígitos) -> cliente_id. El índice se arma con una consulta
+la primera vez que se usa y después se mantiene con los avisos de los
+servicios que escriben clientes y membresías (refrescar_clientes relee
+solo esos clientes). Sin índice armado los avisos no hacen nada.
+
+La asistencia del cliente aceptado no se escribe en el hilo de la
+interfaz: se encola en el hilo escritor de escritura_service.
+
+Códigos aceptados: "KG" seguido del id (el de codigo_cliente, con o sin
+ceros o guion), un teléfono de 8 dígitos o un id a secas.
+"""
+import threading
+from datetime import date, datetime
+
+import db
+from db import get_connection
+from services import config_service, escritura_service, presencia_service
+
+PREFIJO_CODIGO = "KG"
+DIGITOS_TELEFONO = 8
+
+_SELECT = """
+    SELECT c.id, c.nombre, c.telefono, c.activo, a.fecha_vencimiento
+    FROM clientes c
+    LEFT JOIN membresia_actual a ON a.cliente_id = c.id
+"""
+
+
+class _Indice:
+    """Clientes de una base indexados por id y por teléfono."""
+
+    def __init__(self, path):
+        self.path = path
+        # cliente_id -> (nombre, activo, fecha_vencimiento ISO o None, teléfono)
+        self.por_id = {}
+        self.por_telefono = {}
+
+    def poner(self, fila):
+        self.quitar(fila["id"])
+        telefono = _digitos(fila["telefono"])
+        self.por_id[fila["id"]] = (fila["nombre"], bool(fila["activo"]),
+                                   fila["fecha_vencimiento"], telefono)
+        if telefono:
+            self.por_telefono[telefono] = fila["id"]
+
+    def quitar(self, cliente_id):
+        anterior = self.por_id.pop(cliente_id, None)
+        if anterior and self.por_telefono.get(anterior[3]) == cliente_id:
+            del self.por_telefono[anterior[3]]
+
+
+_indice = None
+_lock = threading.Lock()
+
+
+def _digitos(texto):
+    return "".join(c for c in str(texto or "") if c.isdigit())
+
+
+def codigo_cliente(cliente_id):
+    """Texto a imprimir en el QR / código de barras de un cliente."""
+    return f"{PREFIJO_CODIGO}{int(cliente_id):06d}"
+
+
+def _cargar(path):
+    indice = _Indice(path)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(_SELECT)
+    for fila in cursor.fetchall():
+        indice.poner(fila)
+    conn.close()
+    return indice
+
+
+def _actual():
+    """Índice de la base actual; se arma si falta. Con _lock tomado."""
+    global _indice
+    path = str(db.DB_PATH)
+    if _indice is None or _indice.path != path:
+        _indice = _cargar(path)
+    return _indice
+
+
+def cargar_indice():
+    """Arma el índice por adelantado (al abrir el kiosco). Devuelve cuántos
+    clientes tiene."""
+    with _lock:
+        return len(_actual().por_id)
+
+
+def refrescar_clientes(cliente_ids):
+    """Relee del índice los clientes dados tras escribir sus datos o sus
+    membresías. Sin índice armado no hace nada. Dentro de una transacción
+    compartida espera a su commit, así solo lee lo confirmado."""
+    cliente_ids = [c for c in set(cliente_ids) if c is not None]
+    if cliente_ids:
+        db.al_confirmar(lambda: _refrescar(cliente_ids))
+
+
+def _refrescar(cliente_ids):
+    with _lock:
+        indice = _indice
+        if indice is None or indice.path != str(db.DB_PATH):
+            return
+        conn = get_connection()
+        cursor = conn.cursor()
+        marcas = ",".join("?" * len(cliente_ids))
+        cursor.execute(_SELECT + f" WHERE c.id IN ({marcas})", cliente_ids)
+        filas = cursor.fetchall()
+        conn.close()
+        for cliente_id in cliente_ids:
+            indice.quitar(cliente_id)
+        for fila in filas:
+            indice.poner(fila)
+
+
+def invalidar():
+    """Descarta el índice (restauraciones); se rearma en el próximo uso."""
+    global _indice
+    with _lock:
+        _indice = None
+
+
+def _buscar(indice, codigo):
+    texto = str(codigo or "").strip().upper()
+    if texto.startswith(PREFIJO_CODIGO):
+        digitos = _digitos(texto[len(PREFIJO_CODIGO):])
+        return int(digitos) if digitos and int(digitos) in indice.por_id else None
+    digitos = _digitos(texto)
+    if not digitos:
+        return None
+    if len(digitos) == DIGITOS_TELEFONO and digitos in indice.por_telefono:
+        return indice.por_telefono[digitos]
+    return int(digitos) if int(digitos) in indice.por_id else None
+
+
+def resolver(codigo, hoy=None):
+    """Cliente del código escaneado y si puede entrar. Devuelve un dict con
+    permitido, alerta (True si la membresía está por vencer), motivo,
+    cliente_id, nombre, vencimiento y dias_restantes (los cuatro últimos
+    None si el código no corresponde a ningún cliente)."""
+    hoy = hoy or date.today()
+    with _lock:
+        indice = _actual()
+        cliente_id = _buscar(indice, codigo)
+        datos = indice.por_id.get(cliente_id)
+
+    if datos is None:
+        return {"permitido": False, "alerta": False, "motivo": "Código no registrado", "cliente_id": None,
+                "nombre": None, "vencimiento": None, "dias_restantes": None}
+    nombre, activo, vencimiento, _ = datos
+    resultado = {"permitido": False, "alerta": False, "cliente_id": cliente_id, "nombre": nombre,
+                 "vencimiento": vencimiento, "dias_restantes": None}
+    if not activo:
+        resultado["motivo"] = "Cliente dado de baja"
+    elif not vencimiento:
+        resultado["motivo"] = "Sin membresía"
+    else:
+        dias = (date.fromisoformat(vencimiento) - hoy).days
+        resultado["dias_restantes"] = dias
+        if dias < 0:
+            resultado["motivo"] = "Membresía vencida"
+        else:
+            resultado["permitido"] = True
+            if dias <= config_service.obtener_dias_alerta_vencimiento():
+                resultado["alerta"] = True
+                resultado["motivo"] = f"Vence en {dias} día(s)"
+            else:
+                resultado["motivo"] = "Membresía activa"
+    return resultado
+
+
+# ─────────────────────────── asistencia ────────────────────────────
+
+def _registrar(cliente_id, fecha, hora):
+    from services.asistencia_service import registrar_asistencia, tiene_asistencia
+    # Un segundo escaneo el mismo día no pisa la hora de entrada
+    if tiene_asistencia(cliente_id, fecha):
+        return True, None
+    return registrar_asistencia(cliente_id, fecha=fecha, hora_entrada=hora, origen="kiosco")
+
+
+def registrar_entrada(cliente_id):
+    """Encola en escritura_service la asistencia de hoy (con la hora actual)
+    de un cliente ya aceptado y vuelve de inmediato con el Future de la
+    escritura. Devuelve None si ya estaba dentro."""
+    if presencia_service.esta_dentro(cliente_id):
+        return None
+    ahora = datetime.now()
+    return escritura_service.encolar(_registrar, cliente_id, ahora.date(), ahora.strftime("%H:%M"))
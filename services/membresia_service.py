@@ -1,27 +1,15 @@
 """Servicio CRUD para membresías"""
 from datetime import date, timedelta
-import json
-from pathlib import Path
 from db import get_connection
-from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA, DIAS_ALERTA_VENCIMIENTO
-
-
-CONFIG_FILE = Path(__file__).resolve().parent.parent / "config.json"
+from services import config_service
+from services.riesgo_service import actualizar_riesgo_clientes
+from services.paginacion import TAMANO_PAGINA, condicion_cursor, cortar_pagina
+from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA
 
 
 def obtener_dias_alerta_vencimiento():
-    """Obtiene días de alerta desde config.json con fallback seguro."""
-    try:
-        if CONFIG_FILE.exists():
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                config = json.load(f)
-            dias = config.get("dias_alerta_vencimiento", DIAS_ALERTA_VENCIMIENTO)
-            dias = int(dias)
-            if dias >= 0:
-                return dias
-    except (ValueError, TypeError, json.JSONDecodeError, OSError):
-        pass
-    return DIAS_ALERTA_VENCIMIENTO
+    """Días de alerta de vencimiento (config_service, en memoria)."""
+    return config_service.obtener_dias_alerta_vencimiento()
 
 
 def calcular_estado_membresia(fecha_vencimiento_str, dias_alerta=None):
@@ -75,6 +63,9 @@ def crear_membresia(cliente_id, tipo="Mensual", monto=0.0, fecha_inicio=None, pa
     membresia_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    actualizar_riesgo_clientes([cliente_id])
+    from services import kiosco_service
+    kiosco_service.refrescar_clientes([cliente_id])
     return membresia_id
 
 
@@ -101,50 +92,138 @@ def obtener_membresia(membresia_id):
     return None
 
 
-def listar_membresias(cliente_id=None, estado=None):
-    """Lista membresías con filtros opcionales"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    query = """
-        SELECT m.*, c.nombre as cliente_nombre, c.telefono as cliente_telefono
-        FROM membresias m
-        JOIN clientes c ON m.cliente_id = c.id
-        WHERE c.activo = 1
-    """
+def _fecha_iso(fecha):
+    return fecha if isinstance(fecha, str) else fecha.isoformat()
+
+
+def _filtros_membresias(cliente_id=None, estado=None, tipo=None, dias_alerta=None,
+                        cliente=None, vencimiento_desde=None, vencimiento_hasta=None):
+    """Condiciones WHERE (y parámetros) de los listados de membresías. El
+    estado se traduce a un rango de fecha_vencimiento con la misma regla
+    que calcular_estado_membresia; `cliente` busca por nombre."""
+    query = ""
     params = []
-    
+
     if cliente_id:
         query += " AND m.cliente_id = ?"
         params.append(cliente_id)
+    if tipo:
+        query += " AND m.tipo = ?"
+        params.append(tipo)
+    if cliente:
+        query += " AND LOWER(c.nombre) LIKE ?"
+        params.append(f"%{cliente.lower()}%")
+    if vencimiento_desde:
+        query += " AND m.fecha_vencimiento >= ?"
+        params.append(_fecha_iso(vencimiento_desde))
+    if vencimiento_hasta:
+        query += " AND m.fecha_vencimiento <= ?"
+        params.append(_fecha_iso(vencimiento_hasta))
+    if estado:
+        where_estado, params_estado = condicion_estado_vencimiento("m.fecha_vencimiento", estado, dias_alerta)
+        query += where_estado
+        params.extend(params_estado)
+
+    return query, params
+
+
+def condicion_estado_vencimiento(columna, estado, dias_alerta=None):
+    """Traduce un estado de membresía a un rango sobre la columna de
+    vencimiento `columna`. Devuelve (sql, params) para agregar al WHERE."""
+    if dias_alerta is None:
+        dias_alerta = obtener_dias_alerta_vencimiento()
+    hoy = date.today()
+    limite_alerta = (hoy + timedelta(days=dias_alerta)).isoformat()
+    if estado == ESTADO_VENCIDA:
+        return f" AND {columna} < ?", [hoy.isoformat()]
+    if estado == ESTADO_POR_VENCER:
+        return f" AND {columna} >= ? AND {columna} <= ?", [hoy.isoformat(), limite_alerta]
+    if estado == ESTADO_ACTIVA:
+        return f" AND {columna} > ?", [limite_alerta]
+    return "", []
+
+
+_SELECT_MEMBRESIAS = """
+    SELECT m.*, c.nombre as cliente_nombre, c.telefono as cliente_telefono
+    FROM membresias m
+    JOIN clientes c ON m.cliente_id = c.id
+    WHERE c.activo = 1
+"""
+
+
+def listar_membresias(cliente_id=None, estado=None, tipo=None, **filtros):
+    """Lista membresías con filtros opcionales (cliente por nombre y rango
+    vencimiento_desde/vencimiento_hasta, ver _filtros_membresias)"""
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    query += " ORDER BY m.fecha_vencimiento DESC"
+    dias_alerta = obtener_dias_alerta_vencimiento()
+    where, params = _filtros_membresias(cliente_id, estado, tipo, dias_alerta, **filtros)
+    query = _SELECT_MEMBRESIAS + where + " ORDER BY m.fecha_vencimiento DESC, m.id DESC"
     
     cursor.execute(query, params)
     membresias = []
-    dias_alerta = obtener_dias_alerta_vencimiento()
     
     for row in cursor.fetchall():
         membresia = dict(row)
         membresia['estado'] = calcular_estado_membresia(membresia['fecha_vencimiento'], dias_alerta)
-        
-        # Filtrar por estado si se especifica
-        if estado is None or membresia['estado'] == estado:
-            membresias.append(membresia)
+        membresias.append(membresia)
     
     conn.close()
     return membresias
 
 
+def listar_membresias_pagina(cursor=None, tamano=TAMANO_PAGINA, cliente_id=None, estado=None,
+                             tipo=None, **filtros):
+    """Devuelve (membresias, siguiente_cursor) ordenadas por vencimiento
+    descendente. El cursor es (fecha_vencimiento, id) de la última fila de
+    la página anterior; None pide la primera."""
+    conn = get_connection()
+    cur = conn.cursor()
+
+    dias_alerta = obtener_dias_alerta_vencimiento()
+    where, params = _filtros_membresias(cliente_id, estado, tipo, dias_alerta, **filtros)
+    where_cursor, params_cursor = condicion_cursor(cursor, "m.fecha_vencimiento", "m.id")
+    query = (_SELECT_MEMBRESIAS + where + where_cursor
+             + " ORDER BY m.fecha_vencimiento DESC, m.id DESC LIMIT ?")
+
+    cur.execute(query, params + params_cursor + [tamano + 1])
+    membresias = [dict(row) for row in cur.fetchall()]
+    conn.close()
+
+    for membresia in membresias:
+        membresia['estado'] = calcular_estado_membresia(membresia['fecha_vencimiento'], dias_alerta)
+    return cortar_pagina(membresias, tamano, campo_fecha="fecha_vencimiento")
+
+
+# Membresía actual de cada cliente (tabla membresia_actual, ver migración 4)
+_SELECT_MEMBRESIA_ACTUAL = """
+    SELECT m.*, c.nombre as cliente_nombre, c.telefono as cliente_telefono
+    FROM membresia_actual a
+    JOIN membresias m ON m.id = a.membresia_id
+    JOIN clientes c ON c.id = a.cliente_id
+    WHERE c.activo = 1
+"""
+
+
 def obtener_membresia_activa(cliente_id):
     """Obtiene la membresía activa más reciente de un cliente"""
-    membresias = listar_membresias(cliente_id=cliente_id)
-    
-    for membresia in membresias:
-        if membresia['estado'] == ESTADO_ACTIVA or membresia['estado'] == ESTADO_POR_VENCER:
-            return membresia
-    
-    return None
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    # La membresía actual es la de mayor vencimiento: si ya venció, todas
+    # las anteriores también.
+    cursor.execute(_SELECT_MEMBRESIA_ACTUAL + " AND a.cliente_id = ? AND a.fecha_vencimiento >= ?",
+                   (cliente_id, date.today().isoformat()))
+
+    row = cursor.fetchone()
+    conn.close()
+
+    if row is None:
+        return None
+    membresia = dict(row)
+    membresia['estado'] = calcular_estado_membresia(membresia['fecha_vencimiento'])
+    return membresia
 
 
 def renovar_membresia(cliente_id, monto=0.0):
@@ -152,30 +231,64 @@ def renovar_membresia(cliente_id, monto=0.0):
     return crear_membresia(cliente_id, tipo="Mensual", monto=monto, fecha_inicio=date.today())
 
 
+def listar_por_vencimiento(estado=None, desde=None, hasta=None, limite=None):
+    """Membresía actual (la última, ver tabla membresia_actual) de cada
+    cliente activo cuyo vencimiento cae en la ventana [desde, hasta] (o en
+    la del `estado` dado), ordenadas por vencimiento ascendente. Recorre
+    idx_membresia_actual_vencimiento solo dentro de la ventana."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    dias_alerta = obtener_dias_alerta_vencimiento()
+    where, params = condicion_estado_vencimiento("a.fecha_vencimiento", estado, dias_alerta)
+    if desde:
+        where += " AND a.fecha_vencimiento >= ?"
+        params.append(_fecha_iso(desde))
+    if hasta:
+        where += " AND a.fecha_vencimiento <= ?"
+        params.append(_fecha_iso(hasta))
+    query = _SELECT_MEMBRESIA_ACTUAL + where + " ORDER BY a.fecha_vencimiento ASC, a.membresia_id ASC"
+    if limite is not None:
+        query += " LIMIT ?"
+        params.append(limite)
+
+    cursor.execute(query, params)
+    membresias = [dict(row) for row in cursor.fetchall()]
+    conn.close()
+
+    for membresia in membresias:
+        membresia['estado'] = calcular_estado_membresia(membresia['fecha_vencimiento'], dias_alerta)
+    return membresias
+
+
 def contar_membresias_por_estado():
-    """Cuenta membresías agrupadas por estado"""
-    membresias = listar_membresias()
-    
-    conteo = {
-        ESTADO_ACTIVA: 0,
-        ESTADO_POR_VENCER: 0,
-        ESTADO_VENCIDA: 0
+    """Cuenta clientes activos según el estado de su membresía actual"""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    hoy = date.today()
+    limite_alerta = (hoy + timedelta(days=obtener_dias_alerta_vencimiento())).isoformat()
+    cursor.execute("""
+        SELECT COALESCE(SUM(a.fecha_vencimiento > ?), 0),
+               COALESCE(SUM(a.fecha_vencimiento >= ? AND a.fecha_vencimiento <= ?), 0),
+               COALESCE(SUM(a.fecha_vencimiento < ?), 0)
+        FROM membresia_actual a
+        JOIN clientes c ON c.id = a.cliente_id
+        WHERE c.activo = 1
+    """, (limite_alerta, hoy.isoformat(), limite_alerta, hoy.isoformat()))
+    activas, por_vencer, vencidas = cursor.fetchone()
+    conn.close()
+
+    return {
+        ESTADO_ACTIVA: activas,
+        ESTADO_POR_VENCER: por_vencer,
+        ESTADO_VENCIDA: vencidas
     }
-    
-    for membresia in membresias:
-        conteo[membresia['estado']] += 1
-    
-    return conteo
 
 
 def obtener_proximas_a_vencer(limite=10):
     """Obtiene las membresías que están por vencer ordenadas por fecha"""
-    membresias = listar_membresias(estado=ESTADO_POR_VENCER)
-    
-    # Ordenar por fecha de vencimiento ascendente
-    membresias.sort(key=lambda x: x['fecha_vencimiento'])
-    
-    return membresias[:limite]
+    return listar_por_vencimiento(estado=ESTADO_POR_VENCER, limite=limite)
 
 
 def actualizar_membresia(membresia_id, cliente_id, tipo, fecha_inicio, monto):
@@ -192,6 +305,10 @@ def actualizar_membresia(membresia_id, cliente_id, tipo, fecha_inicio, monto):
     else:
         fecha_vencimiento = fecha_inicio + timedelta(days=30)
     
+    cursor.execute("SELECT cliente_id FROM membresias WHERE id = ?", (membresia_id,))
+    row = cursor.fetchone()
+    cliente_anterior = row['cliente_id'] if row else None
+    
     cursor.execute("""
         UPDATE membresias
         SET cliente_id = ?, tipo = ?, fecha_inicio = ?, fecha_vencimiento = ?, monto = ?
@@ -200,6 +317,10 @@ def actualizar_membresia(membresia_id, cliente_id, tipo, fecha_inicio, monto):
     
     conn.commit()
     conn.close()
+    from services import analitica_service, kiosco_service
+    analitica_service.invalidar("membresias")
+    kiosco_service.refrescar_clientes([cliente_anterior, cliente_id])
+    actualizar_riesgo_clientes([cliente_anterior, cliente_id])
 
 
 def eliminar_membresia(membresia_id):
@@ -208,9 +329,10 @@ def eliminar_membresia(membresia_id):
     cursor = conn.cursor()
     
     # Obtener pago_id antes de eliminar
-    cursor.execute("SELECT pago_id FROM membresias WHERE id = ?", (membresia_id,))
+    cursor.execute("SELECT pago_id, cliente_id FROM membresias WHERE id = ?", (membresia_id,))
     row = cursor.fetchone()
     pago_id = row['pago_id'] if row else None
+    cliente_id = row['cliente_id'] if row else None
     
     cursor.execute("DELETE FROM membresias WHERE id = ?", (membresia_id,))
     
@@ -219,4 +341,10 @@ def eliminar_membresia(membresia_id):
     
     conn.commit()
     conn.close()
+    if pago_id:
+        from services.finanzas_service import invalidar_comparacion_meses
+        invalidar_comparacion_meses()
+    from services import kiosco_service
+    kiosco_service.refrescar_clientes([cliente_id])
+    actualizar_riesgo_clientes([cliente_id])
 
@@ -0,0 +1,199 @@
+"""Ocupación del gimnasio por fecha y hora
+
+Cada visita de asistencias ocupa el intervalo [hora_entrada, hora_salida).
+Por fecha y hora se guarda en ocupacion_horas:
+
+- entradas: visitas que empezaron en esa hora
+- presentes: visitas que estuvieron en algún momento de esa hora
+- pico: máximo de personas a la vez dentro de esa hora
+
+El pico sale de un barrido (sweep-line) sobre los eventos de entrada (+1) y
+salida (-1) de cada día ordenados por minuto, con las salidas antes que las
+entradas del mismo minuto. Todo se calcula con NumPy sobre los eventos de
+todas las fechas a la vez.
+
+Registrar o borrar una asistencia recalcula solo su fecha. Sin un cálculo
+previo no hace nada: el primer obtener_mapa_calor reconstruye todo.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from db import get_connection
+from services import config_service
+
+HORAS = 24
+MINUTOS_DIA = HORAS * 60
+
+DIAS_SEMANA = ["Lun", "Mar", "Mié", "Jue", "Vie", "Sáb", "Dom"]
+
+# Ordinal de la fecha y minutos desde medianoche; CAST toma el número del
+# principio del texto, así que acepta "7:05", "07:05" y "07:05:00".
+_VISITAS = """
+    SELECT CAST(julianday(fecha) - 1721424.5 AS INTEGER) AS dia,
+           CAST(hora_entrada AS INTEGER) * 60
+               + CAST(substr(hora_entrada, instr(hora_entrada, ':') + 1) AS INTEGER) AS entrada,
+           CASE WHEN instr(COALESCE(hora_salida, ''), ':') > 0 THEN
+               CAST(hora_salida AS INTEGER) * 60
+                   + CAST(substr(hora_salida, instr(hora_salida, ':') + 1) AS INTEGER)
+               ELSE -1
+           END AS salida
+    FROM asistencias
+    WHERE instr(COALESCE(hora_entrada, ''), ':') > 0 AND julianday(fecha) IS NOT NULL {filtro}
+"""
+
+_INSERTAR = """
+    INSERT INTO ocupacion_horas (fecha, hora, entradas, presentes, pico)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def _cubo(dias, entradas, salidas, duracion_sin_salida):
+    """Filas (fecha ISO, hora, entradas, presentes, pico) de las horas con
+    alguien presente. Las visitas sin hora de salida traen -1 y duran
+    `duracion_sin_salida` minutos (igual que una salida anterior a la
+    entrada)."""
+    if not len(dias):
+        return []
+    entradas = np.clip(entradas, 0, MINUTOS_DIA - 1)
+    salidas = np.where(salidas > entradas, salidas, entradas + duracion_sin_salida)
+    salidas = np.minimum(salidas, MINUTOS_DIA)
+
+    fechas, dia = np.unique(dias, return_inverse=True)
+    celdas = len(fechas) * HORAS
+    base = dia * HORAS
+
+    hora_entrada = entradas // 60
+    hora_ultima = (salidas - 1) // 60
+    n_entradas = np.bincount(base + hora_entrada, minlength=celdas)
+    presentes = np.cumsum(
+        (np.bincount(base + hora_entrada, minlength=celdas + 1)
+         - np.bincount(base + hora_ultima + 1, minlength=celdas + 1))[:celdas])
+
+    # Barrido: en el mismo minuto las salidas (-1) van antes que las entradas
+    minuto = np.concatenate([entradas, salidas])
+    delta = np.concatenate([np.ones(len(entradas), np.int64), -np.ones(len(salidas), np.int64)])
+    evento_dia = np.concatenate([dia, dia])
+    orden = np.lexsort((delta, minuto, evento_dia))
+    a_la_vez = np.cumsum(delta[orden])
+    subidas = delta[orden] > 0
+    celda = (evento_dia[orden] * HORAS + minuto[orden] // 60)[subidas]
+    a_la_vez = a_la_vez[subidas]
+
+    # Quienes ya estaban al empezar la hora también cuentan para el pico
+    pico = presentes - n_entradas
+    if len(celda):
+        inicios = np.flatnonzero(np.r_[True, celda[1:] != celda[:-1]])
+        pico[celda[inicios]] = np.maximum(pico[celda[inicios]],
+                                          np.maximum.reduceat(a_la_vez, inicios))
+
+    ocupadas = np.flatnonzero(presentes)
+    fechas_iso = [date.fromordinal(int(o)).isoformat() for o in fechas]
+    return [(fechas_iso[i // HORAS], i % HORAS, int(n_entradas[i]), int(presentes[i]), int(pico[i]))
+            for i in ocupadas.tolist()]
+
+
+def _calcular(cursor, fecha=None):
+    filtro, params = "", ()
+    if fecha is not None:
+        filtro, params = "AND fecha = ?", (fecha,)
+    filas = cursor.execute(_VISITAS.format(filtro=filtro), params).fetchall()
+    if not filas:
+        return []
+    dias, entradas, salidas = zip(*filas)
+    # La misma duración con la que presencia_service cierra las visitas abiertas
+    return _cubo(np.array(dias, np.int64), np.array(entradas, np.int64), np.array(salidas, np.int64),
+                 config_service.obtener_minutos_max_visita())
+
+
+def reconstruir_ocupacion():
+    """Recalcula la ocupación de todas las fechas. Devuelve cuántas horas
+    con visitas quedaron guardadas."""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        filas = _calcular(cursor)
+        cursor.execute("DELETE FROM ocupacion_horas")
+        cursor.executemany(_INSERTAR, filas)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(filas)
+
+
+def actualizar_ocupacion_dia(fecha):
+    """Recalcula solo `fecha` (date o ISO) tras registrar o borrar una
+    asistencia. Sin un cálculo previo no hace nada."""
+    if isinstance(fecha, date):
+        fecha = fecha.isoformat()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM ocupacion_horas LIMIT 1")
+        if cursor.fetchone() is None:
+            return
+        filas = _calcular(cursor, fecha)
+        cursor.execute("DELETE FROM ocupacion_horas WHERE fecha = ?", (fecha,))
+        cursor.executemany(_INSERTAR, filas)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _asegurar_calculo():
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM ocupacion_horas LIMIT 1")
+    vacia = cursor.fetchone() is None
+    conn.close()
+    if vacia:
+        reconstruir_ocupacion()
+
+
+def obtener_ocupacion_dia(fecha):
+    """Lista de 24 dicts {hora, entradas, presentes, pico} de `fecha`."""
+    if isinstance(fecha, date):
+        fecha = fecha.isoformat()
+    _asegurar_calculo()
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT hora, entradas, presentes, pico FROM ocupacion_horas WHERE fecha = ?
+    """, (fecha,))
+    por_hora = {r["hora"]: dict(r) for r in cursor.fetchall()}
+    conn.close()
+    return [por_hora.get(h, {"hora": h, "entradas": 0, "presentes": 0, "pico": 0})
+            for h in range(HORAS)]
+
+
+def obtener_mapa_calor(semanas=12, hasta=None, medida="presentes"):
+    """Promedio por día de la semana y hora de `medida` ('entradas',
+    'presentes' o 'pico') en las últimas `semanas` hasta `hasta` (hoy por
+    defecto). Devuelve {"valores": matriz 7x24 (lunes primero), "maximo"}.
+    Los días sin visitas cuentan como cero en el promedio."""
+    if medida not in ("entradas", "presentes", "pico"):
+        raise ValueError(f"Medida desconocida: {medida}")
+    hasta = hasta or date.today()
+    if isinstance(hasta, str):
+        hasta = date.fromisoformat(hasta)
+    desde = hasta - timedelta(days=7 * semanas - 1)
+    _asegurar_calculo()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        SELECT (CAST(strftime('%w', fecha) AS INTEGER) + 6) % 7 AS dia_semana,
+               hora, SUM({medida}) AS total
+        FROM ocupacion_horas
+        WHERE fecha >= ? AND fecha <= ?
+        GROUP BY dia_semana, hora
+    """, (desde.isoformat(), hasta.isoformat()))
+    totales = cursor.fetchall()
+    conn.close()
+
+    # Cada día de la semana aparece `semanas` veces en el rango
+    valores = [[0.0] * HORAS for _ in DIAS_SEMANA]
+    for r in totales:
+        valores[r["dia_semana"]][r["hora"]] = round(r["total"] / semanas, 1)
+    maximo = max((v for fila in valores for v in fila), default=0.0)
+    return {"valores": valores, "maximo": maximo}
@@ -0,0 +1,26 @@
+"""Paginación por cursor (keyset) para listados ordenados por (fecha DESC, id DESC)
+
+En lugar de OFFSET, cada página continúa a partir de la última fila de la
+anterior: el cursor es la tupla (fecha, id) de esa fila. La consulta usa el
+índice sobre la fecha (que lleva el rowid implícito) sin importar qué tan
+profunda sea la página.
+"""
+
+TAMANO_PAGINA = 50
+
+
+def condicion_cursor(cursor, columna_fecha, columna_id):
+    """Devuelve (sql, params) para continuar después de `cursor`; vacío si es None."""
+    if cursor is None:
+        return "", []
+    fecha, ultimo_id = cursor
+    return f" AND ({columna_fecha}, {columna_id}) < (?, ?)", [fecha, ultimo_id]
+
+
+def cortar_pagina(filas, tamano, campo_fecha="fecha"):
+    """Recibe hasta `tamano` + 1 filas y devuelve (página, siguiente_cursor).
+    El cursor es None cuando no hay más filas."""
+    if len(filas) <= tamano:
+        return filas, None
+    filas = filas[:tamano]
+    return filas, (filas[-1][campo_fecha], filas[-1]["id"])
@@ -1,6 +1,8 @@
 """Servicio CRUD para pagos"""
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from db import get_connection
+from services.paginacion import TAMANO_PAGINA, condicion_cursor, cortar_pagina
+from services.finanzas_service import invalidar_comparacion_meses
 from services.inventario_service import vender_producto
 
 
@@ -63,6 +65,7 @@ def crear_pago(cliente_id, monto, metodo, fecha_pago=None, concepto="", producto
     pago_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    invalidar_comparacion_meses(fecha_pago)
     _auto_asistencia(cliente_id, fecha_pago)
     return True, pago_id
 
@@ -108,6 +111,7 @@ def crear_pago_multiple(cliente_id, monto, metodo, items, concepto="", fecha_pag
     pago_id = cursor.lastrowid
     conn.commit()
     conn.close()
+    invalidar_comparacion_meses(fecha_pago)
     _auto_asistencia(cliente_id, fecha_pago)
     return True, pago_id
 
@@ -129,33 +133,71 @@ def obtener_pago(pago_id):
     return dict(pago) if pago else None
 
 
-def listar_pagos(cliente_id=None, fecha_desde=None, fecha_hasta=None, limite=100):
-    """Lista pagos con filtros opcionales"""
-    conn = get_connection()
-    cursor = conn.cursor()
-    
-    query = """
-        SELECT p.*, c.nombre as cliente_nombre, c.telefono as cliente_telefono
-        FROM pagos p
-        JOIN clientes c ON p.cliente_id = c.id
-        WHERE 1=1
+def _fecha_iso(fecha):
+    return fecha if isinstance(fecha, str) else fecha.isoformat()
+
+
+def _filtros_pagos(cliente_id=None, fecha_desde=None, fecha_hasta=None, cliente=None,
+                   monto_min=None, monto_max=None, metodo=None, concepto=None,
+                   excluir_concepto=None):
+    """Condiciones WHERE (y sus parámetros) comunes a los listados de pagos.
+
+    `cliente` busca por nombre, `concepto` por coincidencia parcial y
+    `excluir_concepto` descarta un concepto exacto (p. ej. pagos de membresía).
     """
+    query = ""
     params = []
-    
+
     if cliente_id:
         query += " AND p.cliente_id = ?"
         params.append(cliente_id)
-    
     if fecha_desde:
         query += " AND p.fecha >= ?"
-        params.append(fecha_desde if isinstance(fecha_desde, str) else fecha_desde.isoformat())
-    
+        params.append(_fecha_iso(fecha_desde))
     if fecha_hasta:
         query += " AND p.fecha <= ?"
-        params.append(fecha_hasta if isinstance(fecha_hasta, str) else fecha_hasta.isoformat())
+        params.append(_fecha_iso(fecha_hasta))
+    if cliente:
+        query += " AND LOWER(c.nombre) LIKE ?"
+        params.append(f"%{cliente.lower()}%")
+    if monto_min is not None:
+        query += " AND p.monto >= ?"
+        params.append(float(monto_min))
+    if monto_max is not None:
+        query += " AND p.monto <= ?"
+        params.append(float(monto_max))
+    if metodo:
+        query += " AND p.metodo = ?"
+        params.append(metodo)
+    if concepto:
+        query += " AND LOWER(p.concepto) LIKE ?"
+        params.append(f"%{concepto.lower()}%")
+    if excluir_concepto:
+        query += " AND COALESCE(p.concepto, '') != ?"
+        params.append(excluir_concepto)
+
+    return query, params
+
+
+_SELECT_PAGOS = """
+    SELECT p.*, c.nombre as cliente_nombre, c.telefono as cliente_telefono
+    FROM pagos p
+    JOIN clientes c ON p.cliente_id = c.id
+    WHERE 1=1
+"""
+
+
+def listar_pagos(cliente_id=None, fecha_desde=None, fecha_hasta=None, limite=100, **filtros):
+    """Lista pagos con filtros opcionales (ver _filtros_pagos). limite=None
+    devuelve todos; para recorrer el historial completo usar listar_pagos_pagina."""
+    conn = get_connection()
+    cursor = conn.cursor()
     
-    query += " ORDER BY p.fecha DESC, p.id DESC LIMIT ?"
-    params.append(limite)
+    where, params = _filtros_pagos(cliente_id, fecha_desde, fecha_hasta, **filtros)
+    query = _SELECT_PAGOS + where + " ORDER BY p.fecha DESC, p.id DESC"
+    if limite is not None:
+        query += " LIMIT ?"
+        params.append(limite)
     
     cursor.execute(query, params)
     pagos = [dict(row) for row in cursor.fetchall()]
@@ -163,32 +205,67 @@ def listar_pagos(cliente_id=None, fecha_desde=None, fecha_hasta=None, limite=100
     return pagos
 
 
-def obtener_pagos_del_mes(año=None, mes=None):
-    """Obtiene todos los pagos del mes actual o del mes especificado"""
+def listar_pagos_pagina(cursor=None, tamano=TAMANO_PAGINA, **filtros):
+    """Devuelve (pagos, siguiente_cursor) de la página que sigue a `cursor`.
+
+    El cursor es (fecha, id) del último pago de la página anterior; None
+    pide la primera. Acepta los mismos filtros que listar_pagos.
+    """
+    conn = get_connection()
+    cur = conn.cursor()
+
+    where, params = _filtros_pagos(**filtros)
+    where_cursor, params_cursor = condicion_cursor(cursor, "p.fecha", "p.id")
+    query = _SELECT_PAGOS + where + where_cursor + " ORDER BY p.fecha DESC, p.id DESC LIMIT ?"
+
+    cur.execute(query, params + params_cursor + [tamano + 1])
+    pagos = [dict(row) for row in cur.fetchall()]
+    conn.close()
+    return cortar_pagina(pagos, tamano)
+
+
+def sumar_pagos(**filtros):
+    """Suma de montos de los pagos que cumplen los filtros de listar_pagos."""
+    conn = get_connection()
+    cursor = conn.cursor()
+
+    where, params = _filtros_pagos(**filtros)
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(p.monto), 0) AS total
+        FROM pagos p
+        JOIN clientes c ON p.cliente_id = c.id
+        WHERE 1=1 {where}
+    """, params)
+    total = cursor.fetchone()["total"]
+    conn.close()
+    return total
+
+
+def rango_mes(año=None, mes=None):
+    """Primer y último día del mes indicado (o del actual)."""
     if año is None or mes is None:
         hoy = date.today()
         año = hoy.year
         mes = hoy.month
     
-    # Primer día del mes
     fecha_desde = date(año, mes, 1)
-    
-    # Último día del mes
     if mes == 12:
         fecha_hasta = date(año, 12, 31)
     else:
-        fecha_hasta = date(año, mes + 1, 1)
-        fecha_hasta = fecha_hasta.replace(day=1)
-        from datetime import timedelta
-        fecha_hasta = fecha_hasta - timedelta(days=1)
-    
-    return listar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, limite=1000)
+        fecha_hasta = date(año, mes + 1, 1) - timedelta(days=1)
+    return fecha_desde, fecha_hasta
+
+
+def obtener_pagos_del_mes(año=None, mes=None):
+    """Obtiene todos los pagos del mes actual o del mes especificado"""
+    fecha_desde, fecha_hasta = rango_mes(año, mes)
+    return listar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, limite=None)
 
 
 def calcular_total_mes(año=None, mes=None):
     """Calcula el total de pagos del mes"""
-    pagos = obtener_pagos_del_mes(año, mes)
-    return sum(pago['monto'] for pago in pagos)
+    fecha_desde, fecha_hasta = rango_mes(año, mes)
+    return sumar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
 
 
 def obtener_ultimos_pagos(limite=5):
@@ -198,7 +275,7 @@ def obtener_ultimos_pagos(limite=5):
 
 def obtener_historial_pagos_cliente(cliente_id):
     """Obtiene todo el historial de pagos de un cliente"""
-    return listar_pagos(cliente_id=cliente_id, limite=1000)
+    return listar_pagos(cliente_id=cliente_id, limite=None)
 
 
 def actualizar_pago(pago_id, cliente_id, monto, metodo, fecha_pago, concepto=""):
@@ -217,6 +294,10 @@ def actualizar_pago(pago_id, cliente_id, monto, metodo, fecha_pago, concepto="")
     
     conn.commit()
     conn.close()
+    # La fecha anterior puede ser de otro año
+    invalidar_comparacion_meses()
+    from services import analitica_service
+    analitica_service.invalidar("pagos")
 
 
 def eliminar_pago(pago_id):
@@ -225,7 +306,7 @@ def eliminar_pago(pago_id):
     cursor = conn.cursor()
 
     # Buscar si hay una membresía que referencia este pago
-    cursor.execute("SELECT id FROM membresias WHERE pago_id = ?", (pago_id,))
+    cursor.execute("SELECT id, cliente_id FROM membresias WHERE pago_id = ?", (pago_id,))
     row = cursor.fetchone()
     membresia_id = row['id'] if row else None
 
@@ -236,6 +317,12 @@ def eliminar_pago(pago_id):
 
     conn.commit()
     conn.close()
+    invalidar_comparacion_meses()
+    if membresia_id:
+        from services import kiosco_service
+        from services.riesgo_service import actualizar_riesgo_clientes
+        kiosco_service.refrescar_clientes([row['cliente_id']])
+        actualizar_riesgo_clientes([row['cliente_id']])
 
     # Eliminar factura PDF de la membresía si existía
     if membresia_id:
@@ -3,9 +3,9 @@ from datetime import date, timedelta
 from calendar import monthrange
 from db import get_connection
 from services import asistencia_service
+from services.riesgo_service import evaluar_senales
 from services.membresia_service import (listar_membresias, obtener_membresia_activa,
                                         calcular_estado_membresia)
-from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA
 
 
 # ─────────────────────────── RESUMEN PRINCIPAL ───────────────────
@@ -222,54 +222,36 @@ def obtener_pagos_cliente(cliente_id, limite=200):
 
 def obtener_alertas_cliente(cliente_id):
     """Devuelve lista de alertas activas para el cliente.
-    Cada alerta es dict con: tipo ('danger'|'warning'|'info'), mensaje.
+    Cada alerta es dict con: tipo ('danger'|'warning'|'info'), icono, mensaje.
+    Las reglas son las de riesgo_service.evaluar_senales.
     """
-    hoy = date.today()
     resumen = obtener_resumen_cliente(cliente_id)
-    alertas = []
-
-    # Membresía vencida
-    if resumen["estado_membresia"] == ESTADO_VENCIDA:
-        venc = resumen["proximo_vencimiento"]
-        dias = abs(resumen["dias_para_vencer"] or 0)
-        alertas.append({
-            "tipo": "danger",
-            "icono": "🔴",
-            "mensaje": f"Membresía vencida hace {dias} día(s) (venció {venc})"
-        })
-    elif resumen["estado_membresia"] == ESTADO_POR_VENCER:
-        dias = resumen["dias_para_vencer"]
-        alertas.append({
-            "tipo": "warning",
-            "icono": "🟡",
-            "mensaje": f"Membresía vence en {dias} día(s) ({resumen['proximo_vencimiento']})"
-        })
-    elif resumen["estado_membresia"] == "Sin membresía":
-        alertas.append({
-            "tipo": "warning",
-            "icono": "⚪",
-            "mensaje": "Cliente sin membresía registrada"
-        })
+    _, senales, dias_sin, dias_vencer = evaluar_senales(
+        resumen["proximo_vencimiento"], resumen["ultima_asistencia"],
+        resumen["asist_este_mes"], resumen["asist_mes_pasado"])
 
-    # Días sin asistir
-    dias_sin = resumen["dias_sin_asistir"]
-    if dias_sin is None:
-        alertas.append({"tipo": "info", "icono": "📅", "mensaje": "No tiene asistencias registradas"})
-    elif dias_sin >= 30:
-        alertas.append({"tipo": "danger", "icono": "🔴",
-                        "mensaje": f"Sin asistir hace {dias_sin} días — riesgo de abandono"})
-    elif dias_sin >= 14:
-        alertas.append({"tipo": "warning", "icono": "🟡",
-                        "mensaje": f"Sin asistir hace {dias_sin} días"})
-
-    # Frecuencia bajó
-    este_mes = resumen["asist_este_mes"]
-    mes_pasado = resumen["asist_mes_pasado"]
-    dia_del_mes = hoy.day
-    if mes_pasado > 0 and dia_del_mes >= 15:
-        # Comparación solo es justa a partir de la segunda quincena
-        if este_mes < mes_pasado * 0.6:
-            alertas.append({"tipo": "warning", "icono": "📉",
-                             "mensaje": f"Frecuencia bajó: {este_mes} visitas este mes vs {mes_pasado} el mes pasado"})
+    alertas = []
+    for senal in senales:
+        clave, tipo = senal["clave"], senal["tipo"]
+        if clave == "vencida":
+            icono = "🔴"
+            mensaje = f"Membresía vencida hace {-dias_vencer} día(s) (venció {resumen['proximo_vencimiento']})"
+        elif clave == "por_vencer":
+            icono = "🟡"
+            mensaje = f"Membresía vence en {dias_vencer} día(s) ({resumen['proximo_vencimiento']})"
+        elif clave == "sin_membresia":
+            icono, mensaje = "⚪", "Cliente sin membresía registrada"
+        elif clave == "sin_asistencias":
+            icono, mensaje = "📅", "No tiene asistencias registradas"
+        elif clave == "sin_asistir":
+            if tipo == "danger":
+                icono, mensaje = "🔴", f"Sin asistir hace {dias_sin} días — riesgo de abandono"
+            else:
+                icono, mensaje = "🟡", f"Sin asistir hace {dias_sin} días"
+        else:
+            icono = "📉"
+            mensaje = (f"Frecuencia bajó: {resumen['asist_este_mes']} visitas este mes vs "
+                       f"{resumen['asist_mes_pasado']} el mes pasado")
+        alertas.append({"tipo": tipo, "icono": icono, "mensaje": mensaje})
 
     return alertas
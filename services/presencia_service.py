@@ -0,0 +1,245 @@
+"""Presencia en vivo: quién está dentro del gimnasio ahora
+
+El conjunto de clientes dentro (cliente_id -> minuto de entrada) vive en
+memoria. Se carga una vez por día desde las asistencias de hoy sin
+hora_salida y después solo cambia con los avisos de asistencia_service
+(entrada, salida o borrado), cada uno O(1).
+
+Las visitas que superan `minutos_max_visita` (config.json) se cierran en
+lote con cerrar_visitas_vencidas: un montículo ordenado por minuto de
+entrada entrega solo las vencidas, sin recorrer a todos los presentes, y
+todas se escriben con un único executemany encolado en escritura_service,
+así el barrido no espera al escritor. La hora de salida que se guarda
+es la de entrada más la duración máxima.
+
+Quien necesite el número de presentes (el dashboard) se suscribe con
+suscribir(callback) y recibe cada cambio, sin consultar la base.
+"""
+import heapq
+import threading
+from datetime import date, datetime
+
+import db
+from db import get_connection
+from services import config_service
+from services.ocupacion_service import actualizar_ocupacion_dia
+
+
+class _Estado:
+    """Presentes de una fecha en una base."""
+
+    def __init__(self, path, fecha):
+        self.path = path
+        self.fecha = fecha
+        # cliente_id -> minuto de entrada (desde medianoche)
+        self.dentro = {}
+        # (minuto de entrada, cliente_id); las entradas que ya no coinciden
+        # con `dentro` se descartan al salir del montículo
+        self.monticulo = []
+
+
+_estado = None
+_lock = threading.Lock()
+_suscriptores = []
+
+
+def _minutos(hora):
+    """Minutos desde medianoche de "H:MM" / "HH:MM[:SS]"; None si no se entiende."""
+    try:
+        h, m = str(hora).split(":")[:2]
+        minutos = int(h) * 60 + int(m)
+    except (ValueError, TypeError):
+        return None
+    return minutos if 0 <= minutos < 24 * 60 else None
+
+
+def _hora(minutos):
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _minuto_actual(ahora=None):
+    ahora = ahora or datetime.now()
+    return ahora.hour * 60 + ahora.minute
+
+
+def _cargar(path, fecha):
+    estado = _Estado(path, fecha)
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT cliente_id, hora_entrada FROM asistencias
+        WHERE fecha = ? AND hora_salida IS NULL
+    """, (fecha,))
+    filas = cursor.fetchall()
+    conn.close()
+    actual = _minuto_actual()
+    for fila in filas:
+        entrada = _minutos(fila["hora_entrada"])
+        estado.dentro[fila["cliente_id"]] = actual if entrada is None else entrada
+    estado.monticulo = [(m, c) for c, m in estado.dentro.items()]
+    heapq.heapify(estado.monticulo)
+    return estado
+
+
+def _actual():
+    """Estado de hoy en la base actual; se recarga al cambiar de día o de
+    base. Debe llamarse con _lock tomado. Devuelve (estado, recargado)."""
+    global _estado
+    hoy = date.today().isoformat()
+    path = str(db.DB_PATH)
+    if _estado is None or _estado.fecha != hoy or _estado.path != path:
+        _estado = _cargar(path, hoy)
+        return _estado, True
+    return _estado, False
+
+
+def _avisar(cantidad):
+    for callback in list(_suscriptores):
+        try:
+            callback(cantidad)
+        except Exception as e:
+            print(f"Error notificando presencia: {e}")
+
+
+def suscribir(callback):
+    """Registra `callback(cantidad)`, llamado cada vez que cambia el número
+    de presentes (desde el hilo que produjo el cambio)."""
+    if callback not in _suscriptores:
+        _suscriptores.append(callback)
+
+
+def desuscribir(callback):
+    if callback in _suscriptores:
+        _suscriptores.remove(callback)
+
+
+def contar_presentes():
+    """Número de clientes dentro ahora."""
+    with _lock:
+        estado, recargado = _actual()
+        cantidad = len(estado.dentro)
+    if recargado:
+        _avisar(cantidad)
+    return cantidad
+
+
+def esta_dentro(cliente_id):
+    with _lock:
+        estado, _ = _actual()
+        return cliente_id in estado.dentro
+
+
+def obtener_presentes():
+    """Lista de {cliente_id, hora_entrada} ordenada por hora de entrada."""
+    with _lock:
+        estado, _ = _actual()
+        presentes = sorted(estado.dentro.items(), key=lambda x: x[1])
+    return [{"cliente_id": c, "hora_entrada": _hora(m)} for c, m in presentes]
+
+
+def _aplicar(cliente_id, fecha, dentro, hora_entrada=None):
+    fecha = fecha.isoformat() if isinstance(fecha, date) else str(fecha)
+    with _lock:
+        estado, recargado = _actual()
+        antes = len(estado.dentro)
+        # Si acaba de cargarse, la carga ya leyó la fila recién guardada
+        if fecha == estado.fecha and not recargado:
+            if not dentro:
+                estado.dentro.pop(cliente_id, None)
+            else:
+                entrada = _minutos(hora_entrada)
+                entrada = _minuto_actual() if entrada is None else entrada
+                if estado.dentro.get(cliente_id) != entrada:
+                    estado.dentro[cliente_id] = entrada
+                    heapq.heappush(estado.monticulo, (entrada, cliente_id))
+        cantidad = len(estado.dentro)
+    if recargado or cantidad != antes:
+        _avisar(cantidad)
+
+
+def notificar_asistencia(cliente_id, fecha, hora_entrada=None, hora_salida=None):
+    """Aviso de asistencia_service tras guardar la asistencia de `cliente_id`
+    en `fecha` (date o ISO) con los valores que quedaron en la fila. Solo
+    cuentan las de hoy: sin salida el cliente está dentro, con salida no.
+    Dentro de una transacción compartida espera a su commit."""
+    db.al_confirmar(lambda: _aplicar(cliente_id, fecha, not hora_salida, hora_entrada))
+
+
+def notificar_eliminacion(cliente_id, fecha):
+    """Aviso de asistencia_service tras borrar una asistencia."""
+    db.al_confirmar(lambda: _aplicar(cliente_id, fecha, False))
+
+
+def _guardar_cierres(fecha, vencidas, minutos_max):
+    """Operación del hilo escritor: guarda las salidas y, tras el commit,
+    saca a los clientes de `dentro`."""
+    conn = get_connection()
+    try:
+        conn.executemany("""
+            UPDATE asistencias SET hora_salida = ?
+            WHERE cliente_id = ? AND fecha = ? AND hora_salida IS NULL
+        """, [(_hora(min(entrada + minutos_max, 24 * 60 - 1)), cliente_id, fecha)
+              for cliente_id, entrada in vencidas])
+        conn.commit()
+    finally:
+        conn.close()
+    actualizar_ocupacion_dia(fecha)
+    db.al_confirmar(lambda: _quitar(fecha, vencidas))
+    return len(vencidas)
+
+
+def _quitar(fecha, vencidas):
+    with _lock:
+        estado, recargado = _actual()
+        antes = len(estado.dentro)
+        # Si acaba de cargarse, la carga ya leyó las salidas guardadas
+        if fecha == estado.fecha and not recargado:
+            for cliente_id, entrada in vencidas:
+                if estado.dentro.get(cliente_id) == entrada:
+                    del estado.dentro[cliente_id]
+        cantidad = len(estado.dentro)
+    if recargado or cantidad != antes:
+        _avisar(cantidad)
+
+
+def _reponer(fecha, vencidas):
+    """Las salidas no se guardaron: siguen dentro y se reintentan en el
+    próximo barrido."""
+    with _lock:
+        estado, _ = _actual()
+        if fecha == estado.fecha:
+            for cliente_id, entrada in vencidas:
+                heapq.heappush(estado.monticulo, (entrada, cliente_id))
+
+
+def cerrar_visitas_vencidas(minutos_max=None, ahora=None):
+    """Cierra en lote las visitas de hoy abiertas hace más de `minutos_max`
+    (por defecto `minutos_max_visita` de config.json) guardando como salida
+    la entrada más esa duración. La escritura se encola en escritura_service:
+    devuelve su Future (con cuántas cerró) o None si no había vencidas."""
+    from services import escritura_service
+
+    if minutos_max is None:
+        minutos_max = config_service.obtener_minutos_max_visita()
+    limite = _minuto_actual(ahora) - minutos_max
+
+    with _lock:
+        estado, recargado = _actual()
+        vencidas = []
+        while estado.monticulo and estado.monticulo[0][0] <= limite:
+            entrada, cliente_id = heapq.heappop(estado.monticulo)
+            if estado.dentro.get(cliente_id) == entrada:
+                vencidas.append((cliente_id, entrada))
+        fecha, cantidad = estado.fecha, len(estado.dentro)
+
+    if recargado:
+        _avisar(cantidad)
+    if not vencidas:
+        return None
+    def al_terminar(futuro):
+        if futuro.exception() is not None:
+            _reponer(fecha, vencidas)
+
+    futuro = escritura_service.encolar(_guardar_cierres, fecha, vencidas, minutos_max)
+    futuro.add_done_callback(al_terminar)
+    return futuro
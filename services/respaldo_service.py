@@ -0,0 +1,340 @@
+"""Respaldos de gimnasio.db con la API de backup de SQLite
+
+Cada respaldo ("generación") se toma en línea con Connection.backup por
+pasos de PAGINAS_POR_PASO páginas, así la aplicación puede seguir
+escribiendo mientras tanto. La copia se verifica con PRAGMA quick_check y
+se guarda comprimida con gzip:
+
+- completo: la base entera (<nombre>.db.gz);
+- incremental: solo las páginas que cambiaron respecto de la generación
+  anterior (<nombre>.delta.gz), detectadas comparando un hash por página.
+
+Cada DELTAS_POR_BASE incrementales se toma un completo. Junto a cada
+generación se guardan su manifiesto (<nombre>.json, con el SHA-256 de la
+base reconstruida) y los hashes de sus páginas (<nombre>.paginas). Se
+conservan las cadenas (completo + sus incrementales) más recientes que
+sumen al menos GENERACIONES respaldos.
+
+Uso:
+    python -m services.respaldo_service crear
+    python -m services.respaldo_service listar
+    python -m services.respaldo_service verificar [NOMBRE]
+    python -m services.respaldo_service restaurar NOMBRE
+"""
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import db
+from utils.constants import APP_DATA_DIR
+
+RESPALDOS_DIR = APP_DATA_DIR / "respaldos"
+# Páginas copiadas por paso de backup; entre pasos la base queda libre
+PAGINAS_POR_PASO = 256
+GENERACIONES = 10
+DELTAS_POR_BASE = 6
+
+_MAGIA_DELTA = b"KGD1"
+_BYTES_HASH = 8
+_BLOQUE_GZIP = 1 << 20
+
+
+# ─────────────────────────── utilidades ───────────────────────────
+
+def _ruta(nombre, extension):
+    return RESPALDOS_DIR / f"{nombre}{extension}"
+
+
+def _escribir_atomico(destino, contenido):
+    temporal = destino.with_name(destino.name + ".tmp")
+    temporal.write_bytes(contenido)
+    os.replace(temporal, destino)
+
+
+def _hashes_paginas(path, tamano_pagina):
+    """Devuelve (hashes concatenados por página, sha256 del archivo, páginas)."""
+    hashes = bytearray()
+    sha = hashlib.sha256()
+    paginas = 0
+    with open(path, "rb") as f:
+        while True:
+            pagina = f.read(tamano_pagina)
+            if not pagina:
+                break
+            sha.update(pagina)
+            hashes += hashlib.blake2b(pagina, digest_size=_BYTES_HASH).digest()
+            paginas += 1
+    return bytes(hashes), sha.hexdigest(), paginas
+
+
+def _copiar_en_linea(destino, progreso=None):
+    """Copia la base activa a `destino` con la API de backup, por pasos."""
+    origen = db.get_connection()
+    copia = sqlite3.connect(str(destino))
+    try:
+        def _progreso(_estado, restantes, total):
+            if progreso is not None and total:
+                progreso(total - restantes, total)
+
+        origen.backup(copia, pages=PAGINAS_POR_PASO, progress=_progreso)
+        resultado = copia.execute("PRAGMA quick_check").fetchone()[0]
+        tamano_pagina = copia.execute("PRAGMA page_size").fetchone()[0]
+    finally:
+        copia.close()
+        origen.close()
+    if resultado != "ok":
+        raise RuntimeError(f"La copia no pasó quick_check: {resultado}")
+    return tamano_pagina
+
+
+# ─────────────────────────── generaciones ─────────────────────────
+
+def listar_respaldos():
+    """Manifiestos de las generaciones, de la más antigua a la más reciente."""
+    if not RESPALDOS_DIR.exists():
+        return []
+    manifiestos = []
+    for path in sorted(RESPALDOS_DIR.glob("gimnasio_*.json")):
+        try:
+            manifiestos.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return manifiestos
+
+
+def _obtener_manifiesto(nombre):
+    return json.loads(_ruta(nombre, ".json").read_text(encoding="utf-8"))
+
+
+def _cadena(nombre):
+    """Manifiestos desde el completo base hasta `nombre`, en orden de aplicación."""
+    cadena = []
+    actual = _obtener_manifiesto(nombre)
+    while True:
+        cadena.append(actual)
+        if actual["tipo"] == "completo":
+            break
+        actual = _obtener_manifiesto(actual["base"])
+    cadena.reverse()
+    return cadena
+
+
+def crear_respaldo(progreso=None):
+    """Toma un respaldo en línea (completo o incremental) y rota los viejos.
+    `progreso(copiadas, total)` recibe el avance de la copia en páginas.
+    Devuelve el manifiesto de la generación creada."""
+    RESPALDOS_DIR.mkdir(parents=True, exist_ok=True)
+    inicio = time.perf_counter()
+    nombre = "gimnasio_" + datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+
+    with tempfile.TemporaryDirectory(dir=RESPALDOS_DIR) as tmp:
+        copia = Path(tmp) / "copia.db"
+        tamano_pagina = _copiar_en_linea(copia, progreso)
+        hashes, sha256, paginas = _hashes_paginas(copia, tamano_pagina)
+
+        anteriores = listar_respaldos()
+        anterior = anteriores[-1] if anteriores else None
+        incremental = (anterior is not None
+                       and anterior["tamano_pagina"] == tamano_pagina
+                       and anterior["deltas_en_cadena"] < DELTAS_POR_BASE
+                       and _ruta(anterior["nombre"], ".paginas").exists())
+
+        if incremental:
+            hashes_previos = _ruta(anterior["nombre"], ".paginas").read_bytes()
+            cambiadas = [n for n in range(paginas)
+                         if hashes[n * _BYTES_HASH:(n + 1) * _BYTES_HASH]
+                         != hashes_previos[n * _BYTES_HASH:(n + 1) * _BYTES_HASH]]
+            datos = _ruta(nombre, ".delta.gz")
+            with open(copia, "rb") as f, gzip.open(datos, "wb", compresslevel=6) as salida:
+                salida.write(_MAGIA_DELTA + struct.pack(">III", tamano_pagina, paginas, len(cambiadas)))
+                for n in cambiadas:
+                    f.seek(n * tamano_pagina)
+                    salida.write(struct.pack(">I", n))
+                    salida.write(f.read(tamano_pagina))
+            paginas_copiadas = len(cambiadas)
+        else:
+            datos = _ruta(nombre, ".db.gz")
+            with open(copia, "rb") as f, gzip.open(datos, "wb", compresslevel=6) as salida:
+                shutil.copyfileobj(f, salida, _BLOQUE_GZIP)
+            paginas_copiadas = paginas
+
+    _escribir_atomico(_ruta(nombre, ".paginas"), hashes)
+    manifiesto = {
+        "nombre": nombre,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "tipo": "incremental" if incremental else "completo",
+        "base": anterior["nombre"] if incremental else None,
+        "deltas_en_cadena": anterior["deltas_en_cadena"] + 1 if incremental else 0,
+        "archivo": datos.name,
+        "tamano_pagina": tamano_pagina,
+        "paginas": paginas,
+        "paginas_copiadas": paginas_copiadas,
+        "bytes_base": paginas * tamano_pagina,
+        "bytes_archivo": datos.stat().st_size,
+        "sha256": sha256,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    # El manifiesto se escribe al final: una generación sin él no existe
+    _escribir_atomico(_ruta(nombre, ".json"),
+                      json.dumps(manifiesto, indent=2, ensure_ascii=False).encode("utf-8"))
+    rotar_respaldos()
+    return manifiesto
+
+
+def rotar_respaldos(conservar=GENERACIONES):
+    """Borra las cadenas más viejas dejando al menos `conservar` generaciones.
+    Una cadena (completo + incrementales) se borra entera o no se borra."""
+    manifiestos = listar_respaldos()
+    cadenas = []
+    for m in manifiestos:
+        if m["tipo"] == "completo" or not cadenas:
+            cadenas.append([])
+        cadenas[-1].append(m)
+
+    retenidas = 0
+    for cadena in reversed(cadenas):
+        if retenidas >= conservar:
+            for m in cadena:
+                for extension in (".json", ".paginas", ".db.gz", ".delta.gz"):
+                    try:
+                        _ruta(m["nombre"], extension).unlink()
+                    except FileNotFoundError:
+                        pass
+        retenidas += len(cadena)
+
+
+# ─────────────────────────── reconstrucción ───────────────────────
+
+def _reconstruir(nombre, destino):
+    """Arma en `destino` la base de la generación `nombre` aplicando su cadena."""
+    cadena = _cadena(nombre)
+    with gzip.open(_ruta(cadena[0]["nombre"], ".db.gz"), "rb") as entrada, open(destino, "wb") as f:
+        shutil.copyfileobj(entrada, f, _BLOQUE_GZIP)
+
+    for m in cadena[1:]:
+        with gzip.open(_ruta(m["nombre"], ".delta.gz"), "rb") as entrada, open(destino, "r+b") as f:
+            if entrada.read(4) != _MAGIA_DELTA:
+                raise ValueError(f"{m['archivo']} no es un respaldo incremental válido")
+            tamano_pagina, paginas, cambiadas = struct.unpack(">III", entrada.read(12))
+            for _ in range(cambiadas):
+                (n,) = struct.unpack(">I", entrada.read(4))
+                f.seek(n * tamano_pagina)
+                f.write(entrada.read(tamano_pagina))
+            f.truncate(paginas * tamano_pagina)
+    return cadena[-1]
+
+
+def _comprobar(path, manifiesto):
+    """Compara el SHA-256 con el del manifiesto y corre quick_check."""
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(_BLOQUE_GZIP), b""):
+            sha.update(bloque)
+    if sha.hexdigest() != manifiesto["sha256"]:
+        raise ValueError(f"{manifiesto['nombre']}: el contenido no coincide con el manifiesto")
+    conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        resultado = conn.execute("PRAGMA quick_check").fetchone()[0]
+    finally:
+        conn.close()
+    if resultado != "ok":
+        raise ValueError(f"{manifiesto['nombre']}: quick_check devolvió {resultado}")
+
+
+def verificar_respaldo(nombre=None):
+    """Reconstruye la generación (la última si no se indica) en un temporal y
+    comprueba hash y quick_check. Devuelve su manifiesto o lanza ValueError."""
+    if nombre is None:
+        manifiestos = listar_respaldos()
+        if not manifiestos:
+            raise ValueError("No hay respaldos")
+        nombre = manifiestos[-1]["nombre"]
+    with tempfile.TemporaryDirectory(dir=RESPALDOS_DIR) as tmp:
+        path = Path(tmp) / "verificacion.db"
+        manifiesto = _reconstruir(nombre, path)
+        _comprobar(path, manifiesto)
+    return manifiesto
+
+
+def restaurar_respaldo(nombre, destino=None):
+    """Reemplaza la base (o `destino`) por la generación `nombre`.
+
+    La generación se reconstruye y verifica antes de tocar nada; la base
+    actual se guarda como <base>.antes_de_restaurar.db y el contenido se
+    escribe con la API de backup, que respeta el WAL y otras conexiones.
+    """
+    destino = Path(destino or db.DB_PATH)
+    with tempfile.TemporaryDirectory(dir=RESPALDOS_DIR) as tmp:
+        path = Path(tmp) / "restaurar.db"
+        manifiesto = _reconstruir(nombre, path)
+        _comprobar(path, manifiesto)
+
+        origen = sqlite3.connect(str(path))
+        try:
+            if destino.exists():
+                actual = sqlite3.connect(str(destino))
+                previa = sqlite3.connect(str(destino.with_name(destino.stem + ".antes_de_restaurar.db")))
+                try:
+                    actual.backup(previa)
+                finally:
+                    previa.close()
+                    actual.close()
+            nueva = sqlite3.connect(str(destino))
+            try:
+                origen.backup(nueva, pages=PAGINAS_POR_PASO)
+            finally:
+                nueva.close()
+        finally:
+            origen.close()
+    if destino.resolve() == Path(db.DB_PATH).resolve():
+        from services import analitica_service, kiosco_service
+        analitica_service.invalidar()
+        kiosco_service.invalidar()
+    return manifiesto
+
+
+# ─────────────────────────── línea de comandos ────────────────────
+
+def _formato_bytes(n):
+    if n < 1024:
+        return f"{n} B"
+    for unidad in ("KB", "MB", "GB"):
+        n /= 1024
+        if n < 1024 or unidad == "GB":
+            return f"{n:.1f} {unidad}"
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    comando = argv[0] if argv else "listar"
+    if comando == "crear":
+        m = crear_respaldo()
+        print(f"{m['nombre']} ({m['tipo']}): {m['paginas_copiadas']}/{m['paginas']} páginas, "
+              f"{_formato_bytes(m['bytes_archivo'])} en {m['segundos']:.2f} s")
+    elif comando == "listar":
+        for m in listar_respaldos():
+            print(f"{m['nombre']}  {m['tipo']:<11} {m['paginas_copiadas']:>8}/{m['paginas']:<8} páginas  "
+                  f"{_formato_bytes(m['bytes_archivo']):>10}")
+    elif comando == "verificar":
+        m = verificar_respaldo(argv[1] if len(argv) > 1 else None)
+        print(f"{m['nombre']}: OK")
+    elif comando == "restaurar" and len(argv) > 1:
+        m = restaurar_respaldo(argv[1])
+        print(f"Base restaurada a {m['nombre']} ({m['fecha']})")
+    else:
+        print(__doc__)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
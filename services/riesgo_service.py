@@ -0,0 +1,194 @@
+"""Riesgo de abandono de todos los clientes activos
+
+Calcula para cada cliente activo las señales de evaluar_senales (membresía
+vencida, por vencer o inexistente, días sin asistir y caída de la
+frecuencia frente al mes pasado), las mismas con las que
+perfil_cliente_service.obtener_alertas_cliente arma sus alertas, con una
+sola consulta agrupada sobre membresia_actual, cliente_stats
+y las asistencias de los dos últimos meses, y guarda el puntaje en la tabla
+riesgo_abandono.
+
+Registrar una asistencia o una membresía recalcula solo a ese cliente. El
+lote completo se rehace una vez por día, porque los días sin asistir y los
+días para vencer cambian con la fecha aunque no haya escrituras.
+"""
+from datetime import date, timedelta
+
+from db import get_connection
+from services import config_service
+
+DIAS_SIN_ASISTIR_PELIGRO = 30
+DIAS_SIN_ASISTIR_AVISO = 14
+# Bajó la frecuencia si este mes lleva menos del 60 % de las visitas del
+# anterior; solo se compara desde la segunda quincena.
+CAIDA_FRECUENCIA = 0.6
+DIA_MINIMO_COMPARACION = 15
+
+# Puntos por severidad de cada alerta ('danger' | 'warning' | 'info')
+PUNTOS = {"danger": 3, "warning": 2, "info": 1}
+
+_SENALES = """
+    SELECT c.id AS cliente_id, a.fecha_vencimiento, s.ultima_asistencia,
+           COALESCE(m.este_mes, 0) AS asist_este_mes,
+           COALESCE(m.mes_pasado, 0) AS asist_mes_pasado
+    FROM clientes c
+    LEFT JOIN membresia_actual a ON a.cliente_id = c.id
+    LEFT JOIN cliente_stats s ON s.cliente_id = c.id
+    LEFT JOIN (
+        SELECT cliente_id,
+               SUM(fecha >= :inicio_mes) AS este_mes,
+               SUM(fecha < :inicio_mes) AS mes_pasado
+        FROM asistencias
+        WHERE fecha >= :inicio_mes_pasado AND fecha <= :hoy {filtro_asistencias}
+        GROUP BY cliente_id
+    ) m ON m.cliente_id = c.id
+    WHERE c.activo = 1 {filtro_clientes}
+"""
+
+
+def evaluar_senales(fecha_vencimiento, ultima_asistencia, asist_este_mes, asist_mes_pasado,
+                    hoy=None, dias_alerta=None):
+    """Reglas de riesgo, compartidas con las alertas del perfil. Devuelve
+    (puntaje, señales, dias_sin_asistir, dias_para_vencer); cada señal es un
+    dict con clave ('vencida', 'por_vencer', 'sin_membresia',
+    'sin_asistencias', 'sin_asistir' o 'frecuencia'), tipo ('danger' |
+    'warning' | 'info') y motivo (texto corto)."""
+    if hoy is None:
+        hoy = date.today()
+    if dias_alerta is None:
+        dias_alerta = config_service.obtener_dias_alerta_vencimiento()
+    senales = []
+
+    def senal(clave, tipo, motivo):
+        senales.append({"clave": clave, "tipo": tipo, "motivo": motivo})
+
+    dias_para_vencer = None
+    if fecha_vencimiento is None:
+        senal("sin_membresia", "warning", "Sin membresía")
+    else:
+        dias_para_vencer = (date.fromisoformat(fecha_vencimiento) - hoy).days
+        if dias_para_vencer < 0:
+            senal("vencida", "danger", f"Vencida hace {-dias_para_vencer} días")
+        elif dias_para_vencer <= dias_alerta:
+            senal("por_vencer", "warning", f"Vence en {dias_para_vencer} días")
+
+    dias_sin_asistir = None
+    if ultima_asistencia is None:
+        senal("sin_asistencias", "info", "Sin asistencias")
+    else:
+        dias_sin_asistir = (hoy - date.fromisoformat(ultima_asistencia)).days
+        if dias_sin_asistir >= DIAS_SIN_ASISTIR_PELIGRO:
+            senal("sin_asistir", "danger", f"{dias_sin_asistir} días sin asistir")
+        elif dias_sin_asistir >= DIAS_SIN_ASISTIR_AVISO:
+            senal("sin_asistir", "warning", f"{dias_sin_asistir} días sin asistir")
+
+    # La comparación solo es justa a partir de la segunda quincena
+    if (asist_mes_pasado > 0 and hoy.day >= DIA_MINIMO_COMPARACION
+            and asist_este_mes < asist_mes_pasado * CAIDA_FRECUENCIA):
+        senal("frecuencia", "warning", f"Frecuencia bajó ({asist_este_mes} vs {asist_mes_pasado})")
+
+    puntaje = sum(PUNTOS[s["tipo"]] for s in senales)
+    return puntaje, senales, dias_sin_asistir, dias_para_vencer
+
+
+def _calcular(cursor, hoy, cliente_ids=None):
+    """Filas listas para insertar en riesgo_abandono (todos los clientes
+    activos, o solo `cliente_ids`)."""
+    inicio_mes = hoy.replace(day=1)
+    parametros = {
+        "hoy": hoy.isoformat(),
+        "inicio_mes": inicio_mes.isoformat(),
+        "inicio_mes_pasado": (inicio_mes - timedelta(days=1)).replace(day=1).isoformat(),
+    }
+    filtro_clientes = filtro_asistencias = ""
+    if cliente_ids is not None:
+        marcas = ", ".join(f":id{i}" for i in range(len(cliente_ids)))
+        filtro_clientes = f"AND c.id IN ({marcas})"
+        filtro_asistencias = f"AND cliente_id IN ({marcas})"
+        parametros.update({f"id{i}": cid for i, cid in enumerate(cliente_ids)})
+
+    cursor.execute(_SENALES.format(filtro_clientes=filtro_clientes,
+                                   filtro_asistencias=filtro_asistencias), parametros)
+    dias_alerta = config_service.obtener_dias_alerta_vencimiento()
+    filas = []
+    for r in cursor.fetchall():
+        puntaje, senales, dias_sin, dias_vencer = evaluar_senales(
+            r["fecha_vencimiento"], r["ultima_asistencia"],
+            r["asist_este_mes"], r["asist_mes_pasado"], hoy, dias_alerta)
+        motivos = " · ".join(s["motivo"] for s in senales)
+        filas.append((r["cliente_id"], puntaje, motivos, dias_sin, dias_vencer,
+                      r["asist_este_mes"], r["asist_mes_pasado"], hoy.isoformat()))
+    return filas
+
+
+_INSERTAR = """
+    INSERT INTO riesgo_abandono (cliente_id, puntaje, motivos, dias_sin_asistir,
+                                 dias_para_vencer, asist_este_mes, asist_mes_pasado, calculado)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def recalcular_riesgo():
+    """Recalcula el riesgo de todos los clientes activos. Devuelve cuántos
+    clientes se evaluaron."""
+    hoy = date.today()
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        filas = _calcular(cursor, hoy)
+        cursor.execute("DELETE FROM riesgo_abandono")
+        cursor.executemany(_INSERTAR, filas)
+        conn.commit()
+    finally:
+        conn.close()
+    return len(filas)
+
+
+def actualizar_riesgo_clientes(cliente_ids):
+    """Recalcula solo a `cliente_ids` (tras una asistencia, una membresía o
+    la baja del cliente). Un cliente inactivo sale del ranking. Sin un lote
+    previo no hace nada: el primer listar_en_riesgo calcula a todos."""
+    cliente_ids = [c for c in dict.fromkeys(cliente_ids) if c is not None]
+    if not cliente_ids:
+        return
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM riesgo_abandono LIMIT 1")
+        if cursor.fetchone() is None:
+            return
+        filas = _calcular(cursor, date.today(), cliente_ids)
+        cursor.executemany("DELETE FROM riesgo_abandono WHERE cliente_id = ?",
+                           [(cid,) for cid in cliente_ids])
+        cursor.executemany(_INSERTAR, filas)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def listar_en_riesgo(limite=10, puntaje_minimo=PUNTOS["danger"]):
+    """Clientes con mayor riesgo de abandono (puntaje DESC, más días sin
+    asistir primero). Si el cálculo guardado es de un día anterior, o nunca
+    se hizo, rehace el lote antes de responder."""
+    hoy = date.today().isoformat()
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("SELECT MIN(calculado) AS desde FROM riesgo_abandono")
+    desde = cursor.fetchone()["desde"]
+    conn.close()
+    if desde is None or desde < hoy:
+        recalcular_riesgo()
+
+    conn = get_connection()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT r.*, c.nombre AS cliente_nombre, c.telefono AS cliente_telefono
+        FROM riesgo_abandono r
+        JOIN clientes c ON c.id = r.cliente_id
+        WHERE r.puntaje >= ? AND c.activo = 1
+        ORDER BY r.puntaje DESC, r.dias_sin_asistir DESC
+        LIMIT ?
+    """, (puntaje_minimo, limite))
+    filas = [dict(r) for r in cursor.fetchall()]
+    conn.close()
+    return filas
@@ -2,7 +2,6 @@
 Script alternativo para sincronizar con OneDrive usando autenticación de código de dispositivo.
 Ideal para cuentas personales de Microsoft.
 """
-import sqlite3
 from pathlib import Path
 from datetime import datetime
 import json
@@ -22,6 +21,7 @@ except ImportError:
     raise ImportError("msal no está instalado. Ejecuta: pip install msal requests")
 
 from utils.constants import DB_PATH
+from db import abrir_lectura
 
 
 # ==================== CONFIGURACIÓN ====================
@@ -135,8 +135,9 @@ class OneDriveSyncPersonal:
         if not DB_PATH.exists():
             raise FileNotFoundError(f"Base de datos no encontrada: {DB_PATH}")
         
-        conn = sqlite3.connect(str(DB_PATH))
-        conn.row_factory = sqlite3.Row
+        # Una sola transacción de lectura: todas las hojas corresponden al
+        # mismo instante aunque recepción siga registrando pagos.
+        conn = abrir_lectura(DB_PATH)
         cursor = conn.cursor()
         
         data = {}
@@ -0,0 +1,159 @@
+"""Búsqueda diferida para los buscadores de las vistas
+
+BuscadorDiferido conecta un QLineEdit con una consulta a los servicios:
+
+- Las teclas se agrupan: la búsqueda corre cuando el texto deja de cambiar
+  durante `intervalo_ms`.
+- La consulta se ejecuta en el QThreadPool. Si llega otra búsqueda mientras
+  tanto, la anterior se aborta (db.set_cancelacion_hilo) y su resultado se
+  descarta.
+- Si el texto nuevo contiene al anterior y el resultado anterior estaba
+  completo (sin más páginas), se filtra en memoria sin ir a la base.
+
+La consulta sigue el contrato de CargadorPaginado: `consultar(cursor)`
+devuelve (filas, siguiente_cursor); los listados sin paginar devuelven
+(filas, None).
+"""
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+import db
+
+INTERVALO_BUSQUEDA_MS = 250
+
+
+class _Senales(QObject):
+    listo = Signal(int, object)
+    fallo = Signal(int, str)
+
+
+class _TareaBusqueda(QRunnable):
+    """Ejecuta consultar(None) en un hilo del pool con cancelación."""
+
+    def __init__(self, generacion, consultar, cancelado, senales):
+        super().__init__()
+        self._generacion = generacion
+        self._consultar = consultar
+        self._cancelado = cancelado
+        self._senales = senales
+
+    def run(self):
+        if self._cancelado.is_set():
+            return
+        db.set_cancelacion_hilo(self._cancelado.is_set)
+        try:
+            resultado = self._consultar(None)
+        except Exception as e:
+            if not self._cancelado.is_set():
+                self._senales.fallo.emit(self._generacion, str(e))
+            return
+        finally:
+            db.set_cancelacion_hilo(None)
+        if not self._cancelado.is_set():
+            self._senales.listo.emit(self._generacion, resultado)
+
+
+class BuscadorDiferido(QObject):
+    """Controlador de búsqueda mientras se escribe.
+
+    `preparar(texto)` se llama en el hilo de la interfaz y devuelve la
+    función consultar(cursor) con los filtros actuales de la vista.
+    `mostrar(filas, siguiente_cursor, consultar)` recibe el resultado (por
+    ejemplo para CargadorPaginado.reiniciar). `campos` son las claves de
+    las filas sobre las que se busca el texto; sin campos no se refina en
+    memoria.
+    """
+
+    def __init__(self, campo, preparar, mostrar, campos=(), intervalo_ms=INTERVALO_BUSQUEDA_MS,
+                 parent=None):
+        super().__init__(parent or campo)
+        self._campo = campo
+        self._preparar = preparar
+        self._mostrar = mostrar
+        self._campos = tuple(campos)
+        self._generacion = 0
+        self._cancelado = None
+        self._consulta_en_curso = None
+        # Último resultado mostrado: (texto, filas) si estaba completo
+        self._anterior = None
+
+        self._senales = _Senales(self)
+        self._senales.listo.connect(self._on_listo)
+        self._senales.fallo.connect(self._on_fallo)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(intervalo_ms)
+        self._timer.timeout.connect(self._buscar)
+        campo.textChanged.connect(self._timer.start)
+
+    def texto(self):
+        return self._campo.text().strip()
+
+    def buscar_ahora(self):
+        """Consulta y muestra en el momento, sin esperar ni usar el pool. Es
+        lo que usan las recargas explícitas (tras guardar, cambiar filtros...)."""
+        self._timer.stop()
+        self._cancelar_en_curso()
+        texto = self.texto()
+        consultar = self._preparar(texto)
+        filas, siguiente = consultar(None)
+        self._presentar(texto, filas, siguiente, consultar)
+
+    def invalidar(self):
+        """Descarta la búsqueda pendiente y el último resultado: la vista pasó
+        a mostrar otra cosa y la próxima búsqueda debe ir a la base."""
+        self._timer.stop()
+        self._cancelar_en_curso()
+        self._anterior = None
+
+    # ── internos ────────────────────────────────────────────────
+    def _cancelar_en_curso(self):
+        self._generacion += 1
+        if self._cancelado is not None:
+            self._cancelado.set()
+            self._cancelado = None
+
+    def _buscar(self):
+        texto = self.texto()
+        refinadas = self._refinar(texto)
+        if refinadas is not None:
+            self._cancelar_en_curso()
+            self._presentar(texto, refinadas, None, self._preparar(texto))
+            return
+
+        self._cancelar_en_curso()
+        consultar = self._preparar(texto)
+        self._consulta_en_curso = (texto, consultar)
+        self._cancelado = threading.Event()
+        QThreadPool.globalInstance().start(
+            _TareaBusqueda(self._generacion, consultar, self._cancelado, self._senales))
+
+    def _refinar(self, texto):
+        """Filtra en memoria el resultado anterior si `texto` lo acota."""
+        if not self._campos or self._anterior is None:
+            return None
+        texto_anterior, filas = self._anterior
+        buscado = texto.lower()
+        if texto_anterior.lower() not in buscado:
+            return None
+        return [fila for fila in filas
+                if any(buscado in str(fila.get(c) or "").lower() for c in self._campos)]
+
+    def _presentar(self, texto, filas, siguiente, consultar):
+        self._anterior = (texto, filas) if siguiente is None else None
+        self._mostrar(filas, siguiente, consultar)
+
+    def _on_listo(self, generacion, resultado):
+        if generacion != self._generacion:
+            return
+        self._cancelado = None
+        texto, consultar = self._consulta_en_curso
+        filas, siguiente = resultado
+        self._presentar(texto, filas, siguiente, consultar)
+
+    def _on_fallo(self, generacion, mensaje):
+        if generacion == self._generacion:
+            self._cancelado = None
+            print(f"Error en la búsqueda: {mensaje}")
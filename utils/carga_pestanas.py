@@ -0,0 +1,47 @@
+"""Carga diferida de las pestañas de un QTabWidget
+
+CargadorPestanas carga solo la pestaña visible. Cada pestaña se registra con
+su función de carga y las fuentes de datos de las que depende ("pagos",
+"egresos", "membresias", "clientes"...). invalidar(fuente) marca como
+desactualizadas las pestañas que dependen de esa fuente: la visible se
+recarga en el momento y el resto la primera vez que se muestre.
+"""
+from PySide6.QtCore import QObject
+
+
+class CargadorPestanas(QObject):
+    """Lleva el estado cargada/desactualizada de cada pestaña de `tabs`."""
+
+    def __init__(self, tabs, parent=None):
+        super().__init__(parent or tabs)
+        self._tabs = tabs
+        # widget de la pestaña -> (cargar, fuentes)
+        self._pestanas = {}
+        self._desactualizadas = set()
+        tabs.currentChanged.connect(self._on_cambio)
+
+    def registrar(self, widget, cargar, fuentes=()):
+        """Registra la pestaña `widget`; empieza desactualizada. Sin
+        `fuentes` solo se recarga con invalidar() sin argumentos."""
+        self._pestanas[widget] = (cargar, frozenset(fuentes))
+        self._desactualizadas.add(widget)
+
+    def invalidar(self, *fuentes):
+        """Marca desactualizadas las pestañas que dependen de alguna de
+        `fuentes` (sin argumentos, todas) y recarga la visible si es una."""
+        for widget, (_cargar, dependencias) in self._pestanas.items():
+            if not fuentes or dependencias.intersection(fuentes):
+                self._desactualizadas.add(widget)
+        self._cargar_si_hace_falta(self._tabs.currentWidget())
+
+    def _on_cambio(self, _index):
+        self._cargar_si_hace_falta(self._tabs.currentWidget())
+
+    def _cargar_si_hace_falta(self, widget):
+        if widget not in self._desactualizadas:
+            return
+        cargar, _fuentes = self._pestanas[widget]
+        # Se marca antes de cargar: si la carga falla no se reintenta en
+        # cada cambio de pestaña, sino en la próxima invalidación.
+        self._desactualizadas.discard(widget)
+        cargar()
@@ -26,3 +26,7 @@ ESTADO_VENCIDA = "Vencida"
 
 # Días para considerar "por vencer"
 DIAS_ALERTA_VENCIMIENTO = 7
+
+# Duración máxima de una visita sin hora de salida (minutos): la presencia
+# en vivo la cierra a esa hora y la ocupación la cuenta hasta ahí
+MINUTOS_MAX_VISITA = 180
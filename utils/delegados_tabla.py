@@ -0,0 +1,177 @@
+"""Delegados que pintan celdas de tabla sin crear widgets por fila
+
+DelegadoTextoColor reemplaza los QLabel con estilo que se usaban para montos
+y estados (el QSS de la tabla pisa setForeground). DelegadoAcciones pinta los
+botones de ícono (ver factura, editar, eliminar...) y resuelve los clics por
+posición, así una tabla de N filas no tiene ningún widget hijo y limpiarla o
+recargarla no depende de destruir widgets.
+"""
+from PySide6.QtCore import Qt, QEvent, QRect, QTimer, Signal
+from PySide6.QtGui import QColor, QPainter
+from PySide6.QtWidgets import (QApplication, QStyle, QStyledItemDelegate,
+                               QStyleOptionViewItem, QTableWidgetItem, QToolTip)
+
+from utils.iconos_ui import svg_pixmap_color
+
+# Rol del item de la columna de acciones con los datos de la fila
+ROL_DATOS = Qt.UserRole
+# Rol con las claves de acción visibles en la fila (sin valor: todas)
+ROL_ACCIONES = Qt.UserRole + 1
+
+
+def item_acciones(datos, claves=None) -> QTableWidgetItem:
+    """Crea el item de la columna de acciones con los datos de la fila y,
+    opcionalmente, la lista de acciones que se muestran."""
+    item = QTableWidgetItem()
+    item.setData(ROL_DATOS, datos)
+    if claves is not None:
+        item.setData(ROL_ACCIONES, list(claves))
+    return item
+
+
+def _pintar_fondo(opt, painter):
+    """Pinta fondo, hover y selección de la celda según el estilo de la tabla."""
+    widget = opt.widget
+    estilo = widget.style() if widget else QApplication.style()
+    estilo.drawControl(QStyle.CE_ItemViewItem, opt, painter, widget)
+
+
+class DelegadoTextoColor(QStyledItemDelegate):
+    """Pinta el texto de la celda con el color del item (setForeground) o,
+    si no tiene, con `color`."""
+
+    def __init__(self, tabla, columna, color="#1a1a1a"):
+        super().__init__(tabla)
+        self._color = QColor(color)
+        tabla.setItemDelegateForColumn(columna, self)
+
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        texto = opt.text
+        opt.text = ""
+        _pintar_fondo(opt, painter)
+
+        brush = index.data(Qt.ForegroundRole)
+        rect = opt.rect.adjusted(12, 0, -8, 0)
+        painter.save()
+        painter.setFont(opt.font)
+        painter.setPen(brush.color() if brush is not None else self._color)
+        painter.drawText(rect, Qt.AlignLeft | Qt.AlignVCenter,
+                         opt.fontMetrics.elidedText(texto, Qt.ElideRight, rect.width()))
+        painter.restore()
+
+
+class DelegadoAcciones(QStyledItemDelegate):
+    """Botones de ícono pintados en una columna.
+
+    `acciones` es una lista de (clave, svg, tooltip). Al hacer clic en un
+    botón se emite accion_activada(clave, datos), con los datos guardados en
+    el item mediante item_acciones().
+    """
+
+    accion_activada = Signal(str, object)
+
+    def __init__(self, tabla, columna, acciones, btn_size=34, icon_size=19, espacio=6):
+        super().__init__(tabla)
+        self._tabla = tabla
+        self._columna = columna
+        self._orden = [clave for clave, _svg, _tooltip in acciones]
+        self._tooltips = {clave: tooltip for clave, _svg, tooltip in acciones}
+        self._svgs = {clave: svg for clave, svg, _tooltip in acciones}
+        self._btn_size = btn_size
+        self._icon_size = icon_size
+        self._espacio = espacio
+        self._hover = None  # (fila, clave) bajo el mouse
+        tabla.setItemDelegateForColumn(columna, self)
+        tabla.viewport().installEventFilter(self)
+
+    # ── geometría ────────────────────────────────────────────────
+    def _claves(self, index):
+        visibles = index.data(ROL_ACCIONES)
+        if visibles is None:
+            return self._orden
+        return [clave for clave in self._orden if clave in visibles]
+
+    def _botones(self, rect, index):
+        """Devuelve [(clave, QRect)] de los botones centrados en la celda."""
+        claves = self._claves(index)
+        ancho = len(claves) * self._btn_size + max(0, len(claves) - 1) * self._espacio
+        x = rect.x() + (rect.width() - ancho) // 2
+        y = rect.y() + (rect.height() - self._btn_size) // 2
+        paso = self._btn_size + self._espacio
+        return [(clave, QRect(x + i * paso, y, self._btn_size, self._btn_size))
+                for i, clave in enumerate(claves)]
+
+    def _clave_en(self, rect, index, pos):
+        for clave, r in self._botones(rect, index):
+            if r.contains(pos):
+                return clave
+        return None
+
+    # ── pintado ──────────────────────────────────────────────────
+    def paint(self, painter, option, index):
+        opt = QStyleOptionViewItem(option)
+        self.initStyleOption(opt, index)
+        opt.text = ""
+        _pintar_fondo(opt, painter)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        margen = (self._btn_size - self._icon_size) // 2
+        for clave, r in self._botones(opt.rect, index):
+            if self._hover == (index.row(), clave):
+                painter.setPen(Qt.NoPen)
+                painter.setBrush(QColor("#e0e0e0"))
+                painter.drawRoundedRect(r, 4, 4)
+            painter.drawPixmap(r.x() + margen, r.y() + margen,
+                               svg_pixmap_color(self._svgs[clave], "#1a1a1a", self._icon_size,
+                                                painter.device().devicePixelRatioF()))
+        painter.restore()
+
+    # ── eventos ──────────────────────────────────────────────────
+    def editorEvent(self, event, model, option, index):
+        if event.type() in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease,
+                            QEvent.MouseButtonDblClick) and event.button() == Qt.LeftButton:
+            clave = self._clave_en(option.rect, index, event.position().toPoint())
+            if clave is None:
+                return super().editorEvent(event, model, option, index)
+            if event.type() == QEvent.MouseButtonRelease:
+                datos = index.data(ROL_DATOS)
+                # Diferido: el manejador suele recargar la tabla y no debe
+                # hacerlo mientras la vista todavía procesa el clic.
+                QTimer.singleShot(0, lambda: self.accion_activada.emit(clave, datos))
+            return True
+        return super().editorEvent(event, model, option, index)
+
+    def helpEvent(self, event, view, option, index):
+        if event.type() == QEvent.ToolTip:
+            clave = self._clave_en(option.rect, index, event.pos())
+            if clave is not None:
+                QToolTip.showText(event.globalPos(), self._tooltips[clave], view)
+                return True
+        return super().helpEvent(event, view, option, index)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.MouseMove:
+            index = self._tabla.indexAt(event.position().toPoint())
+            hover = None
+            if index.isValid() and index.column() == self._columna:
+                clave = self._clave_en(self._tabla.visualRect(index), index, event.position().toPoint())
+                if clave is not None:
+                    hover = (index.row(), clave)
+            self._actualizar_hover(hover)
+        elif event.type() == QEvent.Leave:
+            self._actualizar_hover(None)
+        return False
+
+    def _actualizar_hover(self, hover):
+        if hover == self._hover:
+            return
+        self._hover = hover
+        viewport = self._tabla.viewport()
+        if hover is None:
+            viewport.unsetCursor()
+        else:
+            viewport.setCursor(Qt.PointingHandCursor)
+        viewport.update()
@@ -1,26 +1,71 @@
 import os
+from collections import OrderedDict
 
 from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QBrush, QColor, QIcon, QPainter, QPainterPath, QPen, QPixmap
+from PySide6.QtGui import QBrush, QColor, QGuiApplication, QIcon, QPainter, QPainterPath, QPen, QPixmap
 from PySide6.QtSvg import QSvgRenderer
 from PySide6.QtWidgets import QPushButton
 
 _ASSETS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
 
+# Caché de íconos compartida por todas las vistas. Los SVG se parsean una
+# sola vez (_renderers) y cada combinación (svg, color, tamaño, escala) se
+# rasteriza una sola vez; la caché de pixmaps es LRU acotada.
+MAX_ICONOS_CACHE = 256
+_renderers = {}
+_pixmaps = OrderedDict()
 
-def _svg_icon_color(nombre_svg: str, color: QColor, size: int = 18) -> QIcon:
-    """Carga un SVG desde /assets y tiñe todos los píxeles al color indicado."""
-    path = os.path.join(_ASSETS, nombre_svg)
-    renderer = QSvgRenderer(path)
-    pix = QPixmap(size, size)
+
+def _renderer(nombre_svg: str) -> QSvgRenderer:
+    renderer = _renderers.get(nombre_svg)
+    if renderer is None:
+        renderer = _renderers[nombre_svg] = QSvgRenderer(os.path.join(_ASSETS, nombre_svg))
+    return renderer
+
+
+def precargar_iconos() -> None:
+    """Parsea todos los SVG de /assets (se llama una vez al iniciar la app)."""
+    for nombre in os.listdir(_ASSETS):
+        if nombre.lower().endswith(".svg"):
+            _renderer(nombre)
+
+
+def _escala_pantalla() -> float:
+    app = QGuiApplication.instance()
+    return app.devicePixelRatio() if app is not None else 1.0
+
+
+def svg_pixmap_color(nombre_svg: str, color, size: int = 18, dpr: float = None) -> QPixmap:
+    """Pixmap de un SVG de /assets teñido de `color`, rasterizado a la escala
+    de la pantalla (dpr) y cacheado."""
+    color = QColor(color)
+    dpr = dpr or _escala_pantalla()
+    clave = (nombre_svg, color.rgba(), size, dpr)
+    pix = _pixmaps.get(clave)
+    if pix is not None:
+        _pixmaps.move_to_end(clave)
+        return pix
+
+    lado = round(size * dpr)
+    pix = QPixmap(lado, lado)
     pix.fill(Qt.transparent)
     painter = QPainter(pix)
     painter.setRenderHint(QPainter.Antialiasing)
-    renderer.render(painter)
+    _renderer(nombre_svg).render(painter)
     painter.setCompositionMode(QPainter.CompositionMode_SourceIn)
     painter.fillRect(pix.rect(), color)
     painter.end()
-    return QIcon(pix)
+    pix.setDevicePixelRatio(dpr)
+
+    _pixmaps[clave] = pix
+    if len(_pixmaps) > MAX_ICONOS_CACHE:
+        _pixmaps.popitem(last=False)
+    return pix
+
+
+def _svg_icon_color(nombre_svg: str, color: QColor, size: int = 18) -> QIcon:
+    """Carga un SVG desde /assets y tiñe todos los píxeles al color indicado."""
+    return QIcon(svg_pixmap_color(nombre_svg, color, size))
 
 
 def _svg_icon_blanco(nombre_svg: str, size: int = 18) -> QIcon:
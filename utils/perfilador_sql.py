@@ -0,0 +1,266 @@
+"""Perfilador de consultas SQL
+
+Mientras está activo, db.get_connection crea las conexiones con
+ConexionPerfilada: cada sentencia se mide (ejecución + lectura de filas), se
+cuentan sus filas y se atribuye a la función que la emitió (normalmente una
+de services/). Por sentencia se guarda una ventana de las últimas duraciones
+para calcular percentiles, y las que superan el umbral se escriben en un log
+rotativo. Desactivado, get_connection vuelve a sqlite3.Connection y el
+costo es nulo.
+"""
+import logging
+import sqlite3
+import sys
+import threading
+import time
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+import db
+from utils.constants import APP_DATA_DIR
+
+LOG_CONSULTAS_LENTAS = APP_DATA_DIR / "logs" / "consultas_lentas.log"
+UMBRAL_LENTA_MS = 100
+# Duraciones recientes que se conservan por sentencia para los percentiles
+VENTANA_MUESTRAS = 500
+
+_lock = threading.Lock()
+_estadisticas = {}
+_activo = False
+_umbral_ms = UMBRAL_LENTA_MS
+_logger = None
+
+# Módulos que no cuentan como "sitio de llamada"
+_MODULOS_INTERNOS = {__name__, "db"}
+
+
+class _Estadistica:
+    """Acumulado de una sentencia en un sitio de llamada."""
+
+    __slots__ = ("llamadas", "filas", "total_ms", "maximo_ms", "muestras")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.filas = 0
+        self.total_ms = 0.0
+        self.maximo_ms = 0.0
+        self.muestras = deque(maxlen=VENTANA_MUESTRAS)
+
+    def agregar(self, ms, filas):
+        self.llamadas += 1
+        self.filas += filas
+        self.total_ms += ms
+        self.maximo_ms = max(self.maximo_ms, ms)
+        self.muestras.append(ms)
+
+
+class _Medicion:
+    __slots__ = ("sql", "sitio", "segundos", "filas")
+
+    def __init__(self, sql, sitio, segundos):
+        self.sql = sql
+        self.sitio = sitio
+        self.segundos = segundos
+        self.filas = 0
+
+
+def _sitio_llamada():
+    """Devuelve 'modulo.funcion' del primer frame fuera del perfilador y db."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        modulo = frame.f_globals.get("__name__", "")
+        if modulo not in _MODULOS_INTERNOS:
+            return f"{modulo}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+def _obtener_logger():
+    """Crea el log rotativo de consultas lentas la primera vez que se necesita."""
+    global _logger
+    if _logger is None:
+        LOG_CONSULTAS_LENTAS.parent.mkdir(parents=True, exist_ok=True)
+        logger = logging.getLogger("kyogym.consultas_lentas")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        handler = RotatingFileHandler(LOG_CONSULTAS_LENTAS, maxBytes=1_000_000,
+                                      backupCount=3, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+
+def _registrar(medicion):
+    sql = " ".join(medicion.sql.split())
+    # El PRAGMA journal_mode de get_connection se repite en cada conexión
+    if sql[:6].upper() == "PRAGMA":
+        return
+    ms = medicion.segundos * 1000
+    with _lock:
+        estadistica = _estadisticas.get((medicion.sitio, sql))
+        if estadistica is None:
+            estadistica = _estadisticas[(medicion.sitio, sql)] = _Estadistica()
+        estadistica.agregar(ms, medicion.filas)
+    if ms >= _umbral_ms:
+        _obtener_logger().info("%.1f ms | %d filas | %s | %s",
+                               ms, medicion.filas, medicion.sitio, sql)
+
+
+class CursorPerfilado(sqlite3.Cursor):
+    """Cursor que mide cada execute hasta que se terminan de leer sus filas."""
+
+    _medicion = None
+
+    def _terminar(self):
+        medicion, self._medicion = self._medicion, None
+        if medicion is not None:
+            _registrar(medicion)
+
+    def _iniciar(self, sql, ejecutar):
+        self._terminar()
+        sitio = _sitio_llamada()
+        inicio = time.perf_counter()
+        try:
+            return ejecutar()
+        finally:
+            self._medicion = _Medicion(sql, sitio, time.perf_counter() - inicio)
+            if self.description is None:
+                # Escritura o DDL: no hay filas que leer
+                self._medicion.filas = max(self.rowcount, 0)
+                self._terminar()
+
+    def execute(self, sql, parametros=()):
+        return self._iniciar(sql, lambda: super(CursorPerfilado, self).execute(sql, parametros))
+
+    def executemany(self, sql, parametros):
+        return self._iniciar(sql, lambda: super(CursorPerfilado, self).executemany(sql, parametros))
+
+    def fetchone(self):
+        inicio = time.perf_counter()
+        fila = super().fetchone()
+        medicion = self._medicion
+        if medicion is not None:
+            medicion.segundos += time.perf_counter() - inicio
+            if fila is None:
+                self._terminar()
+            else:
+                medicion.filas += 1
+        return fila
+
+    def fetchmany(self, size=None):
+        inicio = time.perf_counter()
+        filas = super().fetchmany(self.arraysize if size is None else size)
+        medicion = self._medicion
+        if medicion is not None:
+            medicion.segundos += time.perf_counter() - inicio
+            medicion.filas += len(filas)
+            if not filas:
+                self._terminar()
+        return filas
+
+    def fetchall(self):
+        inicio = time.perf_counter()
+        filas = super().fetchall()
+        medicion = self._medicion
+        if medicion is not None:
+            medicion.segundos += time.perf_counter() - inicio
+            medicion.filas += len(filas)
+            self._terminar()
+        return filas
+
+    def __next__(self):
+        fila = self.fetchone()
+        if fila is None:
+            raise StopIteration
+        return fila
+
+    def close(self):
+        self._terminar()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._terminar()
+        except Exception:
+            pass
+
+
+class ConexionPerfilada(sqlite3.Connection):
+    """Conexión cuyos cursores (incluidos los de conn.execute) se miden."""
+
+    def cursor(self, factory=CursorPerfilado):
+        return super().cursor(factory)
+
+    # Connection.execute de sqlite3 no pasa por Cursor.execute, por eso se
+    # redirige explícitamente al cursor perfilado.
+    def execute(self, sql, parametros=()):
+        return self.cursor().execute(sql, parametros)
+
+    def executemany(self, sql, parametros):
+        return self.cursor().executemany(sql, parametros)
+
+
+# ─────────────────────────── API ───────────────────────────
+
+def activar(umbral_ms=None):
+    """Empieza a perfilar las conexiones nuevas de db.get_connection."""
+    global _activo
+    if umbral_ms is not None:
+        establecer_umbral(umbral_ms)
+    db.set_connection_factory(ConexionPerfilada)
+    _activo = True
+
+
+def desactivar():
+    """Deja de perfilar. Las estadísticas acumuladas se conservan."""
+    global _activo
+    db.set_connection_factory(None)
+    _activo = False
+
+
+def esta_activo():
+    return _activo
+
+
+def establecer_umbral(umbral_ms):
+    """Duración mínima (ms) para escribir una sentencia en el log de lentas."""
+    global _umbral_ms
+    _umbral_ms = float(umbral_ms)
+
+
+def obtener_umbral():
+    return _umbral_ms
+
+
+def reiniciar():
+    """Borra las estadísticas acumuladas."""
+    with _lock:
+        _estadisticas.clear()
+
+
+def _percentil(ordenados, p):
+    return ordenados[min(len(ordenados) - 1, int(round(p / 100 * (len(ordenados) - 1))))]
+
+
+def obtener_estadisticas(ordenar_por="p95_ms", limite=None):
+    """Devuelve una lista de dicts por (sitio, sentencia) con llamadas, filas,
+    tiempo total y percentiles p50/p95/p99 de las últimas muestras."""
+    with _lock:
+        copia = [(sitio, sql, e.llamadas, e.filas, e.total_ms, e.maximo_ms, sorted(e.muestras))
+                 for (sitio, sql), e in _estadisticas.items()]
+    resultado = []
+    for sitio, sql, llamadas, filas, total_ms, maximo_ms, muestras in copia:
+        resultado.append({
+            "sitio": sitio,
+            "sql": sql,
+            "llamadas": llamadas,
+            "filas_promedio": filas / llamadas,
+            "total_ms": total_ms,
+            "p50_ms": _percentil(muestras, 50),
+            "p95_ms": _percentil(muestras, 95),
+            "p99_ms": _percentil(muestras, 99),
+            "max_ms": maximo_ms,
+        })
+    resultado.sort(key=lambda r: r[ordenar_por], reverse=True)
+    return resultado[:limite] if limite else resultado
@@ -28,3 +28,60 @@ def limpiar_tabla(tabla: QTableWidget) -> None:
         tabla.setRowCount(0)
     finally:
         tabla.setUpdatesEnabled(True)
+
+
+class CargadorPaginado:
+    """Scroll infinito para un QTableWidget alimentado por una API con cursor.
+
+    `consultar(cursor)` devuelve (filas, siguiente_cursor) y `agregar_filas(filas)`
+    las agrega al final de la tabla. La página siguiente se pide cuando al
+    scroll le queda menos de una pantalla, así nunca se carga más de lo
+    que se ve ni se trunca el listado.
+    """
+
+    def __init__(self, tabla: QTableWidget, agregar_filas):
+        self._tabla = tabla
+        self._agregar_filas = agregar_filas
+        self._consultar = None
+        self._cursor = None
+        self._completo = True
+        self._cargando = False
+        tabla.verticalScrollBar().valueChanged.connect(self._on_scroll)
+
+    def reiniciar(self, consultar, primera_pagina=None) -> None:
+        """Limpia la tabla y carga la primera página de `consultar`. Si ya se
+        tiene (p. ej. calculada en segundo plano) se pasa como
+        `primera_pagina` = (filas, siguiente_cursor)."""
+        self._consultar = consultar
+        self._cursor = None
+        self._completo = False
+        limpiar_tabla(self._tabla)
+        if primera_pagina is None:
+            self.cargar_mas()
+            return
+        self._agregar(*primera_pagina)
+
+    def cargar_mas(self) -> None:
+        """Agrega la página siguiente (si queda alguna)."""
+        if self._completo or self._cargando:
+            return
+        self._cargando = True
+        try:
+            self._agregar(*self._consultar(self._cursor))
+        finally:
+            self._cargando = False
+
+    def _agregar(self, filas, siguiente_cursor) -> None:
+        self._cursor = siguiente_cursor
+        self._completo = siguiente_cursor is None
+        sorting_enabled = self._tabla.isSortingEnabled()
+        self._tabla.setSortingEnabled(False)
+        try:
+            self._agregar_filas(filas)
+        finally:
+            self._tabla.setSortingEnabled(sorting_enabled)
+
+    def _on_scroll(self, valor: int) -> None:
+        barra = self._tabla.verticalScrollBar()
+        if barra.maximum() - valor <= barra.pageStep():
+            self.cargar_mas()
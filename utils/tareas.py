@@ -0,0 +1,69 @@
+"""Ejecución de trabajos largos fuera del hilo de la interfaz
+
+ejecutar_en_segundo_plano corre una función en el QThreadPool global y
+entrega el resultado (o la excepción) en el hilo de la interfaz, para que
+exportaciones y respaldos no congelen la ventana. al_resolver hace lo
+mismo con el Future de una escritura encolada en escritura_service.
+"""
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+
+class _Senales(QObject):
+    terminado = Signal(object)
+    fallo = Signal(object)
+
+
+class _Tarea(QRunnable):
+    def __init__(self, funcion, senales):
+        super().__init__()
+        self._funcion = funcion
+        self._senales = senales
+
+    def run(self):
+        try:
+            resultado = self._funcion()
+        except Exception as e:
+            self._senales.fallo.emit(e)
+        else:
+            self._senales.terminado.emit(resultado)
+
+
+def ejecutar_en_segundo_plano(funcion, al_terminar=None, al_fallar=None, parent=None):
+    """Ejecuta `funcion()` en un hilo del pool. `al_terminar(resultado)` y
+    `al_fallar(excepcion)` se llaman en el hilo de la interfaz. Con `parent`
+    los callbacks se descartan si ese objeto se destruye antes."""
+    senales = _Senales(parent)
+    if al_terminar is not None:
+        senales.terminado.connect(al_terminar)
+    if al_fallar is not None:
+        senales.fallo.connect(al_fallar)
+    senales.terminado.connect(senales.deleteLater)
+    senales.fallo.connect(senales.deleteLater)
+    QThreadPool.globalInstance().start(_Tarea(funcion, senales))
+
+
+def al_resolver(futuro, al_terminar=None, al_fallar=None, parent=None):
+    """Entrega el resultado de `futuro` (concurrent.futures.Future) en el
+    hilo de la interfaz: `al_terminar(resultado)` o `al_fallar(excepcion)`.
+    Con `parent` los callbacks se descartan si ese objeto se destruye antes."""
+    senales = _Senales(parent)
+    if al_terminar is not None:
+        senales.terminado.connect(al_terminar)
+    if al_fallar is not None:
+        senales.fallo.connect(al_fallar)
+    senales.terminado.connect(senales.deleteLater)
+    senales.fallo.connect(senales.deleteLater)
+
+    def emitir(f):
+        try:
+            if f.cancelled():
+                return
+            error = f.exception()
+            if error is not None:
+                senales.fallo.emit(error)
+            else:
+                senales.terminado.emit(f.result())
+        except RuntimeError:
+            # El objeto de señales ya se destruyó junto con su parent
+            pass
+    futuro.add_done_callback(emitir)
@@ -8,12 +8,20 @@ from PySide6.QtGui import QFont, QColor
 from datetime import date
 from services import cliente_service
 from services import finanzas_service
-from utils.iconos_ui import crear_boton_icono, crear_widget_centrado
+from services import cohortes_service
 from utils.table_styles import aplicar_estilo_tabla_moderna
+from utils.busqueda_diferida import BuscadorDiferido
+from utils.carga_pestanas import CargadorPestanas
 from utils.table_utils import limpiar_tabla
+from utils.delegados_tabla import DelegadoAcciones, item_acciones
 from utils.validators import crear_validador_nombre, TelefonoFormateadoLineEdit, crear_validador_email
 
 
+# Columnas M0..M12 y cohortes (meses) mostradas en la pestaña de retención
+MESES_RETENCION = 13
+COHORTES_RETENCION = 24
+
+
 class NumericTableWidgetItem(QTableWidgetItem):
     """Ítem de tabla que ordena valores numéricos correctamente"""
     def __init__(self, valor_numerico, texto_display):
@@ -309,7 +317,9 @@ class ClientesView(QWidget):
                 border: 1px solid #c0c0c0;
             }
         """)
-        self.buscar_input.textChanged.connect(self.cargar_datos)
+        self._buscador = BuscadorDiferido(self.buscar_input, self._preparar_busqueda,
+                                          lambda filas, _siguiente, _consultar: self._llenar_tabla(filas),
+                                          campos=("nombre", "telefono"))
         header_layout.addWidget(self.buscar_input)
         
         btn_agregar = QPushButton("Agregar Cliente")
@@ -345,12 +355,19 @@ class ClientesView(QWidget):
             QTabBar::tab:selected { background:#f8f8f8; color:#1a1a1a; border-bottom:1px solid #f8f8f8; }
             QTabBar::tab:hover { background:#e0e0e0; }
         """)
-        self.tabs_clientes.addTab(self._crear_tab_lista(), "📋 Lista")
-        self.tabs_clientes.addTab(self._crear_tab_estadisticas(), "📊 Estadísticas")
-        self.tabs_clientes.addTab(self._crear_tab_top_clientes(), "🏆 Top Clientes")
-        self.tabs_clientes.addTab(self._crear_tab_frecuentes(), "🔁 Frecuentes")
-        self.tabs_clientes.addTab(self._crear_tab_inactivos(), "💤 Inactivos")
-        self.tabs_clientes.currentChanged.connect(self._on_tab_clientes_changed)
+        pestanas = [
+            (self._crear_tab_lista(), "📋 Lista", self._buscador.buscar_ahora, ("clientes",)),
+            (self._crear_tab_estadisticas(), "📊 Estadísticas", self._cargar_tab_estadisticas,
+             ("clientes", "membresias", "pagos")),
+            (self._crear_tab_top_clientes(), "🏆 Top Clientes", self._cargar_tab_top_clientes, ("pagos",)),
+            (self._crear_tab_frecuentes(), "🔁 Frecuentes", self._cargar_tab_frecuentes, ("pagos",)),
+            (self._crear_tab_inactivos(), "💤 Inactivos", self._cargar_tab_inactivos, ("clientes", "pagos")),
+            (self._crear_tab_retencion(), "📈 Retención", self._cargar_tab_retencion, ("membresias",)),
+        ]
+        self._pestanas = CargadorPestanas(self.tabs_clientes)
+        for widget, titulo, cargar, fuentes in pestanas:
+            self.tabs_clientes.addTab(widget, titulo)
+            self._pestanas.registrar(widget, cargar, fuentes)
         layout.addWidget(self.tabs_clientes)
 
         self.setLayout(layout)
@@ -473,6 +490,10 @@ class ClientesView(QWidget):
         self.tabla.setAlternatingRowColors(False)
         self.tabla.verticalHeader().setVisible(False)
         aplicar_estilo_tabla_moderna(self.tabla)
+        DelegadoAcciones(self.tabla, 5, [("editar", "edit.svg", "Editar"),
+                                         ("perfil", "see.svg", "Ver Perfil"),
+                                         ("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(self._on_accion_cliente)
         self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         layout.addWidget(self.tabla)
 
@@ -744,15 +765,59 @@ class ClientesView(QWidget):
 
         return w
 
-    def _on_tab_clientes_changed(self, index):
-        if index == 1:
-            self._cargar_tab_estadisticas()
-        elif index == 2:
-            self._cargar_tab_top_clientes()
-        elif index == 3:
-            self._cargar_tab_frecuentes()
-        elif index == 4:
-            self._cargar_tab_inactivos()
+    def _crear_tab_retencion(self):
+        w = QWidget()
+        layout = QVBoxLayout(w)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(10)
+
+        ctrl = QHBoxLayout()
+        ctrl.setSpacing(10)
+
+        btn_refresh = QPushButton("🔄 Actualizar")
+        btn_refresh.setStyleSheet("""
+            QPushButton { background-color:#3498db; color:white; padding:6px 16px;
+                          border:none; border-radius:4px; font-size:12px; font-weight:bold; }
+            QPushButton:hover { background-color:#2980b9; }
+        """)
+        btn_refresh.clicked.connect(self._cargar_tab_retencion)
+        ctrl.addWidget(btn_refresh)
+
+        lbl_curva = QLabel("Curva:")
+        lbl_curva.setStyleSheet("color:#555; font-size:12px; font-weight:bold;")
+        ctrl.addWidget(lbl_curva)
+
+        self.combo_retencion_curva = QComboBox()
+        self.combo_retencion_curva.addItem("Retención (membresía vigente)", "retencion")
+        self.combo_retencion_curva.addItem("Renovación (segunda membresía)", "renovacion")
+        self.combo_retencion_curva.setStyleSheet("""
+            QComboBox { padding:6px 10px; border: none; border-radius:4px;
+                        font-size:12px; color:#1a1a1a; background:#f5f5f5; min-width:220px; }
+            QComboBox::drop-down { border:none; }
+        """)
+        self.combo_retencion_curva.currentIndexChanged.connect(self._cargar_tab_retencion)
+        ctrl.addWidget(self.combo_retencion_curva)
+        ctrl.addStretch()
+        layout.addLayout(ctrl)
+
+        lbl = QLabel("Clientes agrupados por el mes de su primera membresía: % de cada "
+                     "grupo en los meses siguientes (M0 = mes de inicio)")
+        lbl.setStyleSheet("color:#555; font-size:12px; padding-bottom:4px;")
+        layout.addWidget(lbl)
+
+        self.tabla_retencion = QTableWidget()
+        self.tabla_retencion.setColumnCount(3 + MESES_RETENCION)
+        self.tabla_retencion.setHorizontalHeaderLabels(
+            ["Cohorte", "Clientes", "Renovaron"] + [f"M{k}" for k in range(MESES_RETENCION)])
+        self.tabla_retencion.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla_retencion.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla_retencion.setSelectionMode(QTableWidget.NoSelection)
+        self.tabla_retencion.setAlternatingRowColors(False)
+        self.tabla_retencion.verticalHeader().setVisible(False)
+        aplicar_estilo_tabla_moderna(self.tabla_retencion)
+        layout.addWidget(self.tabla_retencion)
+
+        return w
 
     def _cargar_tab_estadisticas(self):
         try:
@@ -849,11 +914,55 @@ class ClientesView(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
     
-    def cargar_datos(self):
-        """Carga los clientes en la tabla"""
-        buscar = self.buscar_input.text() if hasattr(self, 'buscar_input') else ""
-        clientes = cliente_service.listar_clientes(buscar=buscar)
+    def _cargar_tab_retencion(self):
+        try:
+            curva = self.combo_retencion_curva.currentData()
+            # Las cohortes más recientes primero
+            cohortes = cohortes_service.obtener_cohortes()[::-1][:COHORTES_RETENCION]
+            limpiar_tabla(self.tabla_retencion)
+            self.tabla_retencion.setRowCount(len(cohortes))
+            for i, c in enumerate(cohortes):
+                self.tabla_retencion.setRowHeight(i, 36)
+                fijos = [c["cohorte"].strftime("%m/%Y"), str(c["clientes"]),
+                         f"{c['tasa_renovacion']:.1f}%"]
+                for col, val in enumerate(fijos):
+                    item = QTableWidgetItem(val)
+                    item.setForeground(QColor("#1a1a1a"))
+                    self.tabla_retencion.setItem(i, col, item)
+                for k, pct in enumerate(c[curva][:MESES_RETENCION]):
+                    item = QTableWidgetItem(f"{pct:.0f}%")
+                    item.setTextAlignment(Qt.AlignCenter)
+                    # Más intenso cuanto mayor el porcentaje
+                    item.setBackground(QColor(39, 174, 96, int(30 + 2 * pct)))
+                    item.setForeground(QColor("#ffffff" if pct >= 60 else "#1a1a1a"))
+                    self.tabla_retencion.setItem(i, 3 + k, item)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
 
+    def cargar_datos(self):
+        """Recarga la pestaña visible (la lista de clientes con la búsqueda y
+        los filtros activos, o un reporte); las demás se recargan al mostrarse."""
+        self._pestanas.invalidar()
+
+    def _preparar_busqueda(self, texto):
+        filtros = self._filtros_activos()
+        return lambda _cursor: (cliente_service.listar_clientes(buscar=texto, **filtros), None)
+
+    def _filtros_activos(self):
+        """Filtros de género y edad para listar_clientes. La UI usa "mayor que"
+        y "menor que" estrictos; el servicio recibe edades inclusivas."""
+        filtros = {}
+        if getattr(self, 'filtro_genero', None):
+            filtros['sexo'] = self.filtro_genero
+        if getattr(self, 'filtro_edad', None) == "personalizado":
+            if self.edad_minima is not None:
+                filtros['edad_min'] = self.edad_minima + 1
+            if self.edad_maxima is not None:
+                filtros['edad_max'] = self.edad_maxima - 1
+        return filtros
+
+    def _llenar_tabla(self, clientes):
+        """Reemplaza el contenido de la tabla por la lista de clientes"""
         sorting_enabled = self.tabla.isSortingEnabled()
         self.tabla.setSortingEnabled(False)
 
@@ -889,30 +998,20 @@ class ClientesView(QWidget):
                 fecha_texto = "-"
             self.tabla.setItem(i, 4, FechaTableWidgetItem(fecha_texto))
 
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
-            btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-            btn_editar.clicked.connect(lambda checked, c=cliente: self.editar_cliente(c))
-            acciones_layout.addWidget(btn_editar)
-
-            btn_perfil = crear_boton_icono("see.svg", "#2c6fad", "#255d91", "Ver Perfil")
-            btn_perfil.clicked.connect(lambda checked, cid=cliente['id']: self.ver_perfil_cliente(cid))
-            acciones_layout.addWidget(btn_perfil)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, cid=cliente['id']: self.eliminar_cliente(cid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 5, acciones_widget)
+            # Editar / Ver Perfil / Eliminar (botones pintados por DelegadoAcciones)
+            self.tabla.setItem(i, 5, item_acciones(cliente))
 
         self.tabla.setSortingEnabled(sorting_enabled)
 
+    def _on_accion_cliente(self, accion, cliente):
+        """Despacha los botones de la columna Acciones"""
+        if accion == "editar":
+            self.editar_cliente(cliente)
+        elif accion == "perfil":
+            self.ver_perfil_cliente(cliente['id'])
+        elif accion == "eliminar":
+            self.eliminar_cliente(cliente['id'])
+
     def ver_perfil_cliente(self, cliente_id):
         """Abre el diálogo de perfil del cliente."""
         from views.perfil_cliente_view import PerfilClienteDialog
@@ -1292,78 +1391,5 @@ class ClientesView(QWidget):
         self.aplicar_filtros()
     
     def aplicar_filtros(self):
-        """Aplica los filtros de género y edad a la tabla"""
-        buscar = self.buscar_input.text() if hasattr(self, 'buscar_input') else ""
-        clientes = cliente_service.listar_clientes(buscar=buscar)
-        
-        # Filtrar por género
-        if self.filtro_genero:
-            clientes = [c for c in clientes if c.get('sexo') == self.filtro_genero]
-        
-        # Filtrar por edad
-        if self.filtro_edad == "personalizado" and (self.edad_minima is not None or self.edad_maxima is not None):
-            hoy = date.today()
-            clientes_filtrados = []
-            
-            for cliente in clientes:
-                if cliente.get('fecha_nacimiento'):
-                    fecha_nac = date.fromisoformat(cliente['fecha_nacimiento'])
-                    edad = (hoy - fecha_nac).days // 365
-                    
-                    # Aplicar ambos filtros si están definidos
-                    cumple_minimo = True if self.edad_minima is None else edad > self.edad_minima
-                    cumple_maximo = True if self.edad_maxima is None else edad < self.edad_maxima
-                    
-                    if cumple_minimo and cumple_maximo:
-                        clientes_filtrados.append(cliente)
-            
-            clientes = clientes_filtrados
-        
-        # Actualizar tabla con clientes filtrados
-        limpiar_tabla(self.tabla)
-        self.tabla.setRowCount(len(clientes))
-        
-        for i, cliente in enumerate(clientes):
-            self.tabla.setRowHeight(i, 52)
-            # Nombre
-            self.tabla.setItem(i, 0, QTableWidgetItem(cliente['nombre']))
-            
-            # Teléfono
-            self.tabla.setItem(i, 1, QTableWidgetItem(cliente['telefono'] or "-"))
-            
-            # Edad
-            fecha_nac = cliente.get('fecha_nacimiento', '')
-            if fecha_nac:
-                fecha = date.fromisoformat(fecha_nac)
-                hoy = date.today()
-                edad = hoy.year - fecha.year - ((hoy.month, hoy.day) < (fecha.month, fecha.day))
-                self.tabla.setItem(i, 2, QTableWidgetItem(str(edad)))
-            else:
-                self.tabla.setItem(i, 2, QTableWidgetItem("-"))
-            
-            # Sexo
-            self.tabla.setItem(i, 3, QTableWidgetItem(cliente.get('sexo', "-")))
-            
-            # Fecha de nacimiento
-            if fecha_nac:
-                fecha_texto = fecha.strftime("%d/%m/%Y")
-            else:
-                fecha_texto = "-"
-            self.tabla.setItem(i, 4, QTableWidgetItem(fecha_texto))
-
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 0, 4, 0)
-            acciones_layout.setSpacing(6)
-
-            btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-            btn_editar.clicked.connect(lambda checked, c=cliente: self.editar_cliente(c))
-            acciones_layout.addWidget(btn_editar)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, cid=cliente['id']: self.eliminar_cliente(cid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 5, acciones_widget)
+        """Aplica los filtros de género y edad a la tabla (se resuelven en SQL)"""
+        self._buscador.buscar_ahora()
@@ -3,7 +3,8 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                                QFrame, QLineEdit, QPushButton, QGroupBox,
                                QFormLayout, QComboBox, QSpinBox, QDialog,
                                QMessageBox, QScrollArea, QFileDialog,
-                               QTableWidget, QTableWidgetItem, QHeaderView)
+                               QTableWidget, QTableWidgetItem, QHeaderView,
+                               QCheckBox)
 from PySide6.QtCore import Qt, Signal
 from PySide6.QtGui import QFont, QPixmap
 from utils.iconos_ui import crear_boton_icono
@@ -12,13 +13,12 @@ from utils.table_utils import limpiar_tabla
 from utils.validators import crear_validador_nombre, TelefonoFormateadoLineEdit, crear_validador_email
 from usuario_activo import obtener_usuario_activo
 from db import create_user, get_all_users, delete_user
-import json
+from services import config_service, respaldo_service
+from utils import perfilador_sql
+from utils.tareas import ejecutar_en_segundo_plano
 import os
 
 
-DEFAULT_DIAS_ALERTA_VENCIMIENTO = 7
-
-
 class VerUsuariosDialog(QDialog):
     """Diálogo que lista todos los usuarios con opción de eliminar por fila."""
 
@@ -213,7 +213,6 @@ class ConfiguracionView(QWidget):
 
     def __init__(self):
         super().__init__()
-        self.config_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "config.json")
         self.logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "assets", "logo.png")
         self._usuario_activo = ""
         self.init_ui()
@@ -262,6 +261,16 @@ class ConfiguracionView(QWidget):
         self._grupo_usuarios.setVisible(False)
         layout.addWidget(self._grupo_usuarios)
 
+        # Diagnóstico de consultas (solo admin / prueba)
+        self._grupo_diagnostico = self._crear_grupo_diagnostico()
+        self._grupo_diagnostico.setVisible(False)
+        layout.addWidget(self._grupo_diagnostico)
+
+        # Respaldos de la base (solo admin / prueba)
+        self._grupo_respaldos = self._crear_grupo_respaldos()
+        self._grupo_respaldos.setVisible(False)
+        layout.addWidget(self._grupo_respaldos)
+
         # Botones de acción
         botones_layout = QHBoxLayout()
         
@@ -402,6 +411,254 @@ class ConfiguracionView(QWidget):
         layout.addLayout(btns_layout)
         return grupo
 
+    def _crear_grupo_diagnostico(self):
+        """Crea el panel del perfilador de consultas SQL."""
+        grupo = QGroupBox("🩺 Diagnóstico de Consultas")
+        grupo.setStyleSheet("""
+            QGroupBox {
+                font-size: 16px;
+                font-weight: bold;
+                color: #555555;
+                background-color: #f5f5f5;
+                border: 1px solid #000000;
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 10px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }
+        """)
+        layout = QVBoxLayout(grupo)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        lbl = QLabel("Mide cada consulta a la base de datos por función. Las que superan "
+                     f"el umbral se registran en {perfilador_sql.LOG_CONSULTAS_LENTAS}.")
+        lbl.setWordWrap(True)
+        lbl.setStyleSheet("color: #666666; font-size: 13px;")
+        layout.addWidget(lbl)
+
+        controles = QHBoxLayout()
+        self.chk_perfilador = QCheckBox("Registrar tiempos de consultas")
+        self.chk_perfilador.setStyleSheet("font-size: 13px; color: #1a1a1a;")
+        self.chk_perfilador.setChecked(perfilador_sql.esta_activo())
+        self.chk_perfilador.toggled.connect(self._cambiar_perfilador)
+        controles.addWidget(self.chk_perfilador)
+
+        controles.addSpacing(20)
+        controles.addWidget(QLabel("Umbral consulta lenta:"))
+        self.spin_umbral_lenta = QSpinBox()
+        self.spin_umbral_lenta.setRange(1, 60000)
+        self.spin_umbral_lenta.setSuffix(" ms")
+        self.spin_umbral_lenta.setValue(int(perfilador_sql.obtener_umbral()))
+        self.spin_umbral_lenta.valueChanged.connect(perfilador_sql.establecer_umbral)
+        self.aplicar_estilo_input(self.spin_umbral_lenta)
+        controles.addWidget(self.spin_umbral_lenta)
+        controles.addStretch()
+        layout.addLayout(controles)
+
+        self.tabla_consultas = QTableWidget(0, 8)
+        self.tabla_consultas.setHorizontalHeaderLabels(
+            ["Función", "Consulta", "Llamadas", "Filas prom.", "p50 ms", "p95 ms", "p99 ms", "Máx ms"])
+        header = self.tabla_consultas.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeToContents)
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        for col in range(2, 8):
+            header.setSectionResizeMode(col, QHeaderView.ResizeToContents)
+        self.tabla_consultas.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla_consultas.verticalHeader().setVisible(False)
+        self.tabla_consultas.setMinimumHeight(260)
+        aplicar_estilo_tabla_moderna(self.tabla_consultas, compacta=True)
+        layout.addWidget(self.tabla_consultas)
+
+        btns_layout = QHBoxLayout()
+        btn_actualizar = QPushButton("🔄 Actualizar")
+        btn_actualizar.setStyleSheet("""
+            QPushButton {
+                background-color: #2980b9;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #2471a3; }
+        """)
+        btn_actualizar.clicked.connect(self._cargar_estadisticas_consultas)
+        btns_layout.addWidget(btn_actualizar)
+
+        btn_reiniciar = QPushButton("🧹 Reiniciar estadísticas")
+        btn_reiniciar.setStyleSheet("""
+            QPushButton {
+                background-color: #95a5a6;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #7f8c8d; }
+        """)
+        btn_reiniciar.clicked.connect(self._reiniciar_estadisticas_consultas)
+        btns_layout.addWidget(btn_reiniciar)
+        btns_layout.addStretch()
+        layout.addLayout(btns_layout)
+        return grupo
+
+    def _cambiar_perfilador(self, activo):
+        """Activa o desactiva el perfilador para las conexiones nuevas."""
+        if activo:
+            perfilador_sql.activar(self.spin_umbral_lenta.value())
+        else:
+            perfilador_sql.desactivar()
+
+    def _cargar_estadisticas_consultas(self):
+        """Llena la tabla con las sentencias más lentas (por p95)."""
+        estadisticas = perfilador_sql.obtener_estadisticas(limite=100)
+        limpiar_tabla(self.tabla_consultas)
+        self.tabla_consultas.setRowCount(len(estadisticas))
+        for row, e in enumerate(estadisticas):
+            sitio = e['sitio'].removeprefix('services.')
+            item_sql = QTableWidgetItem(e['sql'])
+            item_sql.setToolTip(e['sql'])
+            valores = [e['llamadas'], f"{e['filas_promedio']:.1f}", f"{e['p50_ms']:.2f}",
+                       f"{e['p95_ms']:.2f}", f"{e['p99_ms']:.2f}", f"{e['max_ms']:.2f}"]
+            self.tabla_consultas.setItem(row, 0, QTableWidgetItem(sitio))
+            self.tabla_consultas.setItem(row, 1, item_sql)
+            for col, valor in enumerate(valores, start=2):
+                item = QTableWidgetItem(str(valor))
+                item.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
+                self.tabla_consultas.setItem(row, col, item)
+
+    def _reiniciar_estadisticas_consultas(self):
+        perfilador_sql.reiniciar()
+        self._cargar_estadisticas_consultas()
+
+    def _crear_grupo_respaldos(self):
+        """Crea el panel de respaldos de la base de datos."""
+        grupo = QGroupBox("💾 Respaldos de la Base de Datos")
+        grupo.setStyleSheet("""
+            QGroupBox {
+                font-size: 16px;
+                font-weight: bold;
+                color: #555555;
+                background-color: #f5f5f5;
+                border: 1px solid #000000;
+                border-radius: 8px;
+                margin-top: 10px;
+                padding-top: 10px;
+            }
+            QGroupBox::title {
+                subcontrol-origin: margin;
+                left: 10px;
+                padding: 0 5px;
+            }
+        """)
+        layout = QVBoxLayout(grupo)
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(12)
+
+        lbl = QLabel(f"Copias comprimidas en {respaldo_service.RESPALDOS_DIR}. Solo se guardan las "
+                     "páginas que cambiaron desde el respaldo anterior. Para restaurar, cierre la "
+                     "aplicación y ejecute: python -m services.respaldo_service restaurar NOMBRE")
+        lbl.setWordWrap(True)
+        lbl.setStyleSheet("color: #666666; font-size: 13px;")
+        layout.addWidget(lbl)
+
+        self.lbl_ultimo_respaldo = QLabel()
+        self.lbl_ultimo_respaldo.setStyleSheet("color: #1a1a1a; font-size: 13px;")
+        layout.addWidget(self.lbl_ultimo_respaldo)
+
+        btns_layout = QHBoxLayout()
+        self.btn_crear_respaldo = QPushButton("💾 Crear respaldo ahora")
+        self.btn_crear_respaldo.setStyleSheet("""
+            QPushButton {
+                background-color: #27ae60;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #229954; }
+            QPushButton:disabled { background-color: #95a5a6; }
+        """)
+        self.btn_crear_respaldo.clicked.connect(self._crear_respaldo)
+        btns_layout.addWidget(self.btn_crear_respaldo)
+
+        self.btn_verificar_respaldo = QPushButton("✔ Verificar último")
+        self.btn_verificar_respaldo.setStyleSheet("""
+            QPushButton {
+                background-color: #2980b9;
+                color: white;
+                padding: 10px 20px;
+                border: none;
+                border-radius: 6px;
+                font-size: 14px;
+                font-weight: bold;
+            }
+            QPushButton:hover { background-color: #2471a3; }
+            QPushButton:disabled { background-color: #95a5a6; }
+        """)
+        self.btn_verificar_respaldo.clicked.connect(self._verificar_respaldo)
+        btns_layout.addWidget(self.btn_verificar_respaldo)
+        btns_layout.addStretch()
+        layout.addLayout(btns_layout)
+
+        self._mostrar_ultimo_respaldo()
+        return grupo
+
+    def _mostrar_ultimo_respaldo(self, texto=None):
+        if texto is None:
+            respaldos = respaldo_service.listar_respaldos()
+            if respaldos:
+                m = respaldos[-1]
+                texto = (f"Último respaldo: {m['fecha'].replace('T', ' ')} ({m['tipo']}, "
+                         f"{m['bytes_archivo'] / 1024:,.0f} KB) — {len(respaldos)} generaciones guardadas")
+            else:
+                texto = "Todavía no hay respaldos."
+        self.lbl_ultimo_respaldo.setText(texto)
+
+    def _en_segundo_plano_respaldo(self, funcion, mensaje, al_terminar):
+        """Corre una operación de respaldo sin bloquear la ventana."""
+        self.btn_crear_respaldo.setEnabled(False)
+        self.btn_verificar_respaldo.setEnabled(False)
+        self.lbl_ultimo_respaldo.setText(mensaje)
+
+        def _fin():
+            self.btn_crear_respaldo.setEnabled(True)
+            self.btn_verificar_respaldo.setEnabled(True)
+
+        def _ok(resultado):
+            _fin()
+            al_terminar(resultado)
+
+        def _error(e):
+            _fin()
+            self._mostrar_ultimo_respaldo()
+            QMessageBox.critical(self, "Respaldo", str(e))
+
+        ejecutar_en_segundo_plano(funcion, _ok, _error, parent=self)
+
+    def _crear_respaldo(self):
+        self._en_segundo_plano_respaldo(respaldo_service.crear_respaldo, "Creando respaldo...",
+                                        lambda _m: self._mostrar_ultimo_respaldo())
+
+    def _verificar_respaldo(self):
+        def _verificado(m):
+            self._mostrar_ultimo_respaldo()
+            QMessageBox.information(self, "Respaldo",
+                                    f"El respaldo del {m['fecha'].replace('T', ' ')} está íntegro.")
+
+        self._en_segundo_plano_respaldo(respaldo_service.verificar_respaldo, "Verificando respaldo...",
+                                        _verificado)
+
     def _abrir_crear_usuario(self):
         """Abre el diálogo para crear un usuario."""
         dialog = CrearUsuarioDialog(self)
@@ -417,6 +674,8 @@ class ConfiguracionView(QWidget):
         self._usuario_activo = username
         es_privilegiado = role == 'admin' or username == 'prueba'
         self._grupo_usuarios.setVisible(es_privilegiado)
+        self._grupo_diagnostico.setVisible(es_privilegiado)
+        self._grupo_respaldos.setVisible(es_privilegiado)
 
     def crear_grupo_gimnasio(self):
         """Crea el grupo de información del gimnasio"""
@@ -817,17 +1076,15 @@ class ConfiguracionView(QWidget):
     def cargar_configuracion(self):
         """Carga la configuración desde el archivo JSON"""
         try:
-            if os.path.exists(self.config_file):
-                with open(self.config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    
-                    # Información del gimnasio
-                    self.txt_nombre_gym.setText(config.get('nombre_gimnasio', 'KyoGym'))
-                    self.txt_direccion.setText(config.get('direccion', ''))
-                    self.txt_telefono.setText(config.get('telefono', ''))
-                    self.txt_email.setText(config.get('email', ''))
-                    self.txt_rfc.setText(config.get('rfc', ''))
-                    
+            config = config_service.obtener_configuracion()
+
+            # Información del gimnasio
+            self.txt_nombre_gym.setText(config['nombre_gimnasio'])
+            self.txt_direccion.setText(config['direccion'])
+            self.txt_telefono.setText(config['telefono'])
+            self.txt_email.setText(config['email'])
+            self.txt_rfc.setText(config['rfc'])
+
         except Exception as e:
             msg = QMessageBox(self)
             msg.setWindowTitle("Advertencia")
@@ -860,28 +1117,15 @@ class ConfiguracionView(QWidget):
     def guardar_configuracion(self):
         """Guarda la configuración en el archivo JSON"""
         try:
-            dias_alerta = DEFAULT_DIAS_ALERTA_VENCIMIENTO
-            if os.path.exists(self.config_file):
-                try:
-                    with open(self.config_file, 'r', encoding='utf-8') as f:
-                        config_existente = json.load(f)
-                        dias_alerta = int(config_existente.get('dias_alerta_vencimiento', DEFAULT_DIAS_ALERTA_VENCIMIENTO))
-                        if dias_alerta < 0:
-                            dias_alerta = DEFAULT_DIAS_ALERTA_VENCIMIENTO
-                except (ValueError, TypeError, json.JSONDecodeError):
-                    dias_alerta = DEFAULT_DIAS_ALERTA_VENCIMIENTO
-
-            config = {
+            # Solo se actualizan los campos del formulario; el resto de claves
+            # (días de alerta, notificaciones, folio...) se conserva.
+            config_service.guardar_configuracion({
                 'nombre_gimnasio': self.txt_nombre_gym.text(),
                 'direccion': self.txt_direccion.text(),
                 'telefono': self.txt_telefono.text(),
                 'email': self.txt_email.text(),
                 'rfc': self.txt_rfc.text(),
-                'dias_alerta_vencimiento': dias_alerta
-            }
-            
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(config, f, indent=4, ensure_ascii=False)
+            })
             
             # Mensaje con estilo
             msg = QMessageBox(self)
@@ -5,14 +5,23 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                                QFileDialog)
 from PySide6.QtCore import Qt, QTimer, QRect, QDate, QThread, Signal
 from PySide6.QtGui import QFont, QPainter, QColor, QPen, QBrush, QPixmap
-from services import membresia_service, pago_service, cliente_service
+from services import (membresia_service, pago_service, cliente_service, riesgo_service,
+                      ocupacion_service, presencia_service)
 from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA
 from utils.table_styles import aplicar_estilo_tabla_moderna
+from utils.tareas import al_resolver
 from datetime import date, datetime
 import math, tempfile, os
 from services.inventario_service import obtener_stock_bajo
 
 
+# Horas [desde, hasta) y semanas del mapa de ocupación
+HORAS_MAPA_OCUPACION = (5, 23)
+SEMANAS_MAPA_OCUPACION = 12
+# Cada cuánto se cierran las visitas que superan la duración máxima
+INTERVALO_CIERRE_VISITAS_MS = 60000
+
+
 class SyncWorker(QThread):
     """Hilo que ejecuta la sincronización con Google Drive sin bloquear la UI"""
     terminado = Signal(bool, str)  # (exito, mensaje)
@@ -360,6 +369,9 @@ class SimplePieChart(QWidget):
 
 class DashboardView(QWidget):
     """Vista principal del Dashboard"""
+    # Número de presentes; presencia_service puede avisar desde otro hilo
+    presentes_cambiados = Signal(int)
+
     def __init__(self):
         super().__init__()
         # Estado de filtros
@@ -381,6 +393,14 @@ class DashboardView(QWidget):
         self.timer_reloj = QTimer()
         self.timer_reloj.timeout.connect(self.actualizar_reloj)
         self.timer_reloj.start(1000)
+
+        # Presentes: se actualiza con cada entrada/salida, sin consultar la base
+        self.presentes_cambiados.connect(self.actualizar_presentes)
+        presencia_service.suscribir(self.presentes_cambiados.emit)
+        self.actualizar_presentes(presencia_service.contar_presentes())
+        self.timer_visitas = QTimer()
+        self.timer_visitas.timeout.connect(self.cerrar_visitas_vencidas)
+        self.timer_visitas.start(INTERVALO_CIERRE_VISITAS_MS)
     
     def init_ui(self):
         """Inicializa la interfaz de usuario"""
@@ -654,8 +674,10 @@ class DashboardView(QWidget):
         self.card_vencidas = StatCard("Vencidas", "0", "#e74c3c", "❌")
         self.card_pagos_mes = StatCard("Ingresos", "$0", "#3498db", "💵")
         self.card_stock_bajo = StatCard("Stock bajo", "0", "#e67e22", "⚠️")
+        self.card_presentes = StatCard("Presentes", "0", "#8e44ad", "🏋️")
 
         
+        metricas_layout.addWidget(self.card_presentes)
         metricas_layout.addWidget(self.card_activas)
         metricas_layout.addWidget(self.card_por_vencer)
         metricas_layout.addWidget(self.card_vencidas)
@@ -837,6 +859,77 @@ class DashboardView(QWidget):
         tablas_layout.addWidget(frame_pagos, 2)
         
         layout.addLayout(tablas_layout)
+
+        # Clientes en riesgo de abandono (riesgo_service)
+        frame_riesgo = QFrame()
+        frame_riesgo.setStyleSheet("""
+            QFrame {
+                background-color: #ffffff;
+                border-radius: 10px;
+                border: none;
+            }
+        """)
+        layout_riesgo = QVBoxLayout(frame_riesgo)
+        layout_riesgo.setContentsMargins(15, 15, 15, 15)
+
+        label_riesgo = QLabel("Clientes en Riesgo de Abandono")
+        label_riesgo.setFont(QFont("Arial", 14, QFont.Bold))
+        label_riesgo.setStyleSheet("color: #1a1a1a;")
+        layout_riesgo.addWidget(label_riesgo)
+
+        self.tabla_riesgo = QTableWidget()
+        self.tabla_riesgo.setColumnCount(4)
+        self.tabla_riesgo.setHorizontalHeaderLabels(["Cliente", "Teléfono", "Riesgo", "Motivos"])
+        self.tabla_riesgo.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.tabla_riesgo.horizontalHeader().setStretchLastSection(True)
+        self.tabla_riesgo.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla_riesgo.setSelectionMode(QTableWidget.NoSelection)
+        self.tabla_riesgo.verticalHeader().setVisible(False)
+        self.tabla_riesgo.setMinimumHeight(150)
+        aplicar_estilo_tabla_moderna(self.tabla_riesgo, compacta=True, embebida=True)
+        layout_riesgo.addWidget(self.tabla_riesgo)
+
+        layout.addWidget(frame_riesgo)
+
+        # Ocupación promedio por día de la semana y hora (ocupacion_service)
+        frame_ocupacion = QFrame()
+        frame_ocupacion.setStyleSheet("""
+            QFrame {
+                background-color: #ffffff;
+                border-radius: 10px;
+                border: none;
+            }
+        """)
+        layout_ocupacion = QVBoxLayout(frame_ocupacion)
+        layout_ocupacion.setContentsMargins(15, 15, 15, 15)
+
+        label_ocupacion = QLabel(f"Ocupación Promedio por Hora (últimas {SEMANAS_MAPA_OCUPACION} semanas)")
+        label_ocupacion.setFont(QFont("Arial", 14, QFont.Bold))
+        label_ocupacion.setStyleSheet("color: #1a1a1a;")
+        layout_ocupacion.addWidget(label_ocupacion)
+
+        horas = range(*HORAS_MAPA_OCUPACION)
+        self.tabla_ocupacion = QTableWidget(len(ocupacion_service.DIAS_SEMANA), len(horas))
+        self.tabla_ocupacion.setHorizontalHeaderLabels([f"{h}h" for h in horas])
+        self.tabla_ocupacion.setVerticalHeaderLabels(ocupacion_service.DIAS_SEMANA)
+        self.tabla_ocupacion.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.tabla_ocupacion.verticalHeader().setDefaultSectionSize(30)
+        self.tabla_ocupacion.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla_ocupacion.setSelectionMode(QTableWidget.NoSelection)
+        self.tabla_ocupacion.setShowGrid(False)
+        self.tabla_ocupacion.setMinimumHeight(7 * 30 + 40)
+        # Celdas chicas: el estilo de tabla común usa filas de 52 px y oculta los días
+        self.tabla_ocupacion.setStyleSheet("""
+            QTableWidget { background-color: #ffffff; border: none; font-size: 11px; }
+            QTableWidget::item { padding: 0px; border: 1px solid #ffffff; }
+            QHeaderView::section {
+                background-color: #ffffff; color: #555555; border: none;
+                font-size: 11px; font-weight: bold; padding: 4px;
+            }
+        """)
+        layout_ocupacion.addWidget(self.tabla_ocupacion)
+
+        layout.addWidget(frame_ocupacion)
         
         self.setLayout(layout)
     
@@ -847,6 +940,22 @@ class DashboardView(QWidget):
         time_str = ahora.strftime("%d/%m/%Y  %H:%M:%S")
         self.label_reloj.setText("🕐 " + time_str)
 
+    def actualizar_presentes(self, cantidad):
+        """Muestra cuántos clientes están dentro ahora"""
+        self.card_presentes.actualizar_valor(cantidad)
+
+    def cerrar_visitas_vencidas(self):
+        """Cierra las visitas sin salida que superan la duración máxima; la
+        escritura va a la cola, sin bloquear la interfaz"""
+        try:
+            futuro = presencia_service.cerrar_visitas_vencidas()
+        except Exception as e:
+            print(f"Error cerrando visitas vencidas: {e}")
+            return
+        if futuro is not None:
+            al_resolver(futuro, al_fallar=lambda e: print(f"Error cerrando visitas vencidas: {e}"),
+                        parent=self)
+
     def sincronizar_google_drive(self):
         """Lanza la sincronización en un hilo separado"""
         self.btn_sync.setEnabled(False)
@@ -987,6 +1096,8 @@ class DashboardView(QWidget):
         # Cargar tablas
         self.cargar_tabla_membresias(self.filtro_estado_membresia)
         self.cargar_tabla_pagos()
+        self.cargar_tabla_riesgo()
+        self.cargar_mapa_ocupacion()
     
     def filtrar_membresias(self, estado, boton_activo):
         """Filtra las membresías por estado"""
@@ -1094,6 +1205,36 @@ class DashboardView(QWidget):
             metodo_item.setForeground(QColor("#2c3e50"))
             self.tabla_pagos.setItem(i, 3, metodo_item)
     
+    def cargar_tabla_riesgo(self):
+        """Carga el ranking de clientes con mayor riesgo de abandono"""
+        clientes = riesgo_service.listar_en_riesgo(limite=10)
+
+        self.tabla_riesgo.setRowCount(len(clientes))
+        for i, cliente in enumerate(clientes):
+            color = "#e74c3c" if cliente['puntaje'] >= 6 else "#f39c12"
+            valores = [cliente['cliente_nombre'], cliente['cliente_telefono'] or "—",
+                       str(cliente['puntaje']), cliente['motivos']]
+            for col, valor in enumerate(valores):
+                item = QTableWidgetItem(valor)
+                item.setForeground(QColor(color if col == 2 else "#2c3e50"))
+                self.tabla_riesgo.setItem(i, col, item)
+    
+    def cargar_mapa_ocupacion(self):
+        """Pinta el promedio de personas presentes por día de la semana y hora"""
+        mapa = ocupacion_service.obtener_mapa_calor(semanas=SEMANAS_MAPA_OCUPACION)
+        maximo = mapa["maximo"] or 1
+        for fila, valores in enumerate(mapa["valores"]):
+            for col, hora in enumerate(range(*HORAS_MAPA_OCUPACION)):
+                valor = valores[hora]
+                item = QTableWidgetItem(f"{valor:.0f}" if valor else "")
+                item.setTextAlignment(Qt.AlignCenter)
+                intensidad = valor / maximo
+                item.setBackground(QColor(44, 111, 173, int(15 + 225 * intensidad)))
+                item.setForeground(QColor("#ffffff" if intensidad > 0.55 else "#2c3e50"))
+                item.setToolTip(f"{ocupacion_service.DIAS_SEMANA[fila]} {hora}:00 — "
+                                f"{valor:.1f} personas en promedio")
+                self.tabla_ocupacion.setItem(fila, col, item)
+    
     # ==================== EXPORTAR PDF ====================
     def exportar_dashboard_pdf(self):
         """Exporta los datos visibles del dashboard a un PDF"""
@@ -6,16 +6,20 @@ from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTabWidget,
     QTableWidget, QTableWidgetItem, QHeaderView, QFrame, QFormLayout,
     QLineEdit, QDateEdit, QComboBox, QMessageBox, QSizePolicy, QGridLayout,
-    QScrollArea, QSpacerItem, QToolTip, QSpinBox,
+    QScrollArea, QSpacerItem, QToolTip, QSpinBox, QApplication,
 )
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QFont, QColor, QPainter, QCursor
 from PySide6.QtCharts import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis, QValueAxis
 
-from services import finanzas_service
-from utils.iconos_ui import crear_boton_icono, crear_widget_centrado
+from services import finanzas_service, escritura_service
+from utils.iconos_ui import crear_widget_centrado
 from utils.table_styles import aplicar_estilo_tabla_moderna
-from utils.table_utils import limpiar_tabla
+from utils.busqueda_diferida import BuscadorDiferido
+from utils.carga_pestanas import CargadorPestanas
+from utils.table_utils import limpiar_tabla, CargadorPaginado
+from utils.tareas import ejecutar_en_segundo_plano, al_resolver
+from utils.delegados_tabla import DelegadoAcciones, DelegadoTextoColor, item_acciones
 from utils.validators import crear_validador_numerico_decimal
 
 
@@ -144,6 +148,19 @@ def _limpiar_rango(parent, desde_attr, hasta_attr, callback):
     callback()
 
 
+def _reemplazar_valores(barset, valores):
+    """Deja en `barset` exactamente `valores`, reemplazando en el lugar los
+    que ya existen y agregando o quitando solo la diferencia."""
+    actuales = barset.count()
+    for i, valor in enumerate(valores[:actuales]):
+        if barset.at(i) != valor:
+            barset.replace(i, valor)
+    if len(valores) > actuales:
+        barset.append(valores[actuales:])
+    elif len(valores) < actuales:
+        barset.remove(len(valores), actuales - len(valores))
+
+
 def _qdate_to_date(qd):
     return date(qd.year(), qd.month(), qd.day())
 
@@ -181,10 +198,22 @@ class FinanzasView(QWidget):
             QTabBar::tab:hover { background:#e0e0e0; }
         """)
 
-        self.tabs.addTab(self._crear_tab_resumen(), "📊 Resumen")
-        self.tabs.addTab(self._crear_tab_ingresos(), "💵 Ingresos")
-        self.tabs.addTab(self._crear_tab_egresos(), "💸 Egresos")
-        self.tabs.addTab(self._crear_tab_reportes(), "📄 Reportes")
+        tab_resumen = self._crear_tab_resumen()
+        tab_ingresos = self._crear_tab_ingresos()
+        tab_egresos = self._crear_tab_egresos()
+        tab_reportes = self._crear_tab_reportes()
+        self.tabs.addTab(tab_resumen, "📊 Resumen")
+        self.tabs.addTab(tab_ingresos, "💵 Ingresos")
+        self.tabs.addTab(tab_egresos, "💸 Egresos")
+        self.tabs.addTab(tab_reportes, "📄 Reportes")
+
+        # Solo se carga la pestaña visible; el resto al mostrarse si su
+        # fuente de datos cambió desde la última carga.
+        self._pestanas = CargadorPestanas(self.tabs)
+        self._pestanas.registrar(tab_resumen, self._cargar_resumen, ("pagos", "egresos", "membresias"))
+        self._pestanas.registrar(tab_ingresos, self._cargar_ingresos, ("pagos",))
+        self._pestanas.registrar(tab_egresos, self._cargar_egresos, ("egresos",))
+        self._pestanas.registrar(tab_reportes, self._generar_reporte, ("pagos", "egresos"))
 
         layout.addWidget(self.tabs)
 
@@ -279,8 +308,17 @@ class FinanzasView(QWidget):
         chart_frame_layout.addWidget(self._chart_pct_lbl)
 
         # ── Serie y ejes ─────────────────────────────────────────────
+        # Los QBarSet se crean una sola vez; _actualizar_grafico reemplaza
+        # sus valores en el lugar.
         self._bar_series = QBarSeries()
         self._bar_series.hovered.connect(self._on_bar_hovered)
+        self._bar_ing = QBarSet("Ingresos")
+        self._bar_ing.setColor(QColor("#27ae60"))
+        self._bar_eg = QBarSet("Egresos")
+        self._bar_eg.setColor(QColor("#e74c3c"))
+        self._bar_series.append(self._bar_ing)
+        self._bar_series.append(self._bar_eg)
+        self._chart_labels = []
 
         self._chart = QChart()
         self._chart.addSeries(self._bar_series)
@@ -382,7 +420,8 @@ class FinanzasView(QWidget):
                         background:#f5f5f5; font-size:13px; color:#2c2c2c; }
             QLineEdit:focus { border:2px solid #c0c0c0; }
         """)
-        self.ing_buscar.textChanged.connect(self._cargar_ingresos)
+        self._buscador_ingresos = BuscadorDiferido(self.ing_buscar, self._preparar_busqueda_ingresos,
+                                                   self._mostrar_ingresos, campos=("cliente_nombre",))
         filtros.addWidget(self.ing_buscar)
 
         layout.addLayout(filtros)
@@ -395,7 +434,12 @@ class FinanzasView(QWidget):
         self.tabla_ingresos.setEditTriggers(QTableWidget.NoEditTriggers)
         self.tabla_ingresos.setSelectionMode(QTableWidget.NoSelection)
         self.tabla_ingresos.setAlternatingRowColors(False)
+        self.tabla_ingresos.setSortingEnabled(True)
         aplicar_estilo_tabla_moderna(self.tabla_ingresos)
+        self._paginador_ingresos = CargadorPaginado(self.tabla_ingresos, self._agregar_filas_ingresos)
+        DelegadoTextoColor(self.tabla_ingresos, 4, "#27ae60")
+        DelegadoAcciones(self.tabla_ingresos, 5, [("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(lambda _accion, pid: self._eliminar_ingreso(pid))
         layout.addWidget(self.tabla_ingresos)
 
         self.ing_total_lbl = _label_total("Total: $0.00")
@@ -537,6 +581,9 @@ class FinanzasView(QWidget):
         self.tabla_egresos.setSelectionMode(QTableWidget.NoSelection)
         self.tabla_egresos.setAlternatingRowColors(False)
         aplicar_estilo_tabla_moderna(self.tabla_egresos)
+        DelegadoTextoColor(self.tabla_egresos, 5, "#e74c3c")
+        DelegadoAcciones(self.tabla_egresos, 6, [("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(lambda _accion, eid: self._eliminar_egreso(eid))
         layout.addWidget(self.tabla_egresos)
 
         self.eg_total_lbl = _label_total("Total: $0.00")
@@ -749,11 +796,9 @@ class FinanzasView(QWidget):
     # ── cargar_datos público ──────────────────────────────────────
 
     def cargar_datos(self):
-        """Recarga todas las pestañas."""
-        self._cargar_resumen()
-        self._cargar_ingresos()
-        self._cargar_egresos()
-        self._generar_reporte()
+        """Recarga la pestaña visible; las demás quedan desactualizadas y se
+        recargan al mostrarse (los datos pudieron cambiar en otras vistas)."""
+        self._pestanas.invalidar()
 
     # ── Lógica pestaña Resumen ────────────────────────────────────
 
@@ -843,20 +888,12 @@ class FinanzasView(QWidget):
             datos = comparacion[:mes_hasta]
             labels = self._MESES_CORTOS[:mes_hasta]
 
-        # Reconstruir serie
-        self._bar_series.clear()
-        bar_ing = QBarSet("Ingresos")
-        bar_ing.setColor(QColor("#27ae60"))
-        bar_eg = QBarSet("Egresos")
-        bar_eg.setColor(QColor("#e74c3c"))
-        for d in datos:
-            bar_ing.append(d["ingresos"])
-            bar_eg.append(d["egresos"])
-        self._bar_series.append(bar_ing)
-        self._bar_series.append(bar_eg)
-
-        self._chart_axis_x.clear()
-        self._chart_axis_x.append(labels)
+        _reemplazar_valores(self._bar_ing, [float(d["ingresos"]) for d in datos])
+        _reemplazar_valores(self._bar_eg, [float(d["egresos"]) for d in datos])
+
+        if labels != self._chart_labels:
+            self._chart_labels = labels
+            self._chart_axis_x.setCategories(labels)
 
         max_val = max((max(d["ingresos"], d["egresos"]) for d in datos), default=0)
         self._chart_axis_y.setRange(0, max_val * 1.2 if max_val > 0 else 100)
@@ -890,38 +927,40 @@ class FinanzasView(QWidget):
     # ── Lógica pestaña Ingresos ───────────────────────────────────
 
     def _cargar_ingresos(self):
+        self._buscador_ingresos.buscar_ahora()
+
+    def _preparar_busqueda_ingresos(self, texto):
         fecha_desde = _qdate_to_date(self.ing_desde.date())
         fecha_hasta = _qdate_to_date(self.ing_hasta.date())
-        cliente = self.ing_buscar.text().strip()
-
-        pagos = finanzas_service.listar_ingresos(
-            fecha_desde=fecha_desde, fecha_hasta=fecha_hasta,
-            cliente=cliente if cliente else None)
+        cliente = texto or None
+        self._filtros_ingresos = (fecha_desde, fecha_hasta, cliente)
+        return lambda cursor: finanzas_service.listar_ingresos_pagina(
+            cursor, fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, cliente=cliente)
+
+    def _mostrar_ingresos(self, filas, siguiente, consultar):
+        self._paginador_ingresos.reiniciar(consultar, (filas, siguiente))
+        if siguiente is None:
+            # Listado completo: el total sale de las filas sin otra consulta
+            total = sum(p['monto'] for p in filas)
+        else:
+            fecha_desde, fecha_hasta, cliente = self._filtros_ingresos
+            total = finanzas_service.calcular_total_ingresos(fecha_desde, fecha_hasta, cliente=cliente)
+        self.ing_total_lbl.setText(f"Total: ${total:,.2f}")
 
-        self.tabla_ingresos.setSortingEnabled(False)
-        limpiar_tabla(self.tabla_ingresos)
-        self.tabla_ingresos.setRowCount(len(pagos))
+    def _agregar_filas_ingresos(self, pagos):
+        inicio = self.tabla_ingresos.rowCount()
+        self.tabla_ingresos.setRowCount(inicio + len(pagos))
 
-        total = 0.0
-        for i, p in enumerate(pagos):
+        for i, p in enumerate(pagos, start=inicio):
             self.tabla_ingresos.setRowHeight(i, 48)
-            total += p["monto"]
             for col, val in enumerate([p["fecha"], p["cliente_nombre"],
                                         p["concepto"], p["metodo"]]):
                 item = QTableWidgetItem(str(val))
                 item.setForeground(QColor("#1a1a1a"))
                 self.tabla_ingresos.setItem(i, col, item)
 
-            monto_item = QTableWidgetItem(f"${p['monto']:,.2f}")
-            monto_item.setForeground(QColor("#27ae60"))
-            self.tabla_ingresos.setItem(i, 4, monto_item)
-
-            btn_del = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_del.clicked.connect(lambda checked, pid=p["id"]: self._eliminar_ingreso(pid))
-            self.tabla_ingresos.setCellWidget(i, 5, crear_widget_centrado(btn_del))
-
-        self.tabla_ingresos.setSortingEnabled(True)
-        self.ing_total_lbl.setText(f"Total: ${total:,.2f}")
+            self.tabla_ingresos.setItem(i, 4, QTableWidgetItem(f"${p['monto']:,.2f}"))
+            self.tabla_ingresos.setItem(i, 5, item_acciones(p["id"]))
 
     def _eliminar_ingreso(self, pago_id):
         msg = QMessageBox(self)
@@ -933,8 +972,7 @@ class FinanzasView(QWidget):
             try:
                 from services import pago_service
                 pago_service.eliminar_pago(pago_id)
-                self._cargar_ingresos()
-                self._cargar_resumen()
+                self._pestanas.invalidar("pagos", "membresias")
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
 
@@ -977,7 +1015,7 @@ class FinanzasView(QWidget):
             QMessageBox.warning(self, "Error", "Ingrese un monto válido mayor a 0.")
             return
 
-        finanzas_service.registrar_egreso(fecha, categoria, descripcion, proveedor, metodo, monto)
+        futuro = escritura_service.registrar_egreso(fecha, categoria, descripcion, proveedor, metodo, monto)
 
         # Limpiar formulario
         self.eg_descripcion.clear()
@@ -985,8 +1023,12 @@ class FinanzasView(QWidget):
         self.eg_monto.clear()
         self.eg_fecha.setDate(QDate.currentDate())
 
-        self._cargar_egresos()
-        self._cargar_resumen()
+        al_resolver(futuro, self._on_egreso_registrado,
+                    lambda e: QMessageBox.critical(self, "Error", f"No se pudo registrar el gasto: {e}"),
+                    parent=self)
+
+    def _on_egreso_registrado(self, _egreso_id):
+        self._pestanas.invalidar("egresos")
 
         msg = QMessageBox(self)
         msg.setWindowTitle("Éxito")
@@ -1016,13 +1058,8 @@ class FinanzasView(QWidget):
                 item.setForeground(QColor("#1a1a1a"))
                 self.tabla_egresos.setItem(i, col, item)
 
-            monto_item = QTableWidgetItem(f"${e['monto']:,.2f}")
-            monto_item.setForeground(QColor("#e74c3c"))
-            self.tabla_egresos.setItem(i, 5, monto_item)
-
-            btn_del = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_del.clicked.connect(lambda checked, eid=e["id"]: self._eliminar_egreso(eid))
-            self.tabla_egresos.setCellWidget(i, 6, crear_widget_centrado(btn_del))
+            self.tabla_egresos.setItem(i, 5, QTableWidgetItem(f"${e['monto']:,.2f}"))
+            self.tabla_egresos.setItem(i, 6, item_acciones(e["id"]))
 
         self.tabla_egresos.setSortingEnabled(True)
         self.eg_total_lbl.setText(f"Total: ${total:,.2f}")
@@ -1036,8 +1073,7 @@ class FinanzasView(QWidget):
         if msg.exec() == QMessageBox.Yes:
             try:
                 finanzas_service.eliminar_egreso(egreso_id)
-                self._cargar_egresos()
-                self._cargar_resumen()
+                self._pestanas.invalidar("egresos")
             except Exception as e:
                 QMessageBox.critical(self, "Error", str(e))
 
@@ -1086,7 +1122,7 @@ class FinanzasView(QWidget):
         """Abre el diálogo de nueva membresía pre-cargado con el cliente."""
         try:
             from views.membresias_view import AgregarMembresiaDialog
-            from services import membresia_service, pago_service, cliente_service
+            from services import pago_service, cliente_service
             from utils.factura_generator import generar_factura_membresia, abrir_factura
 
             dialog = AgregarMembresiaDialog(self)
@@ -1098,40 +1134,35 @@ class FinanzasView(QWidget):
 
             if dialog.exec():
                 datos = dialog.obtener_datos()
-                from services import pago_service as ps
-                from datetime import date as _date
-
                 metodo = (datos.get("metodo_pago") or "Efectivo").strip() or "Efectivo"
-                ok_pago, pago_id = ps.crear_pago(
-                    cliente_id=datos["cliente_id"],
-                    monto=datos["monto"],
-                    metodo=metodo,
-                    fecha_pago=datos["fecha_inicio"],
-                    concepto="Pago de membresía",
-                )
-                if not ok_pago:
-                    QMessageBox.warning(self, "Error", f"Error al registrar pago: {pago_id}")
-                    return
-
-                membresia_id = membresia_service.crear_membresia(
+                futuro = escritura_service.crear_membresia_con_pago(
                     cliente_id=datos["cliente_id"],
                     tipo=datos.get("tipo", "Mensualidad"),
                     fecha_inicio=datos["fecha_inicio"],
                     monto=datos["monto"],
-                    pago_id=pago_id,
+                    metodo=metodo,
                 )
-
-                self._cargar_morosos()
-                self._cargar_resumen()
-
-                msg = QMessageBox(self)
-                msg.setWindowTitle("Membresía renovada")
-                msg.setText(f"Membresía de {cliente_nombre} renovada exitosamente.")
-                msg.exec()
+                al_resolver(futuro, lambda r: self._on_renovacion(r, cliente_nombre),
+                            lambda e: QMessageBox.critical(self, "Error", f"Error al renovar: {e}"),
+                            parent=self)
 
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error al renovar: {str(e)}")
 
+    def _on_renovacion(self, resultado, cliente_nombre):
+        ok, membresia_id = resultado
+        if not ok:
+            QMessageBox.warning(self, "Error", membresia_id)
+            return
+
+        self._cargar_morosos()
+        self._pestanas.invalidar("pagos", "membresias")
+
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Membresía renovada")
+        msg.setText(f"Membresía de {cliente_nombre} renovada exitosamente.")
+        msg.exec()
+
     # ── Lógica pestaña Reportes ───────────────────────────────────
 
     def _get_año_mes_rpt(self):
@@ -1155,7 +1186,7 @@ class FinanzasView(QWidget):
 
         # Ingresos
         ingresos = finanzas_service.listar_ingresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
-        total_i = sum(p["monto"] for p in ingresos)
+        total_i = finanzas_service.calcular_total_ingresos(fecha_desde, fecha_hasta)
         self.tabla_rpt_ingresos.setSortingEnabled(False)
         limpiar_tabla(self.tabla_rpt_ingresos)
         self.tabla_rpt_ingresos.setRowCount(len(ingresos))
@@ -1170,7 +1201,8 @@ class FinanzasView(QWidget):
 
         # Egresos
         egresos = finanzas_service.listar_egresos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
-        total_e = sum(e["monto"] for e in egresos)
+        # listar_egresos se corta en 2000 filas; el total cubre todo el período
+        total_e = finanzas_service.calcular_total_egresos(fecha_desde, fecha_hasta)
         self.tabla_rpt_egresos.setSortingEnabled(False)
         limpiar_tabla(self.tabla_rpt_egresos)
         self.tabla_rpt_egresos.setRowCount(len(egresos))
@@ -1227,67 +1259,51 @@ class FinanzasView(QWidget):
 
         self.tabla_comparacion.setSortingEnabled(True)
 
-    def _exportar_pdf_diario(self, date_edit=None):
-        qd = (date_edit or self.rpt_dia_top).date()
-        fecha = date(qd.year(), qd.month(), qd.day())
-        try:
-            ruta = finanzas_service.exportar_pdf_reporte_diario(fecha=fecha)
+    def _exportar(self, generar, titulo, texto_abrir, abrir):
+        """Genera el archivo en segundo plano (sobre una instantánea de la
+        base) y al terminar ofrece abrirlo."""
+        QApplication.setOverrideCursor(Qt.BusyCursor)
+
+        def _al_terminar(ruta):
+            QApplication.restoreOverrideCursor()
             msg = QMessageBox(self)
-            msg.setWindowTitle("PDF diario generado")
+            msg.setWindowTitle(titulo)
             msg.setText(f"Archivo guardado en:\n{ruta}")
-            btn_abrir = msg.addButton("Abrir PDF", QMessageBox.ActionRole)
+            btn_abrir = msg.addButton(texto_abrir, QMessageBox.ActionRole)
             msg.addButton("Cerrar", QMessageBox.RejectRole)
             msg.exec()
             if msg.clickedButton() == btn_abrir:
-                _abrir_archivo(ruta)
-        except Exception as e:
+                abrir(ruta)
+
+        def _al_fallar(e):
+            QApplication.restoreOverrideCursor()
             QMessageBox.critical(self, "Error", str(e))
 
+        ejecutar_en_segundo_plano(generar, _al_terminar, _al_fallar, parent=self)
+
+    def _exportar_pdf_diario(self, date_edit=None):
+        qd = (date_edit or self.rpt_dia_top).date()
+        fecha = date(qd.year(), qd.month(), qd.day())
+        self._exportar(lambda: finanzas_service.exportar_pdf_reporte_diario(fecha=fecha),
+                       "PDF diario generado", "Abrir PDF", _abrir_archivo)
+
     def _exportar_excel_diario(self, date_edit=None):
         qd = (date_edit or self.rpt_dia_top).date()
         fecha = date(qd.year(), qd.month(), qd.day())
-        try:
-            ruta = finanzas_service.exportar_excel_reporte_diario(fecha=fecha)
-            msg = QMessageBox(self)
-            msg.setWindowTitle("Excel diario generado")
-            msg.setText(f"Archivo guardado en:\n{ruta}")
-            btn_abrir = msg.addButton("Abrir carpeta", QMessageBox.ActionRole)
-            msg.addButton("Cerrar", QMessageBox.RejectRole)
-            msg.exec()
-            if msg.clickedButton() == btn_abrir:
-                _abrir_carpeta(ruta)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        self._exportar(lambda: finanzas_service.exportar_excel_reporte_diario(fecha=fecha),
+                       "Excel diario generado", "Abrir carpeta", _abrir_carpeta)
 
     def _exportar_excel(self):
         año, mes = self._get_año_mes_rpt()
-        try:
-            ruta = finanzas_service.exportar_excel_reporte(año=año, mes=mes or date.today().month)
-            msg = QMessageBox(self)
-            msg.setWindowTitle("Excel generado")
-            msg.setText(f"Archivo guardado en:\n{ruta}")
-            btn_abrir = msg.addButton("Abrir carpeta", QMessageBox.ActionRole)
-            msg.addButton("Cerrar", QMessageBox.RejectRole)
-            msg.exec()
-            if msg.clickedButton() == btn_abrir:
-                _abrir_carpeta(ruta)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        mes = mes or date.today().month
+        self._exportar(lambda: finanzas_service.exportar_excel_reporte(año=año, mes=mes),
+                       "Excel generado", "Abrir carpeta", _abrir_carpeta)
 
     def _exportar_pdf(self):
         año, mes = self._get_año_mes_rpt()
-        try:
-            ruta = finanzas_service.exportar_pdf_reporte(año=año, mes=mes or date.today().month)
-            msg = QMessageBox(self)
-            msg.setWindowTitle("PDF generado")
-            msg.setText(f"Archivo guardado en:\n{ruta}")
-            btn_abrir = msg.addButton("Abrir PDF", QMessageBox.ActionRole)
-            msg.addButton("Cerrar", QMessageBox.RejectRole)
-            msg.exec()
-            if msg.clickedButton() == btn_abrir:
-                _abrir_archivo(ruta)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        mes = mes or date.today().month
+        self._exportar(lambda: finanzas_service.exportar_pdf_reporte(año=año, mes=mes),
+                       "PDF generado", "Abrir PDF", _abrir_archivo)
 
 
 # ─────────────────────────── helpers OS ──────────────────────────
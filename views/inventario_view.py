@@ -3,12 +3,12 @@ from PySide6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                                QTableWidget, QTableWidgetItem, QHeaderView, QLabel,
                                QDialog, QFormLayout, QLineEdit, QComboBox,
                                QMessageBox, QDialogButtonBox, QSpinBox, QDoubleSpinBox)
-from PySide6.QtCore import Qt
 from PySide6.QtGui import QFont, QColor
 from services import inventario_service
-from utils.iconos_ui import crear_boton_icono, crear_widget_centrado
 from utils.table_styles import aplicar_estilo_tabla_moderna
+from utils.busqueda_diferida import BuscadorDiferido
 from utils.table_utils import limpiar_tabla
+from utils.delegados_tabla import DelegadoAcciones, DelegadoTextoColor, item_acciones
 from utils.validators import crear_validador_nombre, crear_validador_entero, crear_validador_numerico_decimal
 
 
@@ -215,7 +215,9 @@ class InventarioView(QWidget):
                 border: 2px solid #c0c0c0;
             }
         """)
-        self.buscar_input.textChanged.connect(self.cargar_datos)
+        self._buscador = BuscadorDiferido(self.buscar_input, self._preparar_busqueda,
+                                          lambda filas, _siguiente, _consultar: self._llenar_tabla(filas),
+                                          campos=("nombre",))
         header_layout.addWidget(self.buscar_input)
         
         btn_agregar = QPushButton("Agregar Producto")
@@ -304,6 +306,10 @@ class InventarioView(QWidget):
         self.tabla.verticalHeader().setVisible(False)
 
         aplicar_estilo_tabla_moderna(self.tabla)
+        DelegadoTextoColor(self.tabla, 2)
+        DelegadoAcciones(self.tabla, 4, [("editar", "edit.svg", "Editar"),
+                                         ("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(self._on_accion_producto)
         
         layout.addWidget(self.tabla)
         
@@ -311,9 +317,14 @@ class InventarioView(QWidget):
     
     def cargar_datos(self):
         """Carga los productos en la tabla"""
-        buscar = self.buscar_input.text() if hasattr(self, 'buscar_input') else ""
-        productos = inventario_service.listar_productos(buscar=buscar, categoria=self.filtro_categoria)
+        self._buscador.buscar_ahora()
 
+    def _preparar_busqueda(self, texto):
+        categoria = self.filtro_categoria
+        return lambda _cursor: (inventario_service.listar_productos(buscar=texto, categoria=categoria), None)
+
+    def _llenar_tabla(self, productos):
+        """Reemplaza el contenido de la tabla por la lista de productos"""
         sorting_enabled = self.tabla.isSortingEnabled()
         self.tabla.setSortingEnabled(False)
 
@@ -344,26 +355,18 @@ class InventarioView(QWidget):
             precio_item = QTableWidgetItem(f"${producto['precio']:.2f}")
             self.tabla.setItem(i, 3, precio_item)
 
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
-            btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-            btn_editar.clicked.connect(lambda checked, p=producto: self.editar_producto(p))
-            acciones_layout.addWidget(btn_editar)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, pid=producto['id']: self.eliminar_producto(pid))
-            acciones_layout.addWidget(btn_eliminar)
-            
-            self.tabla.setCellWidget(i, 4, acciones_widget)
+            # Editar / Eliminar (botones pintados por DelegadoAcciones)
+            self.tabla.setItem(i, 4, item_acciones(producto))
 
         self.tabla.setSortingEnabled(sorting_enabled)
     
+    def _on_accion_producto(self, accion, producto):
+        """Despacha los botones de la columna Acciones"""
+        if accion == "editar":
+            self.editar_producto(producto)
+        elif accion == "eliminar":
+            self.eliminar_producto(producto['id'])
+
     def cambiar_filtro_categoria(self, categoria, boton_activo):
         """Cambia el filtro de categoría"""
         # Desmarcar todos los botones
@@ -0,0 +1,135 @@
+"""Vista de check-in por QR / código de barras (modo kiosco)"""
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QLabel, QLineEdit, QFrame
+from PySide6.QtCore import Qt, QTimer, Signal
+from PySide6.QtGui import QFont
+from services import kiosco_service, presencia_service
+from utils.tareas import al_resolver
+
+
+# Milisegundos que queda visible el resultado de un escaneo
+DURACION_RESULTADO_MS = 4000
+
+_COLOR_ACEPTADO = "#27ae60"
+_COLOR_AVISO = "#f39c12"
+_COLOR_DENEGADO = "#e74c3c"
+_COLOR_ESPERA = "#2c3e50"
+
+
+class KioscoView(QWidget):
+    """Vista de entrada: el lector escribe el código y un Enter"""
+    # La asistencia se escribe en otro hilo, que avisa el nuevo número de presentes
+    presentes_cambiados = Signal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.init_ui()
+        self.presentes_cambiados.connect(self.actualizar_presentes)
+        presencia_service.suscribir(self.presentes_cambiados.emit)
+        self.timer_limpiar = QTimer(self)
+        self.timer_limpiar.setSingleShot(True)
+        self.timer_limpiar.timeout.connect(self.mostrar_espera)
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+        layout.setContentsMargins(20, 20, 20, 20)
+        layout.setSpacing(15)
+
+        # Encabezado
+        header_layout = QHBoxLayout()
+        titulo = QLabel("Check-in")
+        titulo.setFont(QFont("Arial", 24, QFont.Bold))
+        titulo.setStyleSheet("color: #1a1a1a;")
+        header_layout.addWidget(titulo)
+        header_layout.addStretch()
+        self.label_presentes = QLabel("")
+        self.label_presentes.setStyleSheet("color: #555555; font-size: 14px; font-weight: bold;")
+        header_layout.addWidget(self.label_presentes)
+        layout.addLayout(header_layout)
+
+        # Entrada del lector
+        self.codigo_input = QLineEdit()
+        self.codigo_input.setPlaceholderText("Escanee el código o escriba el teléfono y presione Enter")
+        self.codigo_input.setAlignment(Qt.AlignCenter)
+        self.codigo_input.setStyleSheet("""
+            QLineEdit {
+                padding: 14px;
+                border: 2px solid #d0d0d0;
+                border-radius: 8px;
+                font-size: 22px;
+                color: #1a1a1a;
+                background-color: #ffffff;
+            }
+            QLineEdit:focus {
+                border: 2px solid #2c6fad;
+            }
+        """)
+        self.codigo_input.returnPressed.connect(self.procesar_codigo)
+        layout.addWidget(self.codigo_input)
+
+        # Resultado
+        self.panel_resultado = QFrame()
+        panel_layout = QVBoxLayout(self.panel_resultado)
+        panel_layout.setContentsMargins(30, 40, 30, 40)
+        panel_layout.setSpacing(10)
+        self.label_estado = QLabel()
+        self.label_estado.setAlignment(Qt.AlignCenter)
+        self.label_estado.setFont(QFont("Arial", 40, QFont.Bold))
+        self.label_nombre = QLabel()
+        self.label_nombre.setAlignment(Qt.AlignCenter)
+        self.label_nombre.setFont(QFont("Arial", 28, QFont.Bold))
+        self.label_detalle = QLabel()
+        self.label_detalle.setAlignment(Qt.AlignCenter)
+        self.label_detalle.setFont(QFont("Arial", 18))
+        for label in (self.label_estado, self.label_nombre, self.label_detalle):
+            label.setStyleSheet("color: #ffffff; background-color: transparent;")
+            panel_layout.addWidget(label)
+        layout.addWidget(self.panel_resultado, 1)
+
+        self.setLayout(layout)
+        self.mostrar_espera()
+
+    def cargar_datos(self):
+        """Arma el índice de clientes y deja el foco en la entrada"""
+        kiosco_service.cargar_indice()
+        self.actualizar_presentes(presencia_service.contar_presentes())
+        self.codigo_input.setFocus()
+
+    def actualizar_presentes(self, cantidad):
+        self.label_presentes.setText(f"🏋️ {cantidad} dentro")
+
+    def _pintar(self, color, estado, nombre="", detalle=""):
+        self.panel_resultado.setStyleSheet(f"QFrame {{ background-color: {color}; border-radius: 16px; }}")
+        self.label_estado.setText(estado)
+        self.label_nombre.setText(nombre)
+        self.label_detalle.setText(detalle)
+
+    def mostrar_espera(self):
+        self._pintar(_COLOR_ESPERA, "Bienvenido", "", "Acerque su código al lector")
+
+    def procesar_codigo(self):
+        """Resuelve el código en memoria, muestra el resultado y encola la asistencia"""
+        codigo = self.codigo_input.text()
+        self.codigo_input.clear()
+        if not codigo.strip():
+            return
+        resultado = kiosco_service.resolver(codigo)
+        nombre = resultado["nombre"] or ""
+        if not resultado["permitido"]:
+            self._pintar(_COLOR_DENEGADO, "✖ Acceso denegado", nombre, resultado["motivo"])
+        else:
+            futuro = kiosco_service.registrar_entrada(resultado["cliente_id"])
+            if futuro is None:
+                self._pintar(_COLOR_ACEPTADO, "✔ Ya registrado", nombre, "Ya está dentro del gimnasio")
+            else:
+                color = _COLOR_AVISO if resultado["alerta"] else _COLOR_ACEPTADO
+                self._pintar(color, "✔ Bienvenido", nombre, resultado["motivo"])
+                al_resolver(futuro,
+                            lambda r: None if r[0] else self._mostrar_error_registro(nombre, r[1]),
+                            lambda e: self._mostrar_error_registro(nombre, str(e)), parent=self)
+        self.timer_limpiar.start(DURACION_RESULTADO_MS)
+
+    def _mostrar_error_registro(self, nombre, mensaje):
+        """La asistencia no se guardó: se avisa en lugar del saludo"""
+        self._pintar(_COLOR_DENEGADO, "⚠ Entrada no registrada", nombre,
+                     f"{mensaje}. Avise en recepción")
+        self.timer_limpiar.start(DURACION_RESULTADO_MS)
@@ -7,12 +7,14 @@ from PySide6.QtCore import Qt, QDate, QObject, QEvent
 from PySide6.QtGui import QFont, QColor
 from datetime import date
 from pathlib import Path
-from services import membresia_service, cliente_service
+from services import membresia_service, cliente_service, escritura_service
 from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA
 from utils.factura_generator import generar_factura_membresia, abrir_factura
-from utils.iconos_ui import crear_boton_icono, crear_widget_centrado
 from utils.table_styles import aplicar_estilo_tabla_moderna
-from utils.table_utils import limpiar_tabla
+from utils.busqueda_diferida import BuscadorDiferido
+from utils.table_utils import CargadorPaginado
+from utils.tareas import al_resolver
+from utils.delegados_tabla import DelegadoAcciones, DelegadoTextoColor, item_acciones
 from utils.validators import crear_validador_numerico_decimal
 
 
@@ -460,7 +462,10 @@ class MembresiasView(QWidget):
             }
             QLineEdit:focus { border: 2px solid #c0c0c0; }
         """)
-        self.search_cliente.textChanged.connect(self.cargar_datos)
+        self._buscador = BuscadorDiferido(
+            self.search_cliente, self._preparar_busqueda,
+            lambda filas, siguiente, consultar: self._paginador.reiniciar(consultar, (filas, siguiente)),
+            campos=("cliente_nombre",))
         header_layout.addWidget(self.search_cliente)
         
         btn_agregar = QPushButton("Agregar Membresía")
@@ -652,6 +657,14 @@ class MembresiasView(QWidget):
         self.tabla.setSortingEnabled(True)
         self.tabla.setAlternatingRowColors(False)
         aplicar_estilo_tabla_moderna(self.tabla)
+        DelegadoTextoColor(self.tabla, 4, "#27ae60")
+        DelegadoTextoColor(self.tabla, 5)
+        DelegadoAcciones(self.tabla, 6, [("factura", "see.svg", "Ver Factura")]
+                         ).accion_activada.connect(self._on_accion_membresia)
+        DelegadoAcciones(self.tabla, 7, [("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(self._on_accion_membresia)
+        
+        self._paginador = CargadorPaginado(self.tabla, self._agregar_filas_membresias)
         
         layout.addWidget(self.tabla)
         
@@ -691,31 +704,27 @@ class MembresiasView(QWidget):
         self.cargar_datos()
     
     def cargar_datos(self):
-        """Carga los datos de membresías con filtros de estado y fecha"""
-        if self.filtro_actual == "Todos":
-            membresias = membresia_service.listar_membresias()
-        else:
-            membresias = membresia_service.listar_membresias(estado=self.filtro_actual)
-        
-        # Aplicar filtro de fecha (por fecha de vencimiento)
+        """Carga las membresías con los filtros de estado, fecha de vencimiento
+        y nombre de cliente (resueltos en SQL), página a página"""
+        self._buscador.buscar_ahora()
+
+    def _preparar_busqueda(self, texto_busqueda):
+        filtros = {}
+        if self.filtro_actual != "Todos":
+            filtros['estado'] = self.filtro_actual
         if self.filtro_fecha_desde and self.filtro_fecha_hasta:
-            membresias = [
-                m for m in membresias
-                if self.filtro_fecha_desde <= date.fromisoformat(m['fecha_vencimiento']) <= self.filtro_fecha_hasta
-            ]
-        
-        # Aplicar filtro por nombre de cliente
-        texto_busqueda = self.search_cliente.text().strip().lower()
+            filtros['vencimiento_desde'] = self.filtro_fecha_desde
+            filtros['vencimiento_hasta'] = self.filtro_fecha_hasta
         if texto_busqueda:
-            membresias = [m for m in membresias if texto_busqueda in m['cliente_nombre'].lower()]
-
-        sorting_enabled = self.tabla.isSortingEnabled()
-        self.tabla.setSortingEnabled(False)
+            filtros['cliente'] = texto_busqueda
+        return lambda cursor: membresia_service.listar_membresias_pagina(cursor, **filtros)
 
-        limpiar_tabla(self.tabla)
-        self.tabla.setRowCount(len(membresias))
+    def _agregar_filas_membresias(self, membresias):
+        """Agrega las membresías al final de la tabla"""
+        inicio = self.tabla.rowCount()
+        self.tabla.setRowCount(inicio + len(membresias))
 
-        for i, membresia in enumerate(membresias):
+        for i, membresia in enumerate(membresias, start=inicio):
             self.tabla.setRowHeight(i, 52)
             # Cliente - color negro
             cliente_item = QTableWidgetItem(membresia['cliente_nombre'])
@@ -737,12 +746,10 @@ class MembresiasView(QWidget):
             vencimiento_item.setForeground(QColor("#1a1a1a"))
             self.tabla.setItem(i, 3, vencimiento_item)
             
-            # Monto - color verde
-            monto_item = QTableWidgetItem(f"${membresia['monto']:,.2f}")
-            monto_item.setForeground(QColor("#27ae60"))
-            self.tabla.setItem(i, 4, monto_item)
+            # Monto - verde (pintado por DelegadoTextoColor)
+            self.tabla.setItem(i, 4, QTableWidgetItem(f"${membresia['monto']:,.2f}"))
             
-            # Colorear estado con widget propio (el QSS de la tabla override setForeground)
+            # Estado con su color (DelegadoTextoColor respeta setForeground)
             if membresia['estado'] == ESTADO_ACTIVA:
                 estado_color = "#27ae60"
             elif membresia['estado'] == ESTADO_POR_VENCER:
@@ -752,39 +759,21 @@ class MembresiasView(QWidget):
             else:
                 estado_color = "#1a1a1a"
 
-            estado_widget = QWidget()
-            estado_widget.setStyleSheet("background: transparent; border: none;")
-            estado_layout = QHBoxLayout(estado_widget)
-            estado_layout.setContentsMargins(12, 0, 8, 0)
-            estado_label = QLabel(membresia['estado'])
-            estado_label.setStyleSheet(
-                f"color: {estado_color}; font-size: 13px; background: transparent; border: none;"
-            )
-            estado_layout.addWidget(estado_label)
-            estado_layout.addStretch()
-            self.tabla.setCellWidget(i, 5, estado_widget)
+            estado_item = QTableWidgetItem(membresia['estado'])
+            estado_item.setForeground(QColor(estado_color))
+            self.tabla.setItem(i, 5, estado_item)
             
-            # Botón Ver Factura
-            btn_ver_factura = crear_boton_icono("see.svg", "#9b59b6", "#8e44ad", "Ver Factura")
-            btn_ver_factura.clicked.connect(lambda checked, m=membresia: self.ver_factura_membresia(m))
-            self.tabla.setCellWidget(i, 6, crear_widget_centrado(btn_ver_factura))
-
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, mid=membresia['id']: self.eliminar_membresia(mid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 7, acciones_widget)
-
-        self.tabla.setSortingEnabled(sorting_enabled)
+            # Ver Factura y Eliminar (botones pintados por DelegadoAcciones)
+            self.tabla.setItem(i, 6, item_acciones(membresia))
+            self.tabla.setItem(i, 7, item_acciones(membresia))
     
+    def _on_accion_membresia(self, accion, membresia):
+        """Despacha los botones de las columnas Factura y Acciones"""
+        if accion == "factura":
+            self.ver_factura_membresia(membresia)
+        elif accion == "eliminar":
+            self.eliminar_membresia(membresia['id'])
+
     def agregar_membresia(self):
         """Abre diálogo para agregar membresía"""
         dialog = AgregarMembresiaDialog(self)
@@ -825,103 +814,104 @@ class MembresiasView(QWidget):
                     msg.exec()
                     return
                 
-                # Importar pago_service aquí para evitar imports circulares
-                from services import pago_service
-
                 metodo_pago = (datos.get('metodo_pago') or "Efectivo").strip() or "Efectivo"
                 
-                # Crear el pago primero
-                ok_pago, pago_id = pago_service.crear_pago(
-                    cliente_id=datos['cliente_id'],
-                    monto=datos['monto'],
-                    metodo=metodo_pago,
-                    fecha_pago=datos['fecha_inicio'],
-                    concepto="Pago de membresía"
-                )
-                if not ok_pago:
-                    raise Exception(f"Error al registrar el pago: {pago_id}")
-                
-                # Crear membresía con el pago_id
-                membresia_id = membresia_service.crear_membresia(
+                # Pago y membresía se guardan juntos en el hilo escritor;
+                # la factura se genera cuando se confirman
+                futuro = escritura_service.crear_membresia_con_pago(
                     cliente_id=datos['cliente_id'],
                     tipo=datos.get('tipo', 'Mensualidad'),
                     fecha_inicio=datos['fecha_inicio'],
                     monto=datos['monto'],
-                    pago_id=pago_id
+                    metodo=metodo_pago
                 )
-                
-                # Obtener datos completos de la membresía
-                membresia = membresia_service.obtener_membresia(membresia_id)
-                cliente = cliente_service.obtener_cliente(datos['cliente_id'])
-                
-                # Generar factura
-                ruta_factura = generar_factura_membresia(membresia, cliente)
-                
-                # Recargar datos
-                self.cargar_datos()
-                
-                # Preguntar si desea ver la factura
-                respuesta_msg = QMessageBox(self)
-                respuesta_msg.setWindowTitle("Membresía Creada")
-                respuesta_msg.setText(f"Membresía creada exitosamente.\nFactura #{membresia_id} generada.\n\n¿Desea abrir la factura?")
-                respuesta_msg.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
-                respuesta_msg.setDefaultButton(QMessageBox.Yes)
-                respuesta_msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: #ffffff;
-                    }
-                    QLabel {
-                        color: #2c2c2c;
-                        font-size: 13px;
-                        min-width: 300px;
-                    }
-                    QPushButton {
-                        background-color: #2c3e50;
-                        color: white;
-                        padding: 8px 20px;
-                        border: none;
-                        border-radius: 4px;
-                        font-weight: bold;
-                        font-size: 13px;
-                        min-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #3d5166;
-                    }
-                """)
-                respuesta = respuesta_msg.exec()
-                
-                if respuesta == QMessageBox.Yes:
-                    abrir_factura(ruta_factura)
+                al_resolver(futuro, self._on_membresia_creada, self._mostrar_error_membresia, parent=self)
                     
             except Exception as e:
-                msg = QMessageBox(self)
-                msg.setWindowTitle("Error")
-                msg.setText(f"Error al crear membresía: {str(e)}")
-                msg.setStyleSheet("""
-                    QMessageBox {
-                        background-color: #f5f5f5;
-                    }
-                    QLabel {
-                        color: #2c2c2c;
-                        font-size: 13px;
-                        min-width: 300px;
-                    }
-                    QPushButton {
-                        background-color: #e74c3c;
-                        color: white;
-                        padding: 8px 20px;
-                        border: none;
-                        border-radius: 4px;
-                        font-weight: bold;
-                        font-size: 13px;
-                        min-width: 80px;
-                    }
-                    QPushButton:hover {
-                        background-color: #c0392b;
-                    }
-                """)
-                msg.exec()
+                self._mostrar_error_membresia(e)
+
+    def _on_membresia_creada(self, resultado):
+        """Genera la factura y avisa cuando la membresía quedó guardada"""
+        ok, membresia_id = resultado
+        if not ok:
+            self._mostrar_error_membresia(membresia_id)
+            return
+        try:
+            # Obtener datos completos de la membresía
+            membresia = membresia_service.obtener_membresia(membresia_id)
+            cliente = cliente_service.obtener_cliente(membresia['cliente_id'])
+
+            # Generar factura
+            ruta_factura = generar_factura_membresia(membresia, cliente)
+
+            # Recargar datos
+            self.cargar_datos()
+
+            # Preguntar si desea ver la factura
+            respuesta_msg = QMessageBox(self)
+            respuesta_msg.setWindowTitle("Membresía Creada")
+            respuesta_msg.setText(f"Membresía creada exitosamente.\nFactura #{membresia_id} generada.\n\n¿Desea abrir la factura?")
+            respuesta_msg.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+            respuesta_msg.setDefaultButton(QMessageBox.Yes)
+            respuesta_msg.setStyleSheet("""
+                QMessageBox {
+                    background-color: #ffffff;
+                }
+                QLabel {
+                    color: #2c2c2c;
+                    font-size: 13px;
+                    min-width: 300px;
+                }
+                QPushButton {
+                    background-color: #2c3e50;
+                    color: white;
+                    padding: 8px 20px;
+                    border: none;
+                    border-radius: 4px;
+                    font-weight: bold;
+                    font-size: 13px;
+                    min-width: 80px;
+                }
+                QPushButton:hover {
+                    background-color: #3d5166;
+                }
+            """)
+            respuesta = respuesta_msg.exec()
+
+            if respuesta == QMessageBox.Yes:
+                abrir_factura(ruta_factura)
+        except Exception as e:
+            self._mostrar_error_membresia(e)
+
+    def _mostrar_error_membresia(self, error):
+        """Mensaje de error al crear una membresía"""
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Error")
+        msg.setText(f"Error al crear membresía: {error}")
+        msg.setStyleSheet("""
+            QMessageBox {
+                background-color: #f5f5f5;
+            }
+            QLabel {
+                color: #2c2c2c;
+                font-size: 13px;
+                min-width: 300px;
+            }
+            QPushButton {
+                background-color: #e74c3c;
+                color: white;
+                padding: 8px 20px;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 13px;
+                min-width: 80px;
+            }
+            QPushButton:hover {
+                background-color: #c0392b;
+            }
+        """)
+        msg.exec()
     
     def editar_membresia(self, membresia):
         """Abre diálogo para editar una membresía"""
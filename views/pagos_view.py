@@ -8,11 +8,14 @@ from PySide6.QtCore import Qt, QDate, QSize, QSortFilterProxyModel, QObject, QEv
 from PySide6.QtGui import QFont, QColor
 from datetime import date
 from services import pago_service, cliente_service, membresia_service
-from services import inventario_service
+from services import inventario_service, escritura_service
 from utils.factura_generator import generar_factura_pago, abrir_factura
-from utils.iconos_ui import crear_boton_icono, crear_widget_centrado, _svg_icon_color as _svg_ic
+from utils.tareas import al_resolver
+from utils.iconos_ui import crear_widget_centrado, _svg_icon_color as _svg_ic
 from utils.table_styles import aplicar_estilo_tabla_moderna
-from utils.table_utils import limpiar_tabla
+from utils.busqueda_diferida import BuscadorDiferido
+from utils.table_utils import CargadorPaginado
+from utils.delegados_tabla import DelegadoAcciones, DelegadoTextoColor, item_acciones
 from utils.validators import crear_validador_numerico_decimal, crear_validador_entero
 from pathlib import Path
 
@@ -685,7 +688,10 @@ class PagosView(QWidget):
             }
             QLineEdit:focus { border: 2px solid #c0c0c0; }
         """)
-        self.search_cliente.textChanged.connect(lambda: self.cargar_datos(limite=500))
+        self._buscador = BuscadorDiferido(
+            self.search_cliente, self._preparar_busqueda,
+            lambda filas, siguiente, consultar: self._paginador.reiniciar(consultar, (filas, siguiente)),
+            campos=("cliente_nombre",))
         header_layout.addWidget(self.search_cliente)
         
         btn_registrar = QPushButton("Registrar Pago")
@@ -742,7 +748,7 @@ class PagosView(QWidget):
         btn_mayor_10 = QPushButton("Mayor a $10")
         btn_ultimos = QPushButton("Últimos 50")
         
-        btn_todos.clicked.connect(lambda: self.cargar_datos(limite=500))
+        btn_todos.clicked.connect(lambda: self.cargar_datos())
         btn_mes.clicked.connect(self.cargar_pagos_mes)
         btn_mayor_10.clicked.connect(self.cargar_pagos_mayores_10)
         btn_ultimos.clicked.connect(lambda: self.cargar_datos(limite=50))
@@ -892,173 +898,68 @@ class PagosView(QWidget):
         self.tabla.setSortingEnabled(True)
         self.tabla.setAlternatingRowColors(False)
         aplicar_estilo_tabla_moderna(self.tabla)
+        self._paginador = CargadorPaginado(self.tabla, self._agregar_filas_pagos)
+        DelegadoTextoColor(self.tabla, 2, "#27ae60")
+        DelegadoAcciones(self.tabla, 5, [("factura", "see.svg", "Ver Factura")]
+                         ).accion_activada.connect(self._on_accion_pago)
+        DelegadoAcciones(self.tabla, 6, [("editar", "edit.svg", "Editar"),
+                                         ("eliminar", "delete.svg", "Eliminar")]
+                         ).accion_activada.connect(self._on_accion_pago)
         
         layout.addWidget(self.tabla)
         
         self.setLayout(layout)
         self.actualizar_total_mes()
     
-    def _filtrar_por_cliente(self, pagos):
-        """Filtra la lista de pagos por el texto ingresado en el buscador de cliente"""
-        texto = self.search_cliente.text().strip().lower()
+    def _filtros_base(self):
+        """Filtros del buscador de cliente y del toggle de membresías"""
+        filtros = {}
+        texto = self.search_cliente.text().strip()
         if texto:
-            return [p for p in pagos if texto in p.get('cliente_nombre', '').lower()]
-        return pagos
-
-    def _filtrar_membresias(self, pagos):
-        """Filtra pagos de membresía según el toggle activo"""
-        if self.mostrar_membresias:
-            return pagos
-        return [p for p in pagos if p.get('concepto', '') != "Pago de membresía"]
+            filtros['cliente'] = texto
+        if not self.mostrar_membresias:
+            filtros['excluir_concepto'] = "Pago de membresía"
+        return filtros
 
     def _toggle_membresias(self):
         """Alterna la visibilidad de pagos de membresía"""
         self.mostrar_membresias = self.btn_mostrar_membresias.isChecked()
         self.cargar_datos()
 
-    def cargar_datos(self, limite=100):
-        """Carga los datos de pagos"""
-        pagos = self._filtrar_membresias(self._filtrar_por_cliente(pago_service.listar_pagos(limite=limite)))
-        sorting_enabled = self.tabla.isSortingEnabled()
-        self.tabla.setSortingEnabled(False)
-
-        limpiar_tabla(self.tabla)
-        self.tabla.setRowCount(len(pagos))
-        
-        for i, pago in enumerate(pagos):
-            self.tabla.setRowHeight(i, 52)
-            # Cliente - negro
-            item_cliente = QTableWidgetItem(pago['cliente_nombre'])
-            item_cliente.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 0, item_cliente)
-            
-            # Fecha - negro
-            item_fecha = QTableWidgetItem(pago['fecha'])
-            item_fecha.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 1, item_fecha)
-            
-            # Monto - verde con widget (setForeground es pisado por el QSS de la tabla)
-            monto_widget = QWidget()
-            monto_widget.setStyleSheet("background: transparent; border: none;")
-            monto_layout = QHBoxLayout(monto_widget)
-            monto_layout.setContentsMargins(12, 0, 8, 0)
-            monto_label = QLabel(f"${pago['monto']:,.2f}")
-            monto_label.setStyleSheet("color: #27ae60; font-size: 13px; background: transparent; border: none;")
-            monto_layout.addWidget(monto_label)
-            monto_layout.addStretch()
-            self.tabla.setCellWidget(i, 2, monto_widget)
-
-            # Método - negro
-            item_metodo = QTableWidgetItem(pago['metodo'])
-            item_metodo.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 3, item_metodo)
-            
-            # Concepto - negro
-            item_concepto = QTableWidgetItem(pago.get('concepto', ''))
-            item_concepto.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 4, item_concepto)
-            
-            # Botón Ver Factura
-            btn_ver_factura = crear_boton_icono("see.svg", "#9b59b6", "#8e44ad", "Ver Factura")
-            btn_ver_factura.clicked.connect(lambda checked, p=pago: self.ver_factura_pago(p))
-            self.tabla.setCellWidget(i, 5, crear_widget_centrado(btn_ver_factura))
-
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
-            if pago.get('concepto', '') != "Pago de membresía":
-                btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-                btn_editar.clicked.connect(lambda checked, p=pago: self.editar_pago(p))
-                acciones_layout.addWidget(btn_editar)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, pid=pago['id']: self.eliminar_pago(pid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 6, acciones_widget)
-
-        self.tabla.setSortingEnabled(sorting_enabled)
+    def _preparar_busqueda(self, _texto):
+        filtros = self._filtros_base()
+        return lambda cursor: pago_service.listar_pagos_pagina(cursor, **filtros)
+
+    def _consultar_pagos(self, **filtros):
+        """Recarga la tabla con los pagos que cumplen los filtros, página a página"""
+        filtros.update(self._filtros_base())
+        # Lo mostrado ya no es el resultado del buscador: no refinar sobre él
+        self._buscador.invalidar()
+        self._paginador.reiniciar(
+            lambda cursor: pago_service.listar_pagos_pagina(cursor, **filtros))
+        return filtros
+
+    def cargar_datos(self, limite=None):
+        """Carga los datos de pagos. Con `limite` muestra solo los últimos N,
+        sin seguir cargando al hacer scroll."""
+        if limite is None:
+            self._buscador.buscar_ahora()
+            return
+        filtros = self._filtros_base()
+        self._buscador.invalidar()
+        self._paginador.reiniciar(
+            lambda cursor: (pago_service.listar_pagos(limite=limite, **filtros), None))
     
     def cargar_pagos_mes(self):
         """Carga solo los pagos del mes actual"""
-        pagos = self._filtrar_membresias(self._filtrar_por_cliente(pago_service.obtener_pagos_del_mes()))
-        sorting_enabled = self.tabla.isSortingEnabled()
-        self.tabla.setSortingEnabled(False)
-
-        limpiar_tabla(self.tabla)
-        self.tabla.setRowCount(len(pagos))
-        
-        for i, pago in enumerate(pagos):
-            self.tabla.setRowHeight(i, 52)
-            # Cliente - negro
-            item_cliente = QTableWidgetItem(pago['cliente_nombre'])
-            item_cliente.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 0, item_cliente)
-            
-            # Fecha - negro
-            item_fecha = QTableWidgetItem(pago['fecha'])
-            item_fecha.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 1, item_fecha)
-            
-            # Monto - verde con widget (setForeground es pisado por el QSS de la tabla)
-            monto_widget = QWidget()
-            monto_widget.setStyleSheet("background: transparent; border: none;")
-            monto_layout = QHBoxLayout(monto_widget)
-            monto_layout.setContentsMargins(12, 0, 8, 0)
-            monto_label = QLabel(f"${pago['monto']:,.2f}")
-            monto_label.setStyleSheet("color: #27ae60; font-size: 13px; background: transparent; border: none;")
-            monto_layout.addWidget(monto_label)
-            monto_layout.addStretch()
-            self.tabla.setCellWidget(i, 2, monto_widget)
-
-            # Método - negro
-            item_metodo = QTableWidgetItem(pago['metodo'])
-            item_metodo.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 3, item_metodo)
-            
-            # Concepto - negro
-            item_concepto = QTableWidgetItem(pago.get('concepto', ''))
-            item_concepto.setForeground(QColor("#1a1a1a"))
-            self.tabla.setItem(i, 4, item_concepto)
-            
-            # Botón Ver Factura
-            btn_ver_factura = crear_boton_icono("see.svg", "#9b59b6", "#8e44ad", "Ver Factura")
-            btn_ver_factura.clicked.connect(lambda checked, p=pago: self.ver_factura_pago(p))
-            self.tabla.setCellWidget(i, 5, crear_widget_centrado(btn_ver_factura))
-
-            # Botones de acciones
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
-            if pago.get('concepto', '') != "Pago de membresía":
-                btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-                btn_editar.clicked.connect(lambda checked, p=pago: self.editar_pago(p))
-                acciones_layout.addWidget(btn_editar)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, pid=pago['id']: self.eliminar_pago(pid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 6, acciones_widget)
-
-        self.tabla.setSortingEnabled(sorting_enabled)
+        fecha_desde, fecha_hasta = pago_service.rango_mes()
+        self._consultar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
 
     def cargar_pagos_mayores_10(self):
         """Carga pagos cuyo monto sea mayor a 10 dólares"""
-        pagos = pago_service.listar_pagos(limite=1000)
-        pagos_filtrados = self._filtrar_por_cliente([p for p in pagos if p.get('monto', 0) > 10])
-
-        self.label_total.setText(f"Total > $10: ${sum(p['monto'] for p in pagos_filtrados):,.2f}")
-        self._poblar_tabla_pagos(pagos_filtrados)
+        # Los montos tienen centavos: "mayor a 10" equivale a >= 10.01
+        filtros = self._consultar_pagos(monto_min=10.01)
+        self.label_total.setText(f"Total > $10: ${pago_service.sumar_pagos(**filtros):,.2f}")
     
     def actualizar_total_mes(self):
         """Actualiza el total de pagos del mes"""
@@ -1076,10 +977,8 @@ class PagosView(QWidget):
             QMessageBox.warning(self, "Error", "La fecha 'Desde' no puede ser mayor que 'Hasta'.")
             return
         
-        pagos = self._filtrar_por_cliente(pago_service.listar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, limite=1000))
-        total_filtrado = sum(p['monto'] for p in pagos)
-        self.label_total.setText(f"Total filtrado: ${total_filtrado:,.2f}")
-        self._poblar_tabla_pagos(pagos)
+        filtros = self._consultar_pagos(fecha_desde=fecha_desde, fecha_hasta=fecha_hasta)
+        self.label_total.setText(f"Total filtrado: ${pago_service.sumar_pagos(**filtros):,.2f}")
     
     def limpiar_filtro_fecha(self):
         """Limpia el filtro de fecha y muestra todos"""
@@ -1088,65 +987,51 @@ class PagosView(QWidget):
         self.cargar_datos()
         self.actualizar_total_mes()
     
-    def _poblar_tabla_pagos(self, pagos):
-        """Llena la tabla con la lista de pagos proporcionada"""
-        pagos = self._filtrar_membresias(pagos)
-        sorting_enabled = self.tabla.isSortingEnabled()
-        self.tabla.setSortingEnabled(False)
-        limpiar_tabla(self.tabla)
-        self.tabla.setRowCount(len(pagos))
+    def _agregar_filas_pagos(self, pagos):
+        """Agrega los pagos al final de la tabla"""
+        inicio = self.tabla.rowCount()
+        self.tabla.setRowCount(inicio + len(pagos))
         
-        for i, pago in enumerate(pagos):
+        for i, pago in enumerate(pagos, start=inicio):
             self.tabla.setRowHeight(i, 52)
+            # Cliente - negro
             item_cliente = QTableWidgetItem(pago['cliente_nombre'])
             item_cliente.setForeground(QColor("#1a1a1a"))
             self.tabla.setItem(i, 0, item_cliente)
             
+            # Fecha - negro
             item_fecha = QTableWidgetItem(pago['fecha'])
             item_fecha.setForeground(QColor("#1a1a1a"))
             self.tabla.setItem(i, 1, item_fecha)
             
-            monto_widget = QWidget()
-            monto_widget.setStyleSheet("background: transparent; border: none;")
-            monto_layout = QHBoxLayout(monto_widget)
-            monto_layout.setContentsMargins(12, 0, 8, 0)
-            monto_label = QLabel(f"${pago['monto']:,.2f}")
-            monto_label.setStyleSheet("color: #27ae60; font-size: 13px; background: transparent; border: none;")
-            monto_layout.addWidget(monto_label)
-            monto_layout.addStretch()
-            self.tabla.setCellWidget(i, 2, monto_widget)
+            # Monto - verde (pintado por DelegadoTextoColor)
+            self.tabla.setItem(i, 2, QTableWidgetItem(f"${pago['monto']:,.2f}"))
 
+            # Método - negro
             item_metodo = QTableWidgetItem(pago['metodo'])
             item_metodo.setForeground(QColor("#1a1a1a"))
             self.tabla.setItem(i, 3, item_metodo)
             
+            # Concepto - negro
             item_concepto = QTableWidgetItem(pago.get('concepto', ''))
             item_concepto.setForeground(QColor("#1a1a1a"))
             self.tabla.setItem(i, 4, item_concepto)
             
-            btn_ver_factura = crear_boton_icono("see.svg", "#9b59b6", "#8e44ad", "Ver Factura")
-            btn_ver_factura.clicked.connect(lambda checked, p=pago: self.ver_factura_pago(p))
-            self.tabla.setCellWidget(i, 5, crear_widget_centrado(btn_ver_factura))
-
-            acciones_widget = QWidget()
-            acciones_widget.setStyleSheet("background: transparent; border: none;")
-            acciones_layout = QHBoxLayout(acciones_widget)
-            acciones_layout.setContentsMargins(4, 4, 4, 4)
-            acciones_layout.setSpacing(6)
-            acciones_layout.setAlignment(Qt.AlignCenter)
-
+            # Ver Factura y acciones (botones pintados por DelegadoAcciones)
+            self.tabla.setItem(i, 5, item_acciones(pago))
             if pago.get('concepto', '') != "Pago de membresía":
-                btn_editar = crear_boton_icono("edit.svg", "#7a8899", "#8a9aa9", "Editar")
-                btn_editar.clicked.connect(lambda checked, p=pago: self.editar_pago(p))
-                acciones_layout.addWidget(btn_editar)
-
-            btn_eliminar = crear_boton_icono("delete.svg", "#e74c3c", "#c0392b", "Eliminar")
-            btn_eliminar.clicked.connect(lambda checked, pid=pago['id']: self.eliminar_pago(pid))
-            acciones_layout.addWidget(btn_eliminar)
-
-            self.tabla.setCellWidget(i, 6, acciones_widget)
-
-        self.tabla.setSortingEnabled(sorting_enabled)
+                self.tabla.setItem(i, 6, item_acciones(pago))
+            else:
+                self.tabla.setItem(i, 6, item_acciones(pago, ["eliminar"]))
+
+    def _on_accion_pago(self, accion, pago):
+        """Despacha los botones de las columnas Factura y Acciones"""
+        if accion == "factura":
+            self.ver_factura_pago(pago)
+        elif accion == "editar":
+            self.editar_pago(pago)
+        elif accion == "eliminar":
+            self.eliminar_pago(pago['id'])
     
     def registrar_pago(self):
         """Abre diálogo para registrar pago"""
@@ -1157,7 +1042,7 @@ class PagosView(QWidget):
             if not datos:
                 return
             
-            ok, resultado = pago_service.crear_pago_multiple(
+            futuro = escritura_service.crear_pago_multiple(
                 cliente_id=datos['cliente_id'],
                 fecha_pago=datos['fecha'],
                 monto=datos['monto'],
@@ -1165,56 +1050,60 @@ class PagosView(QWidget):
                 concepto=datos['concepto'],
                 items=datos.get('items', []),
             )
+            al_resolver(futuro, lambda resultado: self._on_pago_registrado(resultado, datos),
+                        lambda e: QMessageBox.warning(self, "Error", str(e)), parent=self)
+
+    def _on_pago_registrado(self, resultado, datos):
+        """Tras confirmarse el pago en el hilo escritor: factura y mensaje"""
+        ok, resultado = resultado
+        if not ok:
+            QMessageBox.warning(self, "Error", resultado)
+            return
 
-            if not ok:
-                QMessageBox.warning(self, "Error", resultado)
-                return
-
-            pago_id = resultado
+        pago_id = resultado
 
-            
-            # Generar factura
-            pago = pago_service.obtener_pago(pago_id)
-            cliente = cliente_service.obtener_cliente(datos['cliente_id'])
-            ruta_factura = generar_factura_pago(pago, cliente, items=datos.get('items', []))
-            
-            self.cargar_datos()
-            self.actualizar_total_mes()
-            
-            # Mensaje con estilo y botón para ver factura
-            msg = QMessageBox(self)
-            msg.setWindowTitle("Éxito")
-            msg.setText("Pago registrado correctamente")
-            msg.setInformativeText("¿Desea ver la factura generada?")
-            msg.setStyleSheet("""
-                QMessageBox {
-                    background-color: #f5f5f5;
-                }
-                QLabel {
-                    color: #2c2c2c;
-                    font-size: 13px;
-                    min-width: 300px;
-                }
-                QPushButton {
-                    background-color: #27ae60;
-                    color: white;
-                    padding: 8px 20px;
-                    border: none;
-                    border-radius: 4px;
-                    font-weight: bold;
-                    font-size: 13px;
-                    min-width: 80px;
-                }
-                QPushButton:hover {
-                    background-color: #229954;
-                }
-            """)
-            btn_ver = msg.addButton("Ver Factura", QMessageBox.ActionRole)
-            msg.addButton("Cerrar", QMessageBox.RejectRole)
-            msg.exec()
-            
-            if msg.clickedButton() == btn_ver:
-                abrir_factura(ruta_factura)
+        # Generar factura
+        pago = pago_service.obtener_pago(pago_id)
+        cliente = cliente_service.obtener_cliente(datos['cliente_id'])
+        ruta_factura = generar_factura_pago(pago, cliente, items=datos.get('items', []))
+        
+        self.cargar_datos()
+        self.actualizar_total_mes()
+        
+        # Mensaje con estilo y botón para ver factura
+        msg = QMessageBox(self)
+        msg.setWindowTitle("Éxito")
+        msg.setText("Pago registrado correctamente")
+        msg.setInformativeText("¿Desea ver la factura generada?")
+        msg.setStyleSheet("""
+            QMessageBox {
+                background-color: #f5f5f5;
+            }
+            QLabel {
+                color: #2c2c2c;
+                font-size: 13px;
+                min-width: 300px;
+            }
+            QPushButton {
+                background-color: #27ae60;
+                color: white;
+                padding: 8px 20px;
+                border: none;
+                border-radius: 4px;
+                font-weight: bold;
+                font-size: 13px;
+                min-width: 80px;
+            }
+            QPushButton:hover {
+                background-color: #229954;
+            }
+        """)
+        btn_ver = msg.addButton("Ver Factura", QMessageBox.ActionRole)
+        msg.addButton("Cerrar", QMessageBox.RejectRole)
+        msg.exec()
+        
+        if msg.clickedButton() == btn_ver:
+            abrir_factura(ruta_factura)
     
     def editar_pago(self, pago):
         """Abre diálogo para editar un pago"""
@@ -13,10 +13,12 @@ from PySide6.QtCore import Qt, QDate, QRect, QSize
 from PySide6.QtGui import (QFont, QColor, QPainter, QBrush,
                             QPen, QTextCharFormat, QPalette)
 
-from services import perfil_cliente_service, asistencia_service
+from services import perfil_cliente_service, asistencia_service, presencia_service, kiosco_service
+from services import escritura_service
 from services.membresia_service import calcular_estado_membresia
 from utils.constants import ESTADO_ACTIVA, ESTADO_POR_VENCER, ESTADO_VENCIDA
 from utils.table_styles import aplicar_estilo_tabla_moderna
+from utils.tareas import al_resolver
 
 
 # ─────────────────────── PALETA / HELPERS ────────────────────────
@@ -188,22 +190,28 @@ class CalendarioAsistencia(QCalendarWidget):
         if not perfil:
             return
 
+        # Se pinta de inmediato y la escritura va al hilo escritor; marcar y
+        # desmarcar pasan por la misma cola, así que se aplican en orden
         if dia in self._dias_asistencia:
             # Desmarcar
-            ok = asistencia_service.eliminar_asistencia(self.cliente_id, fecha)
-            if ok:
-                self._dias_asistencia.discard(dia)
+            self._dias_asistencia.discard(dia)
+            futuro = escritura_service.encolar(
+                asistencia_service.eliminar_asistencia, self.cliente_id, fecha)
         else:
             # Marcar — solo si tiene membresía o de todas formas si es manual
-            ok, _ = asistencia_service.registrar_asistencia(
+            self._dias_asistencia.add(dia)
+            futuro = escritura_service.registrar_asistencia(
                 self.cliente_id, fecha=fecha, origen="manual")
-            if ok:
-                self._dias_asistencia.add(dia)
-
         self.updateCells()
-        if perfil:
-            perfil._actualizar_stats_asistencia()
-            perfil._recargar_tabla_asistencias()
+        al_resolver(futuro, lambda resultado: self._on_asistencia_guardada(perfil),
+                    lambda e: self._on_asistencia_guardada(perfil), parent=self)
+
+    def _on_asistencia_guardada(self, perfil):
+        """Relee los días del mes (deshace la marca si la escritura falló)."""
+        perfil._recargar_calendario(self._anio, self._mes)
+        perfil._btn_salida.setVisible(presencia_service.esta_dentro(perfil.cliente_id))
+        perfil._actualizar_stats_asistencia()
+        perfil._recargar_tabla_asistencias()
 
     # ── paint ─────────────────────────────────────────────────────
     def paintCell(self, painter: QPainter, rect: QRect, qdate: QDate):
@@ -430,13 +438,15 @@ class PerfilClienteDialog(QDialog):
         btn_col = QVBoxLayout()
         btn_col.setSpacing(6)
 
+        self._btn_salida = _action_btn("🚪 Registrar salida", _COLOR_MORADO)
         self._btn_edit = _action_btn("✏️ Editar Cliente", "#555555")
         self._btn_cerrar = _action_btn("✖ Cerrar", "#7f8c8d")
 
+        self._btn_salida.clicked.connect(self._on_registrar_salida)
         self._btn_edit.clicked.connect(self._on_editar_cliente)
         self._btn_cerrar.clicked.connect(self.close)
 
-        for b in [self._btn_edit, self._btn_cerrar]:
+        for b in [self._btn_salida, self._btn_edit, self._btn_cerrar]:
             btn_col.addWidget(b)
         lay.addLayout(btn_col)
 
@@ -678,7 +688,8 @@ class PerfilClienteDialog(QDialog):
         self._lbl_sub.setText("   ".join(partes_sub) or "—")
 
         reg = r.get("fecha_registro")
-        self._lbl_reg.setText(f"Registrado: {_fmt_fecha(reg)}")
+        self._lbl_reg.setText(f"Registrado: {_fmt_fecha(reg)}   "
+                              f"Código: {kiosco_service.codigo_cliente(self.cliente_id)}")
 
         estado = r.get("estado_membresia", "Sin membresía")
         if estado == ESTADO_VENCIDA:
@@ -698,6 +709,7 @@ class PerfilClienteDialog(QDialog):
         venc = r.get("proximo_vencimiento")
         self._lbl_membresia_venc.setText(
             f"Vence: {_fmt_fecha(venc)}" if venc else "Sin vencimiento")
+        self._btn_salida.setVisible(presencia_service.esta_dentro(self.cliente_id))
 
     # ── CARDS ─────────────────────────────────────────────────────
 
@@ -853,6 +865,15 @@ class PerfilClienteDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def _on_registrar_salida(self):
+        """Cierra la visita de hoy del cliente con la hora actual."""
+        try:
+            asistencia_service.registrar_salida(self.cliente_id)
+            self._btn_salida.setVisible(False)
+            self._recargar_tabla_asistencias()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", str(e))
+
     def _on_editar_cliente(self):
         """Abre el diálogo de edición del cliente."""
         try: